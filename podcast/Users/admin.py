@@ -1,3 +1,37 @@
 from django.contrib import admin
+from django.contrib.auth.admin import UserAdmin
+from django.contrib.auth.forms import AdminUserCreationForm
+from django.utils import timezone
+from .models import CustomUser, OutboxEmail
+
+
+class CustomUserCreationForm(AdminUserCreationForm):
+    # With email, so CustomUser.clean() can reject one another account already has
+    class Meta(AdminUserCreationForm.Meta):
+        model = CustomUser
+        fields = ('username', 'email')
+
+
+@admin.register(CustomUser)
+class CustomUserAdmin(UserAdmin):
+    add_form = CustomUserCreationForm
+    add_fieldsets = (
+        (None, {'classes': ('wide',), 'fields': ('username', 'email', 'usable_password', 'password1', 'password2')}),
+    )
+    fieldsets = UserAdmin.fieldsets + (('Verification', {'fields': ('email_verified_at',)}),)
 
 # Register your models here.
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at')
+    list_filter = ('status',)
+    search_fields = ('subject',)
+    readonly_fields = ('created_at', 'sent_at', 'last_error')
+    actions = ['requeue']
+
+    def requeue(self, request, queryset):
+        updated_count = queryset.filter(status=OutboxEmail.STATUS_DEAD).update(
+            status=OutboxEmail.STATUS_PENDING, attempts=0, next_attempt_at=timezone.now()
+        )
+        self.message_user(request, f"{updated_count} emails re-queued.")
+    requeue.short_description = "Re-queue selected dead-lettered emails"
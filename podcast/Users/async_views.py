@@ -0,0 +1,102 @@
+# In your Django app's async_views.py
+# Async versions of LoginView and PasswordResetConfirmView for deployments served
+# through podcast/asgi.py. Password hashing runs in Users.hashing.hashing_pool, so
+# the event loop keeps serving other requests during a burst of logins.
+
+import json
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from rest_framework.authtoken.models import Token
+
+from .backends import users_matching_identifier
+from .hashing import HashingBusy, hashing_pool
+from .models import normalize_email_identity
+from .serializers import PasswordResetConfirmSerializer, UserSerializer
+from .throttling import LoginThrottle, check_rate
+from .tokens import consume_password_reset_token
+
+
+def _request_data(request):
+    if request.content_type == 'application/json':
+        try:
+            return json.loads(request.body or b'{}')
+        except ValueError:
+            return None
+    return request.POST
+
+
+def _busy_response():
+    return JsonResponse(
+        {'detail': 'Too many concurrent requests, please retry shortly.'},
+        status=429, headers={'Retry-After': '1'},
+    )
+
+
+# --- Login (using Token Authentication) ---
+@csrf_exempt # Token API like the DRF views, which are CSRF exempt as well
+@require_POST
+async def login_view(request):
+    data = _request_data(request)
+    if data is None:
+        return JsonResponse({'detail': 'Malformed JSON.'}, status=400)
+    identifier = data.get('username') or data.get('email')
+    password = data.get('password')
+    if not identifier or not password:
+        return JsonResponse({'non_field_errors': ["Must include either username or email, and password."]}, status=400)
+
+    # Same limits as LoginView, checked before the user lookup and any hashing
+    wait = await sync_to_async(check_rate)( # The SQLite store blocks, keep it off the event loop
+        LoginThrottle.scope, LoginThrottle().get_ident(request), normalize_email_identity(identifier),
+    )
+    if wait is not None:
+        return JsonResponse(
+            {'detail': f'Request was throttled. Expected available in {wait} seconds.'},
+            status=429, headers={'Retry-After': str(wait)},
+        )
+
+    user = await users_matching_identifier(identifier).afirst()
+    try:
+        if user is None:
+            # Hash anyway so a missing user takes as long as a wrong password
+            await hashing_pool.hash(password)
+            is_correct = False
+        else:
+            is_correct, upgraded_hash = await hashing_pool.verify(password, user.password)
+            if is_correct and upgraded_hash:
+                # Transparent upgrade when PASSWORD_HASHERS or the iteration count changed
+                user.password = upgraded_hash
+                await user.asave(update_fields=['password'])
+    except HashingBusy:
+        return _busy_response()
+
+    if not is_correct or not user.is_active: # Same answer as ModelBackend gives inactive users
+        return JsonResponse({'non_field_errors': ["Invalid credentials."]}, status=400)
+
+    token, created = await Token.objects.aget_or_create(user=user)
+    return JsonResponse({'token': token.key, 'user': UserSerializer(user).data}, status=200)
+
+
+# --- Password Reset Confirmation ---
+@csrf_exempt
+@require_POST
+async def password_reset_confirm_view(request):
+    data = _request_data(request)
+    if data is None:
+        return JsonResponse({'detail': 'Malformed JSON.'}, status=400)
+    serializer = PasswordResetConfirmSerializer(data=data)
+    if not await sync_to_async(serializer.is_valid)(): # Token checks are cheap, no hashing involved
+        return JsonResponse(serializer.errors, status=400)
+
+    user = serializer.validated_data['user']
+    try:
+        encoded = await hashing_pool.hash(serializer.validated_data['password'])
+    except HashingBusy:
+        return _busy_response()
+
+    user.password = encoded
+    await user.asave(update_fields=['password'])
+    await sync_to_async(consume_password_reset_token)(user, serializer.validated_data['token'])
+    return JsonResponse({'detail': 'Password has been reset successfully.'}, status=200)
@@ -0,0 +1,165 @@
+# In your Django app's authentication.py
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.authentication import TokenAuthentication
+
+# Defaults for the token cache, override with TOKEN_AUTH_CACHE in settings.py
+DEFAULT_TOKEN_AUTH_CACHE = {
+    'MAX_ENTRIES': 10000, # Max tokens kept in the per-process LRU
+    'TTL': 60, # Seconds a resolved token stays valid in the per-process LRU
+    'SHARED_CACHE': None, # Optional alias from CACHES used as a second tier
+    'SHARED_TTL': 300, # Seconds a resolved token stays valid in the shared tier
+}
+
+
+def get_token_cache_settings():
+    return {**DEFAULT_TOKEN_AUTH_CACHE, **getattr(settings, 'TOKEN_AUTH_CACHE', {})}
+
+
+class TokenCache:
+    """
+    Keeps resolved token key -> (user, token) pairs in an in-process LRU with a TTL,
+    optionally backed by a shared Django cache so other workers can reuse the lookup.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict() # key -> (expires_at, user, token)
+        self._keys_by_user = {} # user_id -> set of token keys, used for invalidation
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _shared(self, config):
+        alias = config['SHARED_CACHE']
+        return caches[alias] if alias else None
+
+    def get(self, key):
+        config = get_token_cache_settings()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    # Hand out copies so a view mutating request.user can't leak into other requests
+                    return copy.copy(entry[1]), copy.copy(entry[2])
+                self._drop(key)
+
+        shared = self._shared(config)
+        if shared is not None:
+            cached = shared.get(self._shared_key(key))
+            if cached is not None:
+                user, token = cached
+                self._store_local(key, user, token, config)
+                with self._lock:
+                    self.shared_hits += 1
+                return copy.copy(user), copy.copy(token)
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key, user, token):
+        config = get_token_cache_settings()
+        self._store_local(key, user, token, config)
+        shared = self._shared(config)
+        if shared is not None:
+            shared.set_many({
+                self._shared_key(key): (user, token),
+                self._shared_user_key(user.pk): key,
+            }, config['SHARED_TTL'])
+
+    def invalidate_token(self, key):
+        with self._lock:
+            self._drop(key)
+            self.invalidations += 1
+        shared = self._shared(get_token_cache_settings())
+        if shared is not None:
+            shared.delete(self._shared_key(key))
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            keys = set(self._keys_by_user.get(user_id, ()))
+            for key in keys:
+                self._drop(key)
+            self.invalidations += 1
+        shared = self._shared(get_token_cache_settings())
+        if shared is not None:
+            shared_key = shared.get(self._shared_user_key(user_id))
+            if shared_key is not None:
+                keys.add(shared_key)
+            shared.delete_many([self._shared_key(key) for key in keys] + [self._shared_user_key(user_id)])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    def stats(self):
+        """Counters for monitoring how many DB round-trips the cache is saving."""
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                'hits': self.hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'size': len(self._entries),
+                'hit_rate': (self.hits + self.shared_hits) / lookups if lookups else 0.0,
+            }
+
+    def _store_local(self, key, user, token, config):
+        with self._lock:
+            self._drop(key)
+            self._entries[key] = (time.monotonic() + config['TTL'], user, token)
+            self._keys_by_user.setdefault(user.pk, set()).add(key)
+            # Evict the least recently used tokens once we're over the limit
+            while len(self._entries) > config['MAX_ENTRIES']:
+                self._drop(next(iter(self._entries)))
+
+    def _drop(self, key):
+        # Caller must hold self._lock
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            keys = self._keys_by_user.get(entry[1].pk)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_user[entry[1].pk]
+
+    @staticmethod
+    def _shared_key(key):
+        return f'tokenauth:token:{key}'
+
+    @staticmethod
+    def _shared_user_key(user_id):
+        return f'tokenauth:user:{user_id}'
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Drop-in replacement for DRF's TokenAuthentication that skips the Token + user
+    join when the token was resolved recently. Entries are invalidated on logout,
+    password changes and is_active changes (see Users/signals.py).
+    """
+
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is not None:
+            return cached
+
+        user, token = super().authenticate_credentials(key) # Hits the DB and checks is_active
+        token_cache.set(key, user, token)
+        return user, token
@@ -0,0 +1,41 @@
+# In your Django app's backends.py
+
+from django.contrib.auth.backends import ModelBackend
+from django.db.models import Case, IntegerField, Q, Value, When
+
+from .models import CustomUser, normalize_email_identity
+
+
+def users_matching_identifier(identifier):
+    """
+    Users whose username or normalized email equals identifier, username match first
+    (one user's username may equal another user's email). Also used by the async login.
+    """
+    return (
+        CustomUser._default_manager
+        .filter(Q(username=identifier) | Q(email_normalized=normalize_email_identity(identifier)))
+        .order_by(Case(When(username=identifier, then=Value(0)), default=Value(1), output_field=IntegerField()))
+    )
+
+
+class EmailOrUsernameBackend(ModelBackend):
+    """
+    Authenticates with either the username or the email address, resolving the user
+    with one query over the username and email_normalized unique indexes.
+    """
+
+    def authenticate(self, request, username=None, password=None, email=None, **kwargs):
+        identifier = username or email
+        if identifier is None or password is None:
+            return None
+
+        user = users_matching_identifier(identifier).first()
+        if user is None:
+            # Run the default password hasher once to reduce the timing
+            # difference between an existing and a nonexistent user.
+            CustomUser().set_password(password)
+            return None
+
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
@@ -0,0 +1,99 @@
+# In your Django app's hashing.py
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password, verify_password
+
+# Defaults for the hashing pool, override with PASSWORD_HASHING_POOL in settings.py
+DEFAULT_PASSWORD_HASHING_POOL = {
+    'WORKERS': os.cpu_count() or 1, # Processes doing PBKDF2 work
+    'MAX_PENDING': (os.cpu_count() or 1) * 4, # Jobs queued or running before we answer 429
+}
+
+
+def get_hashing_pool_settings():
+    return {**DEFAULT_PASSWORD_HASHING_POOL, **getattr(settings, 'PASSWORD_HASHING_POOL', {})}
+
+
+class HashingBusy(Exception):
+    """Raised when the hashing pool already has MAX_PENDING jobs; the views turn it into a 429."""
+
+
+# --- Functions run inside the worker processes ---
+def _init_worker():
+    import django
+    django.setup() # No-op when forked from a configured parent, needed with the spawn start method
+
+
+def _verify(password, encoded):
+    """Returns (is_correct, upgraded_hash_or_None)."""
+    is_correct, must_update = verify_password(password, encoded)
+    return is_correct, make_password(password) if is_correct and must_update else None
+
+
+def _hash(password):
+    return make_password(password)
+
+
+class PasswordHashingPool:
+    """
+    Runs password hashing in a bounded ProcessPoolExecutor so a burst of logins
+    can't pin the event loop (or every worker thread) on PBKDF2.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self.pending = 0
+        self.rejected = 0
+
+    def _get_executor(self, config):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=config['WORKERS'], initializer=_init_worker)
+            return self._executor
+
+    async def _run(self, fn, *args):
+        config = get_hashing_pool_settings()
+        executor = self._get_executor(config)
+        with self._lock:
+            if self.pending >= config['MAX_PENDING']:
+                self.rejected += 1
+                raise HashingBusy()
+            self.pending += 1
+        try:
+            try:
+                return await asyncio.wrap_future(executor.submit(fn, *args))
+            except BrokenProcessPool:
+                # A worker died (e.g. OOM killed): every later job would fail too, so start a new pool
+                self._discard(executor)
+                return await asyncio.wrap_future(self._get_executor(config).submit(fn, *args))
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+    def _discard(self, executor):
+        with self._lock:
+            if self._executor is executor: # Not already replaced by a concurrent job
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    async def verify(self, password, encoded):
+        return await self._run(_verify, password, encoded)
+
+    async def hash(self, password):
+        return await self._run(_hash, password)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+hashing_pool = PasswordHashingPool()
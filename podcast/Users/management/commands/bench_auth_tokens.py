@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+
+from Users.models import CustomUser
+from Users.tokens import (
+    TOKEN_MODE_SIGNED, TOKEN_MODE_TABLE,
+    issue_password_reset_token, check_password_reset_token, consume_password_reset_token,
+)
+
+
+class Command(BaseCommand):
+    help = "Compares issue/redeem throughput of signed and table-backed password reset tokens."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        # Everything runs in a transaction that is rolled back, so the benchmark leaves no rows behind
+        with transaction.atomic():
+            user = CustomUser.objects.create_user(username='bench-tokens', email='bench-tokens@example.com', password='x')
+            for mode in (TOKEN_MODE_TABLE, TOKEN_MODE_SIGNED):
+                with override_settings(AUTH_TOKEN_MODE=mode):
+                    started = time.perf_counter()
+                    for _ in range(iterations):
+                        issue_password_reset_token(user)
+                    issue_seconds = time.perf_counter() - started
+
+                    # Re-issue before each redeem so the table mode has a live row to find
+                    redeem_seconds = 0.0
+                    for _ in range(iterations):
+                        token = issue_password_reset_token(user)
+                        started = time.perf_counter()
+                        assert check_password_reset_token(user, token)
+                        consume_password_reset_token(user, token)
+                        redeem_seconds += time.perf_counter() - started
+
+                self.stdout.write(
+                    f"{mode:>6}: issue {iterations / issue_seconds:,.0f}/s, redeem {iterations / redeem_seconds:,.0f}/s"
+                )
+            transaction.set_rollback(True)
@@ -0,0 +1,59 @@
+import random
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from Users.models import CustomUser, normalize_email_identity
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds users in a rolled-back transaction and compares the email login lookup "
+        "before (unindexed email + username lookup) and after (one email_normalized query)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1_000_000)
+        parser.add_argument('--lookups', type=int, default=200)
+
+    def handle(self, *args, **options):
+        total, lookups = options['users'], options['lookups']
+        password = make_password('bench-password') # Hash once, the lookups never check it
+        with transaction.atomic():
+            self.stdout.write(f"Seeding {total:,} users...")
+            for start in range(0, total, 10_000):
+                CustomUser.objects.bulk_create([
+                    CustomUser(
+                        username=f'bench{i}', email=f'Bench{i}@Example.com',
+                        email_normalized=f'bench{i}@example.com', password=password,
+                    )
+                    for i in range(start, min(start + 10_000, total))
+                ])
+            # As the users typed them: the old lookup only matched the exact stored case
+            emails = [f'Bench{random.randrange(total)}@Example.com' for _ in range(lookups)]
+
+            def before(email):
+                # Old LoginSerializer: scan on email, then authenticate() looks the username up again
+                username = CustomUser.objects.values_list('username', flat=True).get(email=email)
+                return CustomUser._default_manager.get_by_natural_key(username)
+
+            def after(email):
+                return CustomUser._default_manager.filter(
+                    Q(username=email) | Q(email_normalized=normalize_email_identity(email))
+                ).first()
+
+            for label, lookup in (('before', before), ('after', after)):
+                timings = []
+                for email in emails:
+                    started = time.perf_counter()
+                    lookup(email)
+                    timings.append(time.perf_counter() - started)
+                timings.sort()
+                self.stdout.write(
+                    f"{label:>6}: median {timings[len(timings) // 2] * 1000:.3f} ms, "
+                    f"p99 {timings[int(len(timings) * 0.99) - 1] * 1000:.3f} ms"
+                )
+            transaction.set_rollback(True)
@@ -0,0 +1,76 @@
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs a login storm against a running server and reports latency of an unrelated "
+        "endpoint meanwhile. Compare --login-path /api/auth/login/ (sync) with "
+        "/api/auth/async/login/ (process pool, serve with an ASGI server)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--login-path', default='/api/auth/async/login/')
+        parser.add_argument('--probe-path', default='/api/auth/authenticated-only/', help="Unrelated endpoint to measure.")
+        parser.add_argument('--token', default='', help="Token for the probe endpoint, if it needs one.")
+        parser.add_argument('--username', default='bench')
+        parser.add_argument('--password', default='bench-password')
+        parser.add_argument('--login-clients', type=int, default=32)
+        parser.add_argument('--probe-clients', type=int, default=4)
+        parser.add_argument('--duration', type=float, default=20.0)
+
+    def handle(self, *args, **options):
+        base = options['base_url'].rstrip('/')
+        deadline = time.monotonic() + options['duration']
+        login_body = json.dumps({'username': options['username'], 'password': options['password']}).encode()
+        login_status = {}
+        probe_timings = []
+        lock = threading.Lock()
+
+        def login_client():
+            while time.monotonic() < deadline:
+                request = urllib.request.Request(
+                    base + options['login_path'], data=login_body, headers={'Content-Type': 'application/json'}
+                )
+                try:
+                    with urllib.request.urlopen(request) as response:
+                        code = response.status
+                except urllib.error.HTTPError as exc:
+                    code = exc.code
+                with lock:
+                    login_status[code] = login_status.get(code, 0) + 1
+
+        def probe_client():
+            headers = {'Authorization': f"Token {options['token']}"} if options['token'] else {}
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                try:
+                    urllib.request.urlopen(urllib.request.Request(base + options['probe_path'], headers=headers)).read()
+                except urllib.error.HTTPError:
+                    pass # Only latency matters here
+                with lock:
+                    probe_timings.append(time.perf_counter() - started)
+
+        threads = [threading.Thread(target=login_client) for _ in range(options['login_clients'])]
+        threads += [threading.Thread(target=probe_client) for _ in range(options['probe_clients'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        probe_timings.sort()
+        if not probe_timings:
+            self.stderr.write("The probe endpoint never answered.")
+            return
+        pick = lambda q: probe_timings[min(int(len(probe_timings) * q), len(probe_timings) - 1)] * 1000
+        self.stdout.write(f"Login responses by status: {dict(sorted(login_status.items()))}")
+        self.stdout.write(
+            f"Probe {options['probe_path']}: {len(probe_timings)} requests, "
+            f"p50 {pick(0.5):.1f} ms, p99 {pick(0.99):.1f} ms, max {probe_timings[-1] * 1000:.1f} ms"
+        )
@@ -0,0 +1,75 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from Users.models import CustomUser, EmailVerificationToken, PasswordResetToken
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes expired password reset / email verification tokens and accounts that never "
+        "verified their email, in small batches so each delete only holds locks briefly."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Only report how many rows would be deleted.")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Rows deleted per transaction.")
+        parser.add_argument('--sleep', type=float, default=0.05, help="Seconds to pause between batches.")
+        parser.add_argument(
+            '--account-age-days', type=int, default=7,
+            help="Delete never-verified inactive accounts older than this (0 disables it).",
+        )
+        parser.add_argument('--loop', action='store_true', help="Keep running, reaping every --interval seconds.")
+        parser.add_argument('--interval', type=float, default=3600.0)
+
+    def targets(self, account_age_days):
+        """(label, queryset ordered by the indexed column) for everything that may be reaped."""
+        targets = [
+            # Same cutoff as is_valid(): created_at <= expiry_cutoff() means expired
+            ('password reset tokens', PasswordResetToken.objects.filter(
+                created_at__lte=PasswordResetToken.expiry_cutoff()).order_by('created_at')),
+            ('email verification tokens', EmailVerificationToken.objects.filter(
+                created_at__lte=EmailVerificationToken.expiry_cutoff()).order_by('created_at')),
+        ]
+        if account_age_days > 0:
+            # Matches the users_unverified_joined_idx partial index
+            targets.append(('unverified accounts', CustomUser.objects.filter(
+                is_active=False, email_verified_at__isnull=True, last_login__isnull=True,
+                date_joined__lt=timezone.now() - timezone.timedelta(days=account_age_days),
+            ).order_by('date_joined')))
+        return targets
+
+    def reap(self, label, queryset, options):
+        model = queryset.model
+        deleted = batches = 0
+        started = time.monotonic()
+        while True:
+            with transaction.atomic():
+                # Pick the next batch through the index, then delete by primary key
+                pks = list(queryset.values_list('pk', flat=True)[:options['batch_size']])
+                if not pks:
+                    break
+                # Users go through the collector so their tokens, podcasts, etc. cascade
+                model.objects.filter(pk__in=pks).delete()
+            deleted += len(pks)
+            batches += 1
+            if batches % 10 == 0:
+                elapsed = time.monotonic() - started
+                self.stdout.write(f"  {label}: {deleted:,} deleted ({deleted / elapsed:,.0f} rows/s)")
+            time.sleep(options['sleep'])
+        elapsed = time.monotonic() - started
+        rate = deleted / elapsed if elapsed else 0.0
+        self.stdout.write(f"{label}: deleted {deleted:,} rows in {batches} batches, {elapsed:.1f}s ({rate:,.0f} rows/s)")
+
+    def handle(self, *args, **options):
+        while True:
+            for label, queryset in self.targets(options['account_age_days']):
+                if options['dry_run']:
+                    self.stdout.write(f"{label}: {queryset.count():,} rows would be deleted")
+                else:
+                    self.reap(label, queryset, options)
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
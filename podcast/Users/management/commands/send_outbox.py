@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from Users.outbox import drain_all, get_outbox_settings, purge_sent, queue_depth
+
+
+class Command(BaseCommand):
+    help = "Sends queued emails from the outbox over a single pooled mail connection per batch."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help="Messages per batch (default: EMAIL_OUTBOX['BATCH_SIZE']).")
+        parser.add_argument('--loop', action='store_true', help="Keep polling the outbox instead of exiting once it is empty.")
+        parser.add_argument('--interval', type=float, default=5.0, help="Seconds to sleep between polls in --loop mode.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size'] or get_outbox_settings()['BATCH_SIZE']
+        while True:
+            totals = drain_all(batch_size=batch_size)
+            purged = purge_sent()
+            handled = totals['sent'] + totals['retried'] + totals['dead']
+            if handled or purged or not options['loop']:
+                rate = totals['sent'] / totals['elapsed'] if totals['elapsed'] else 0.0
+                depth = queue_depth()
+                self.stdout.write(
+                    f"Sent {totals['sent']}, retried {totals['retried']}, dead-lettered {totals['dead']} "
+                    f"in {totals['elapsed']:.2f}s ({rate:.1f} msg/s). "
+                    f"Queue depth: {depth['pending']} pending, {depth['dead']} dead. Purged {purged} old sent messages."
+                )
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
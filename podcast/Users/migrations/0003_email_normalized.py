@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:22
+
+from django.db import migrations, models, transaction
+
+BATCH_SIZE = 5000
+
+
+def backfill_email_normalized(apps, schema_editor):
+    """
+    Fills email_normalized in primary key order, one short transaction per batch.
+    If several accounts share an email (case-insensitively) only the oldest one gets
+    it; the others keep NULL and can still log in with their username.
+    """
+    CustomUser = apps.get_model('Users', 'CustomUser')
+    seen = set(
+        CustomUser.objects.filter(email_normalized__isnull=False).values_list('email_normalized', flat=True)
+    )
+    last_pk = 0
+    while True:
+        with transaction.atomic():
+            batch = list(
+                CustomUser.objects.filter(pk__gt=last_pk, email_normalized__isnull=True)
+                .order_by('pk').only('pk', 'email')[:BATCH_SIZE]
+            )
+            if not batch:
+                break
+            changed = []
+            for user in batch:
+                normalized = (user.email or '').strip().lower() or None
+                if normalized and normalized not in seen:
+                    seen.add(normalized)
+                    user.email_normalized = normalized
+                    changed.append(user)
+            CustomUser.objects.bulk_update(changed, ['email_normalized'])
+            last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    atomic = False # Let each backfill batch commit on its own
+
+    dependencies = [
+        ('Users', '0002_outboxemail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='email_normalized',
+            field=models.CharField(blank=True, editable=False, max_length=254, null=True),
+        ),
+        migrations.RunPython(backfill_email_normalized, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='customuser',
+            name='email_normalized',
+            field=models.CharField(blank=True, editable=False, max_length=254, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Users', '0004_reaper_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='outboxemail',
+            index=models.Index(fields=['status', 'sent_at'], name='outbox_status_sent_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:05
+
+import Users.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Users', '0005_outbox_sent_index'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='customuser',
+            managers=[
+                ('objects', Users.models.CustomUserManager()),
+            ],
+        ),
+    ]
@@ -1,10 +1,48 @@
 # In your Django app's models.py
 import uuid # For generating unique email verification tokens
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
 from django.db import models
-from django.contrib.auth.models import AbstractUser # Import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager # Import AbstractUser
 from django.conf import settings
 from django.utils import timezone
 
+def normalize_email_identity(email):
+    """Lowercased, trimmed email used for case-insensitive lookups (None when blank)."""
+    email = (email or '').strip().lower()
+    return email or None
+
+
+class CustomUserQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        # Bulk updates skip post_save (Users/signals.py), so drop the cached tokens of the
+        # accounts being deactivated or given a new password here
+        if 'is_active' not in kwargs and 'password' not in kwargs:
+            return super().update(**kwargs)
+        from .authentication import token_cache
+        user_ids = list(self.values_list('pk', flat=True))
+        updated = super().update(**kwargs)
+        for user_id in user_ids:
+            token_cache.invalidate_user(user_id)
+        return updated
+
+
+class CustomUserManager(UserManager.from_queryset(CustomUserQuerySet)):
+    """create_user() / create_superuser() reject an email another account has in any case (createsuperuser prints it)."""
+
+    def _create_user(self, username, email, password, **extra_fields):
+        user = self._create_user_object(username, email, password, **extra_fields)
+        user.validate_email_available()
+        user.save(using=self._db)
+        return user
+
+    async def _acreate_user(self, username, email, password, **extra_fields):
+        user = self._create_user_object(username, email, password, **extra_fields)
+        await sync_to_async(user.validate_email_available)()
+        await user.asave(using=self._db)
+        return user
+
+
 # Extend the built-in User model to add email_verified_at
 class CustomUser(AbstractUser):
     # Django's AbstractUser already includes:
@@ -12,25 +50,79 @@ class CustomUser(AbstractUser):
     # date_joined, last_login, groups, user_permissions, password
 
     email_verified_at = models.DateTimeField(null=True, blank=True) # Add this field
+    # Normalized copy of email with a unique index, so email lookups and email login
+    # are an index seek instead of a table scan. Kept in sync by save().
+    email_normalized = models.CharField(max_length=254, unique=True, null=True, blank=True, editable=False)
+
+    objects = CustomUserManager()
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Partial index over accounts that never verified their email, for the reap_auth command
+            models.Index(
+                fields=['date_joined'], name='users_unverified_joined_idx',
+                condition=models.Q(is_active=False, email_verified_at__isnull=True),
+            ),
+        ]
 
     # You can add other custom fields here if needed later,
     # but for Task 1, this is the main addition.
 
     # Ensure you set AUTH_USER_MODEL = 'your_app_name.CustomUser' in settings.py
 
+    def _email_held_elsewhere(self, normalized):
+        return type(self)._default_manager.filter(email_normalized=normalized).exclude(pk=self.pk).exists()
+
+    def _is_legacy_duplicate(self, normalized):
+        """
+        True for an account migration 0003 left NULL because its email duplicates an older
+        one case-insensitively, while that email is unchanged.
+        """
+        if self.pk is None:
+            return False
+        stored = type(self)._default_manager.filter(pk=self.pk, email_normalized__isnull=True).values_list('email', flat=True).first()
+        return stored is not None and normalize_email_identity(stored) == normalized
+
+    def validate_email_available(self):
+        """Raises ValidationError if another account has this email, ignoring case."""
+        normalized = normalize_email_identity(self.email)
+        if normalized and self._email_held_elsewhere(normalized) and not self._is_legacy_duplicate(normalized):
+            raise ValidationError({'email': "A user with that email already exists."})
+
+    def clean(self):
+        super().clean()
+        self.validate_email_available() # Admin forms; the unique column would fail with IntegrityError
+
+    def save(self, *args, **kwargs):
+        normalized = normalize_email_identity(self.email)
+        if normalized != self.email_normalized and normalized and self.pk is not None:
+            # Legacy duplicates keep NULL (and username login) instead of failing every save;
+            # any other account taking a used email fails on the unique column
+            if self._is_legacy_duplicate(normalized) and self._email_held_elsewhere(normalized):
+                normalized = None
+        self.email_normalized = normalized
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'email' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'email_normalized'}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.email or self.username # Represent user by email if available
 
 class PasswordResetToken(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     token = models.CharField(max_length=100, unique=True) # Use a sufficiently long unique token
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True) # Indexed for the reap_auth command
+
+    @classmethod
+    def expiry_cutoff(cls):
+        """Tokens created at or before this moment are expired."""
+        # Configure token expiry time in settings.py (e.g., 1 hour)
+        return timezone.now() - timezone.timedelta(hours=settings.PASSWORD_RESET_TIMEOUT_HOURS)
 
     def is_valid(self):
         """Checks if the token is still valid (e.g., not expired)."""
-        # Configure token expiry time in settings.py (e.g., 1 hour)
-        expiry_time = timezone.now() - timezone.timedelta(hours=settings.PASSWORD_RESET_TIMEOUT_HOURS)
-        return self.created_at > expiry_time
+        return self.created_at > self.expiry_cutoff()
 
     def __str__(self):
         return f"Password Reset Token for {self.user.email}"
@@ -39,15 +131,53 @@ class PasswordResetToken(models.Model):
 class EmailVerificationToken(models.Model):
     user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE) # One token per user
     token = models.UUIDField(default=uuid.uuid4, editable=False, unique=True) # Using UUID for unique tokens
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True) # Indexed for the reap_auth command
+
+    @classmethod
+    def expiry_cutoff(cls):
+        """Tokens created at or before this moment are expired."""
+        # Configure token expiry time in settings.py (e.g., 24 hours)
+        return timezone.now() - timezone.timedelta(hours=settings.EMAIL_VERIFICATION_TIMEOUT_HOURS)
 
     def is_valid(self):
          """Checks if the token is still valid (e.g., not expired)."""
-         # Configure token expiry time in settings.py (e.g., 24 hours)
-         expiry_time = timezone.now() - timezone.timedelta(hours=settings.EMAIL_VERIFICATION_TIMEOUT_HOURS)
-         return self.created_at > expiry_time
+         return self.created_at > self.expiry_cutoff()
 
 
     def __str__(self):
         return f"Email Verification Token for {self.user.email}"
 
+
+# Outbox for emails queued by the request/response cycle and sent by the send_outbox worker
+class OutboxEmail(models.Model):
+    STATUS_PENDING = 'pending'
+    STATUS_SENT = 'sent'
+    STATUS_DEAD = 'dead' # Gave up after EMAIL_OUTBOX['MAX_ATTEMPTS'] tries
+    STATUS_CHOICES = (
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_DEAD, 'Dead letter'),
+    )
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField() # Plain text part
+    html_body = models.TextField(blank=True) # Optional HTML alternative
+    from_email = models.CharField(max_length=254)
+    to = models.JSONField(default=list) # List of recipient addresses
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now) # Pushed back on every failed attempt
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # The worker only ever asks for "pending and due", oldest first
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_status_due_idx'),
+            # Sent messages past EMAIL_OUTBOX['SENT_RETENTION'] (outbox.purge_sent)
+            models.Index(fields=['status', 'sent_at'], name='outbox_status_sent_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)} ({self.status})"
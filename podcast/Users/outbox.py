@@ -0,0 +1,169 @@
+# In your Django app's outbox.py
+
+import logging
+import time
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import connection, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import OutboxEmail
+
+logger = logging.getLogger(__name__)
+
+# Defaults for the outbox worker, override with EMAIL_OUTBOX in settings.py
+DEFAULT_EMAIL_OUTBOX = {
+    'BATCH_SIZE': 100, # Messages claimed per drain() call
+    'MAX_ATTEMPTS': 5, # Attempts before a message is dead-lettered
+    'RETRY_BACKOFF': 30, # Seconds before the first retry, doubled on every further failure
+    'MAX_RETRY_DELAY': 3600, # Upper bound for the retry delay in seconds
+    'SENT_RETENTION': 7 * 86400, # Seconds a sent message is kept before purge_sent() deletes it, None keeps them
+}
+
+
+def get_outbox_settings():
+    return {**DEFAULT_EMAIL_OUTBOX, **getattr(settings, 'EMAIL_OUTBOX', {})}
+
+
+def enqueue_email(subject, message, from_email, recipient_list, html_message=None):
+    """
+    Queues an email instead of sending it inside the request.
+    Takes the same arguments as django.core.mail.send_mail.
+    """
+    return OutboxEmail.objects.create(
+        subject=subject,
+        body=message,
+        html_body=html_message or '',
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        to=list(recipient_list),
+    )
+
+
+def retry_delay(attempts, config=None):
+    """Exponential backoff: RETRY_BACKOFF, 2x, 4x, ... capped at MAX_RETRY_DELAY."""
+    config = config or get_outbox_settings()
+    return min(config['RETRY_BACKOFF'] * (2 ** max(attempts - 1, 0)), config['MAX_RETRY_DELAY'])
+
+
+def _build_message(email, mail_connection):
+    message = EmailMultiAlternatives(
+        subject=email.subject,
+        body=email.body,
+        from_email=email.from_email,
+        to=email.to,
+        connection=mail_connection,
+    )
+    if email.html_body:
+        message.attach_alternative(email.html_body, 'text/html')
+    return message
+
+
+def _record_failure(email, exc, config, result):
+    email.attempts += 1
+    email.last_error = f"{type(exc).__name__}: {exc}"
+    logger.warning("Outbox email %s failed (attempt %s): %s", email.pk, email.attempts, exc)
+    if email.attempts >= config['MAX_ATTEMPTS']:
+        email.status = OutboxEmail.STATUS_DEAD
+        result['dead'] += 1
+    else:
+        email.next_attempt_at = timezone.now() + timezone.timedelta(seconds=retry_delay(email.attempts, config))
+        result['retried'] += 1
+
+
+def drain(batch_size=None, mail_connection=None):
+    """
+    Sends one batch of due messages over a single reused mail connection.
+    Returns a dict with the number of messages sent, rescheduled and dead-lettered.
+    """
+    config = get_outbox_settings()
+    batch_size = batch_size or config['BATCH_SIZE']
+    result = {'sent': 0, 'retried': 0, 'dead': 0}
+
+    # With SKIP LOCKED (PostgreSQL, MySQL 8) several workers can drain the table without
+    # sending a message twice. Elsewhere (SQLite) run a single worker and don't hold a
+    # transaction open during SMTP, or it would block the views enqueueing new mail.
+    skip_locked = connection.features.has_select_for_update_skip_locked
+    with transaction.atomic() if skip_locked else nullcontext():
+        queryset = OutboxEmail.objects.filter(
+            status=OutboxEmail.STATUS_PENDING, next_attempt_at__lte=timezone.now()
+        ).order_by('next_attempt_at', 'id')
+        if skip_locked:
+            queryset = queryset.select_for_update(skip_locked=True)
+        batch = list(queryset[:batch_size])
+        if not batch:
+            return result
+
+        mail_connection = mail_connection or get_connection()
+        try:
+            mail_connection.open() # One handshake for the whole batch
+        except Exception as exc:
+            # Mail server unreachable: count it as a failed attempt for every claimed message
+            for email in batch:
+                _record_failure(email, exc, config, result)
+        else:
+            try:
+                for email in batch:
+                    try:
+                        mail_connection.send_messages([_build_message(email, mail_connection)])
+                    except Exception as exc:
+                        _record_failure(email, exc, config, result)
+                        # The server may have dropped us, reconnect before the next message
+                        mail_connection.close()
+                        try:
+                            mail_connection.open()
+                        except Exception:
+                            pass # send_messages() retries the connect and records the failure
+                    else:
+                        email.attempts += 1
+                        email.status = OutboxEmail.STATUS_SENT
+                        email.sent_at = timezone.now()
+                        email.last_error = ''
+                        result['sent'] += 1
+            finally:
+                mail_connection.close()
+
+        OutboxEmail.objects.bulk_update(
+            batch, ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at']
+        )
+    return result
+
+
+def drain_all(batch_size=None, mail_connection=None):
+    """Drains batches until nothing is due. Returns totals plus elapsed seconds."""
+    totals = {'sent': 0, 'retried': 0, 'dead': 0}
+    started = time.monotonic()
+    while True:
+        result = drain(batch_size=batch_size, mail_connection=mail_connection)
+        for key, value in result.items():
+            totals[key] += value
+        if not any(result.values()):
+            break
+    totals['elapsed'] = time.monotonic() - started
+    return totals
+
+
+def purge_sent(batch_size=1000):
+    """Deletes sent messages older than SENT_RETENTION, in batches. Returns how many were deleted."""
+    retention = get_outbox_settings()['SENT_RETENTION']
+    if retention is None:
+        return 0
+    cutoff = timezone.now() - timezone.timedelta(seconds=retention)
+    expired = OutboxEmail.objects.filter(status=OutboxEmail.STATUS_SENT, sent_at__lte=cutoff) # outbox_status_sent_idx
+    deleted = 0
+    while True:
+        ids = list(expired.values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        # Short transactions, so the views enqueueing mail aren't blocked behind a big DELETE
+        deleted += OutboxEmail.objects.filter(pk__in=ids).delete()[0]
+
+
+def queue_depth():
+    """Number of messages per status, e.g. {'pending': 3, 'sent': 120, 'dead': 1}."""
+    depth = {status: 0 for status, _ in OutboxEmail.STATUS_CHOICES}
+    for row in OutboxEmail.objects.values('status').annotate(count=Count('id')).order_by():
+        depth[row['status']] = row['count']
+    return depth
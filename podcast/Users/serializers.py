@@ -5,7 +5,9 @@ from django.contrib.auth import authenticate # Django's built-in authenticate fu
 from django.conf import settings
 from django.utils import timezone
 from rest_framework.authtoken.models import Token
-from .models import CustomUser, PasswordResetToken, EmailVerificationToken # Use CustomUser
+from podcast.projection import Projected # Column-based fast path for list responses
+from .models import CustomUser, normalize_email_identity # Use CustomUser
+from .tokens import check_password_reset_token
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -14,6 +16,10 @@ class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = CustomUser # Use CustomUser
         fields = ('id', 'username', 'email', 'is_staff', 'email_verified') # Include email_verified
+        # Same as get_email_verified, from the column (podcast/projection.py)
+        projected_fields = {
+            'email_verified': Projected(['email_verified_at'], lambda context, verified_at: verified_at is not None),
+        }
 
     def get_email_verified(self, obj):
         return obj.email_verified_at is not None # Check if the timestamp is set
@@ -26,6 +32,13 @@ class RegisterSerializer(serializers.ModelSerializer):
         model = CustomUser # Use CustomUser
         fields = ('username', 'email', 'password')
 
+    def validate_email(self, value):
+        # email_normalized is unique, so reject duplicates here instead of failing on insert
+        normalized = normalize_email_identity(value)
+        if normalized and CustomUser.objects.filter(email_normalized=normalized).exists():
+            raise serializers.ValidationError("A user with that email already exists.")
+        return value
+
     def create(self, validated_data):
         # Create user as inactive until email is verified
         user = CustomUser.objects.create_user(
@@ -50,15 +63,8 @@ class LoginSerializer(serializers.Serializer):
         if not (username or email):
             raise serializers.ValidationError("Must include either username or email.")
 
-        user = None
-        if username:
-            user = authenticate(username=username, password=password)
-        elif email:
-            try:
-                temp_user = CustomUser.objects.get(email=email) # Use CustomUser
-                user = authenticate(username=temp_user.username, password=password)
-            except CustomUser.DoesNotExist: # Use CustomUser
-                pass
+        # EmailOrUsernameBackend resolves either identifier in a single indexed query
+        user = authenticate(self.context.get('request'), username=username, email=email, password=password)
 
         if user is None:
             raise serializers.ValidationError("Invalid credentials.")
@@ -96,14 +102,13 @@ class PasswordResetConfirmSerializer(serializers.Serializer):
         if password != password_confirm:
             raise serializers.ValidationError("Passwords do not match.")
 
-        # Check if a valid token exists for this email and get the user via the token
+        # Check the token against the user it was issued for
         try:
-            reset_token = PasswordResetToken.objects.select_related('user').get(email=email, token=token) # Use select_related for user
-            if not reset_token.is_valid(): # Use the model method to check expiry
-                 raise serializers.ValidationError("Invalid or expired token.")
-            data['user'] = reset_token.user # Attach the user object
-            data['reset_token_obj'] = reset_token # Attach the token object for deletion
-        except PasswordResetToken.DoesNotExist:
+            user = CustomUser.objects.get(email_normalized=normalize_email_identity(email))
+        except CustomUser.DoesNotExist:
+            raise serializers.ValidationError("Invalid or expired token.")
+        if not check_password_reset_token(user, token): # Signed or table-backed, see Users/tokens.py
             raise serializers.ValidationError("Invalid or expired token.")
+        data['user'] = user # Attach the user object
 
         return data
\ No newline at end of file
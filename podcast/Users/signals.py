@@ -0,0 +1,26 @@
+# In your Django app's signals.py
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import token_cache
+from .models import CustomUser
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    # LogoutView deletes request.user.auth_token, so the cached entry has to go too
+    token_cache.invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=CustomUser)
+def invalidate_saved_user(sender, instance, created, **kwargs):
+    # Password resets (set_password + save) and is_active changes both go through save()
+    if not created:
+        token_cache.invalidate_user(instance.pk)
+
+
+@receiver(post_delete, sender=CustomUser)
+def invalidate_deleted_user(sender, instance, **kwargs):
+    token_cache.invalidate_user(instance.pk)
@@ -1,3 +1,315 @@
-from django.test import TestCase
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from io import StringIO
+from smtplib import SMTPException
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, check_password
+from django.core import mail
+from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, transaction
+from django.core.mail.backends import locmem
+from django.test import Client, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from . import outbox, throttling, tokens
+from .admin import CustomUserCreationForm
+from .authentication import token_cache
+from .hashing import get_hashing_pool_settings, hashing_pool
+from .models import CustomUser, OutboxEmail, PasswordResetToken
+
+
+class EmailNormalizedTests(TestCase):
+    """email_normalized (migration 0003 leaves NULL on accounts that duplicate an older email)."""
+
+    def test_collided_account_saves(self):
+        CustomUser.objects.create_user(username='first', email='Same@example.com', password='x')
+        second = CustomUser.objects.create_user(username='second', email='other@example.com', password='x')
+        # What the backfill leaves behind for a newer account with the same email
+        CustomUser.objects.filter(pk=second.pk).update(email='same@EXAMPLE.com', email_normalized=None)
+        second.refresh_from_db()
+
+        second.set_password('y')
+        second.first_name = 'Second'
+        second.save() # Used to raise IntegrityError on the unique column
+        second.refresh_from_db()
+        self.assertIsNone(second.email_normalized)
+
+        second.email = 'second@example.com'
+        second.save(update_fields=['email'])
+        second.refresh_from_db()
+        self.assertEqual(second.email_normalized, 'second@example.com')
+
+    def test_duplicate_email_rejected(self):
+        first = CustomUser.objects.create_user(username='first', email='Same@example.com', password='x')
+        with self.assertRaises(ValidationError):
+            CustomUser.objects.create_user(username='second', email='same@EXAMPLE.com', password='x')
+        with self.assertRaisesMessage(CommandError, 'A user with that email already exists.'):
+            call_command('createsuperuser', '--noinput', username='admin', email='SAME@example.com', stdout=StringIO())
+
+        form = CustomUserCreationForm(data={
+            'username': 'second', 'email': 'same@example.com', 'usable_password': 'true', 'password1': 'Long pass 123', 'password2': 'Long pass 123',
+        })
+        self.assertFalse(form.is_valid())
+        self.assertIn('email', form.errors)
+
+        other = CustomUser.objects.create_user(username='other', email='other@example.com', password='x')
+        other.email = 'SAME@example.com'
+        with self.assertRaises(ValidationError):
+            other.full_clean()
+        with self.assertRaises(IntegrityError): # Not quietly left without email login
+            with transaction.atomic():
+                other.save()
+        first.email = 'First@Example.com' # Its own address in another case
+        first.full_clean()
+
+
+class TokenCacheTests(TestCase):
+    """Resolved tokens are cached per process and dropped on logout and user saves (Users/authentication.py)."""
+
+    def setUp(self):
+        token_cache.clear()
+        self.addCleanup(token_cache.clear)
+        self.user = CustomUser.objects.create_user(username='owner', email='owner@example.com', password='x')
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def get(self):
+        return self.client.get('/api/auth/authenticated-only/').status_code
+
+    def test_cached_until_token_deleted(self):
+        self.assertEqual(self.get(), 200)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get(), 200)
+        self.assertEqual(self.client.post('/api/auth/logout/').status_code, 200)
+        self.assertEqual(self.get(), 401)
+
+    def test_user_save_invalidates(self):
+        self.assertEqual(self.get(), 200)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.get(), 401)
+
+    def test_bulk_deactivate_invalidates(self):
+        self.assertEqual(self.get(), 200)
+        CustomUser.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.get(), 401)
+
+
+class SignedTokenTests(TestCase):
+    """Stateless verification and reset tokens (Users/tokens.py)."""
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='owner', email='owner@example.com', password='x')
+
+    def test_reset_token_used_up_and_purpose_bound(self):
+        token = tokens.issue_password_reset_token(self.user)
+        self.assertTrue(tokens.check_password_reset_token(self.user, token))
+        self.assertFalse(tokens.consume_email_verification_token(self.user, token)) # Other purpose
+        self.user.set_password('new password')
+        self.user.save()
+        self.assertFalse(tokens.check_password_reset_token(self.user, token))
+
+    def test_expiry(self):
+        token = tokens.issue_email_verification_token(self.user)
+        generator = tokens.email_verification_token_generator
+        later = datetime.now() + timedelta(hours=settings.EMAIL_VERIFICATION_TIMEOUT_HOURS)
+        with mock.patch.object(generator, '_now', return_value=later - timedelta(minutes=1)):
+            self.assertTrue(tokens.consume_email_verification_token(self.user, token))
+        with mock.patch.object(generator, '_now', return_value=later + timedelta(minutes=1)):
+            self.assertFalse(tokens.consume_email_verification_token(self.user, token))
+
+
+class AsyncAuthViewTests(TestCase):
+    """The async login and reset views with the process pool (Users/async_views.py, Users/hashing.py)."""
+
+    def setUp(self):
+        throttling._stores.clear()
+        self.addCleanup(throttling._stores.clear)
+        hashing_pool.shutdown() # Forked under this test's settings
+        self.addCleanup(hashing_pool.shutdown)
+        self.user = CustomUser.objects.create_user(username='owner', email='owner@example.com', password='pw')
+
+    def post(self, url, data):
+        return Client().post(url, data, content_type='application/json')
+
+    def test_login(self):
+        response = self.post('/api/auth/async/login/', {'username': 'Owner@Example.com', 'password': 'pw'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['token'], Token.objects.get(user=self.user).key)
+        self.assertEqual(self.post('/api/auth/async/login/', {'username': 'owner', 'password': 'wrong'}).status_code, 400)
+        self.assertEqual(self.post('/api/auth/async/login/', {'username': 'nobody', 'password': 'pw'}).status_code, 400)
+
+    def test_login_upgrades_the_hash(self):
+        old = PBKDF2PasswordHasher().encode('pw', PBKDF2PasswordHasher().salt(), iterations=1000)
+        CustomUser.objects.filter(pk=self.user.pk).update(password=old)
+        self.assertEqual(self.post('/api/auth/async/login/', {'username': 'owner', 'password': 'pw'}).status_code, 200)
+        self.user.refresh_from_db()
+        self.assertNotEqual(self.user.password, old)
+        self.assertEqual(self.user.password.split('$')[1], str(PBKDF2PasswordHasher.iterations))
+        self.assertTrue(self.user.check_password('pw'))
+
+    @override_settings(PASSWORD_HASHING_POOL={'MAX_PENDING': 0})
+    def test_busy_pool_answers_429(self):
+        rejected = hashing_pool.rejected
+        response = self.post('/api/auth/async/login/', {'username': 'owner', 'password': 'pw'})
+        self.assertEqual((response.status_code, response['Retry-After']), (429, '1'))
+        self.assertEqual(hashing_pool.rejected, rejected + 1)
+        self.assertFalse(Token.objects.filter(user=self.user).exists())
+
+    def test_password_reset_confirm(self):
+        token = tokens.issue_password_reset_token(self.user)
+        data = {'email': 'owner@example.com', 'token': token, 'password': 'new pw', 'password_confirm': 'new pw'}
+        self.assertEqual(self.post('/api/auth/async/password/reset/', data).status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('new pw'))
+        self.assertEqual(self.post('/api/auth/async/password/reset/', data).status_code, 400) # Used up
+
+    def test_pool_recreated_after_a_worker_dies(self):
+        executor = hashing_pool._get_executor(get_hashing_pool_settings())
+        with mock.patch.object(executor, 'submit', side_effect=BrokenProcessPool):
+            encoded = async_to_sync(hashing_pool.hash)('pw')
+        self.assertTrue(check_password('pw', encoded))
+        self.assertIsNot(hashing_pool._executor, executor)
+
+
+class ReapAuthTests(TestCase):
+    """reap_auth deletes expired tokens and abandoned sign-ups, nothing else (Users/management/commands/reap_auth.py)."""
+
+    def setUp(self):
+        old = timezone.now() - timedelta(days=10)
+        self.abandoned = []
+        for i in range(3):
+            self.abandoned.append(self.user(f'abandoned{i}', is_active=False, date_joined=old).pk)
+        self.kept = [
+            self.user('verified', is_active=False, date_joined=old, email_verified_at=old).pk,
+            self.user('returning', is_active=False, date_joined=old, last_login=old).pk,
+            self.user('active', is_active=True, date_joined=old).pk,
+            self.user('new', is_active=False).pk,
+        ]
+        owner = CustomUser.objects.get(pk=self.kept[2])
+        expired = PasswordResetToken.objects.create(user=owner, token='expired')
+        PasswordResetToken.objects.filter(pk=expired.pk).update(created_at=old)
+        self.fresh_token = PasswordResetToken.objects.create(user=owner, token='fresh')
+
+    def user(self, username, **fields):
+        user = CustomUser.objects.create_user(username=username, email=f'{username}@example.com', password='x')
+        CustomUser.objects.filter(pk=user.pk).update(**fields)
+        return user
+
+    def reap(self, *args):
+        out = StringIO()
+        call_command('reap_auth', '--sleep=0', *args, stdout=out)
+        return out.getvalue()
+
+    def test_dry_run_deletes_nothing(self):
+        out = self.reap('--dry-run')
+        self.assertIn('unverified accounts: 3 rows would be deleted', out)
+        self.assertIn('password reset tokens: 1 rows would be deleted', out)
+        self.assertEqual(CustomUser.objects.count(), 7)
+        self.assertEqual(PasswordResetToken.objects.count(), 2)
+
+    def test_reaps_in_batches(self):
+        out = self.reap('--batch-size=2')
+        self.assertIn('unverified accounts: deleted 3 rows in 2 batches', out)
+        self.assertFalse(CustomUser.objects.filter(pk__in=self.abandoned).exists())
+        self.assertEqual(set(CustomUser.objects.values_list('pk', flat=True)), set(self.kept))
+        self.assertEqual(list(PasswordResetToken.objects.all()), [self.fresh_token])
+
+
+class FailingBackend(locmem.EmailBackend):
+    def send_messages(self, messages):
+        raise SMTPException('Connection unexpectedly closed')
+
+
+@override_settings(EMAIL_OUTBOX={'MAX_ATTEMPTS': 3, 'RETRY_BACKOFF': 30, 'MAX_RETRY_DELAY': 3600})
+class OutboxTests(TestCase):
+    """Queued emails sent, retried and dead-lettered by the worker (Users/outbox.py)."""
+
+    def setUp(self):
+        self.email = outbox.enqueue_email('Hi', 'Body', None, ['to@example.com'], html_message='<p>Body</p>')
+
+    def make_due(self):
+        OutboxEmail.objects.update(next_attempt_at=timezone.now())
+
+    def test_send(self):
+        self.assertEqual(outbox.drain(), {'sent': 1, 'retried': 0, 'dead': 0})
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].alternatives[0][1], 'text/html')
+        self.email.refresh_from_db()
+        self.assertEqual((self.email.status, self.email.attempts), (OutboxEmail.STATUS_SENT, 1))
+        self.assertEqual(outbox.drain(), {'sent': 0, 'retried': 0, 'dead': 0})
+
+    def test_retry_with_backoff_then_dead_letter(self):
+        for attempt, delay in ((1, 30), (2, 60)):
+            before = timezone.now()
+            self.assertEqual(outbox.drain(mail_connection=FailingBackend()), {'sent': 0, 'retried': 1, 'dead': 0})
+            self.email.refresh_from_db()
+            self.assertEqual(self.email.attempts, attempt)
+            self.assertIn('SMTPException', self.email.last_error)
+            self.assertGreaterEqual(self.email.next_attempt_at, before + timedelta(seconds=delay))
+            self.assertEqual(outbox.drain(), {'sent': 0, 'retried': 0, 'dead': 0}) # Not due yet
+            self.make_due()
+        self.assertEqual(outbox.drain(mail_connection=FailingBackend()), {'sent': 0, 'retried': 0, 'dead': 1})
+        self.make_due()
+        self.assertEqual(outbox.drain(), {'sent': 0, 'retried': 0, 'dead': 0}) # Dead letters aren't retried
+        self.assertEqual(mail.outbox, [])
+
+    def test_queue_depth_and_purge(self):
+        old = outbox.enqueue_email('Old', 'Body', None, ['to@example.com'])
+        outbox.drain()
+        OutboxEmail.objects.filter(pk=old.pk).update(sent_at=timezone.now() - timedelta(days=8))
+        outbox.enqueue_email('Later', 'Body', None, ['to@example.com'])
+        self.assertEqual(outbox.queue_depth(), {'pending': 1, 'sent': 2, 'dead': 0})
+        self.assertEqual(outbox.purge_sent(batch_size=1), 1) # Past SENT_RETENTION
+        self.assertEqual(outbox.queue_depth(), {'pending': 1, 'sent': 1, 'dead': 0})
+
+
+class SlidingWindowThrottleTests(TestCase):
+    """Per-IP and per-identity sliding windows on the auth endpoints (Users/throttling.py)."""
+
+    def setUp(self):
+        throttling._stores.clear() # Memory stores are per process, start from empty counters
+        self.addCleanup(throttling._stores.clear)
+
+    def test_window_rollover(self):
+        store = throttling.MemoryStore(max_keys=10)
+        for _ in range(4):
+            store.hit('k', 60, 120.0)
+        self.assertEqual(store.hit('k', 60, 120.0), 5)
+        self.assertEqual(store.hit('k', 60, 180.0), 1 + 5) # New window, the previous one still fully counts
+        self.assertEqual(store.hit('k', 60, 210.0), 2 + 5 * 0.5) # Half of it has slid out
+        self.assertEqual(store.hit('k', 60, 300.0), 1) # Two windows later nothing carries over
+
+    def test_evicts_least_recently_hit(self):
+        store = throttling.MemoryStore(max_keys=2)
+        store.hit('a', 60, 0.0)
+        store.hit('b', 60, 0.0)
+        store.hit('a', 60, 0.0)
+        store.hit('c', 60, 0.0) # Full: evicts b
+        self.assertEqual(store.hit('a', 60, 0.0), 3)
+        self.assertEqual(store.hit('b', 60, 0.0), 1)
+
+    @override_settings(AUTH_THROTTLE={'MAX_KEYS': 10, 'RATES': {'login_ip': '3/min', 'login_identity': '3/min'}})
+    def test_identity_flood_keeps_ip_limit(self):
+        for i in range(3):
+            self.assertIsNone(throttling.check_rate('login', '10.0.0.1', f'user{i}@example.com'))
+        for i in range(100): # Far more identities than the store holds
+            self.assertIsNotNone(throttling.check_rate('login', '10.0.0.1', f'flood{i}@example.com'))
+        store = throttling.get_store()
+        self.assertEqual(len(store._counters), 4) # The IP and the three identities counted before the limit
+
+    @override_settings(AUTH_THROTTLE={'RATES': {'login_identity': '2/min'}})
+    def test_login_identity_limit(self):
+        client = APIClient()
+        statuses = [
+            client.post('/api/auth/login/', {'username': username, 'password': 'wrong'}).status_code
+            for username in ('Owner@example.com', 'owner@example.com', 'OWNER@example.com')
+        ]
+        self.assertEqual(statuses[:2], [400, 400])
+        self.assertEqual(statuses[2], 429) # Case variations share one counter
@@ -0,0 +1,227 @@
+# In your Django app's throttling.py
+
+import math
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework.throttling import BaseThrottle
+
+from .models import normalize_email_identity
+
+# Defaults for the auth throttles, override with AUTH_THROTTLE in settings.py
+DEFAULT_AUTH_THROTTLE = {
+    'STORE': 'memory', # 'memory' (per process) or 'sqlite' (shared by the worker processes on one host)
+    'SQLITE_PATH': os.path.join(settings.BASE_DIR, 'throttle.sqlite3'),
+    'MAX_KEYS': 100000, # Memory store: least recently hit keys are evicted beyond this many
+    'RATES': {
+        'login_ip': '30/min',
+        'login_identity': '5/min',
+        'password_reset_ip': '10/min',
+        'password_reset_identity': '3/hour',
+        'register_ip': '10/hour',
+        'register_identity': '3/hour',
+    },
+}
+
+
+def get_throttle_settings():
+    config = {**DEFAULT_AUTH_THROTTLE, **getattr(settings, 'AUTH_THROTTLE', {})}
+    config['RATES'] = {**DEFAULT_AUTH_THROTTLE['RATES'], **config['RATES']}
+    return config
+
+
+def parse_rate(rate):
+    """'5/min' -> (5, 60), same format as DRF's DEFAULT_THROTTLE_RATES."""
+    num, period = rate.split('/')
+    return int(num), {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}[period[0]]
+
+
+def sliding_count(current, previous, now, window):
+    """
+    Sliding window estimate from two fixed windows: all hits in the current window
+    plus the share of the previous window that still overlaps the last `window` seconds.
+    """
+    elapsed = (now % window) / window
+    return current + previous * (1 - elapsed)
+
+
+class MemoryStore:
+    """
+    Per-process counters: key -> [window index, hits in that window, hits in the one before,
+    window length]. Four ints per key keeps a large table of attacker IPs cheap. Least
+    recently hit keys are evicted once it holds max_keys, so a flood of new keys only
+    pushes out counters nobody is hitting.
+    """
+
+    def __init__(self, max_keys):
+        self._lock = threading.Lock()
+        self._counters = OrderedDict() # Least recently hit first
+        self.max_keys = max_keys
+
+    def hit(self, key, window, now):
+        index = int(now // window)
+        with self._lock:
+            counter = self._counters.get(key)
+            if counter is None:
+                while len(self._counters) >= self.max_keys:
+                    self._counters.popitem(last=False)
+                counter = self._counters[key] = [index, 0, 0, window]
+            else:
+                self._counters.move_to_end(key)
+                if counter[0] != index:
+                    # Roll forward: the old current window becomes the previous one, or both expire
+                    counter[2] = counter[1] if counter[0] == index - 1 else 0
+                    counter[1] = 0
+                    counter[0] = index
+            counter[1] += 1
+            return sliding_count(counter[1], counter[2], now, window)
+
+
+class SQLiteStore:
+    """Counters in a small SQLite file so every worker process on the host sees the same numbers."""
+
+    PRUNE_PROBABILITY = 0.001 # Roughly one hit in a thousand also deletes expired counters
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=OFF') # Losing a few counts on power loss is fine
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS throttle '
+                '(key TEXT PRIMARY KEY, window INTEGER NOT NULL, current INTEGER NOT NULL, '
+                'previous INTEGER NOT NULL, expires REAL NOT NULL)'
+            )
+            connection.execute('CREATE INDEX IF NOT EXISTS throttle_expires ON throttle (expires)')
+            self._local.connection = connection
+        return connection
+
+    def hit(self, key, window, now):
+        index = int(now // window)
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute('SELECT window, current, previous FROM throttle WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                current, previous = 1, 0
+            elif row[0] == index:
+                current, previous = row[1] + 1, row[2]
+            else:
+                current, previous = 1, row[1] if row[0] == index - 1 else 0
+            connection.execute(
+                'INSERT OR REPLACE INTO throttle (key, window, current, previous, expires) VALUES (?, ?, ?, ?, ?)',
+                (key, index, current, previous, (index + 2) * window),
+            )
+            if random.random() < self.PRUNE_PROBABILITY:
+                connection.execute('DELETE FROM throttle WHERE expires <= ?', (now,))
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        return sliding_count(current, previous, now, window)
+
+
+_store_lock = threading.Lock()
+_stores = {}
+
+
+def get_store(config=None):
+    config = config or get_throttle_settings()
+    cache_key = (config['STORE'], config['SQLITE_PATH'])
+    with _store_lock:
+        if cache_key not in _stores:
+            if config['STORE'] == 'sqlite':
+                _stores[cache_key] = SQLiteStore(config['SQLITE_PATH'])
+            else:
+                _stores[cache_key] = MemoryStore(config['MAX_KEYS'])
+        return _stores[cache_key]
+
+
+# scope -> {'allowed': n, 'rejected': n}, for monitoring rejected-request rates
+_stats_lock = threading.Lock()
+_stats = {}
+
+
+def throttle_stats():
+    with _stats_lock:
+        return {
+            scope: {**counts, 'rejected_ratio': counts['rejected'] / (counts['allowed'] + counts['rejected'])}
+            for scope, counts in _stats.items()
+        }
+
+
+def _record(scope, allowed):
+    with _stats_lock:
+        counts = _stats.setdefault(scope, {'allowed': 0, 'rejected': 0})
+        counts['allowed' if allowed else 'rejected'] += 1
+
+
+def check_rate(scope, ip, identity=None):
+    """
+    Counts one attempt against the per-IP and per-identity limits of `scope`.
+    Returns None if allowed, otherwise the number of seconds to wait.
+    """
+    config = get_throttle_settings()
+    store = get_store(config)
+    now = time.time()
+    wait = None
+    for kind, value in (('ip', ip), ('identity', identity)):
+        rate = config['RATES'].get(f'{scope}_{kind}')
+        if not rate or not value:
+            continue
+        limit, window = parse_rate(rate)
+        if store.hit(f'{scope}:{kind}:{value}', window, now) > limit:
+            # Worst case the whole window has to slide past
+            wait = max(wait or 0, math.ceil(window - now % window))
+            if kind == 'ip':
+                break # Already refused: made-up identities from this IP don't each get a counter
+    _record(scope, wait is None)
+    return wait
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """
+    DRF throttle with per-IP and per-identity sliding windows. Runs in APIView.initial(),
+    so rejected requests never reach password hashing or user lookups.
+    """
+    scope = None
+    identity_fields = ('username', 'email')
+
+    def get_identity(self, request):
+        data = request.data if hasattr(request.data, 'get') else {}
+        for field in self.identity_fields:
+            value = data.get(field)
+            if isinstance(value, str) and value.strip():
+                return normalize_email_identity(value) # Lowercased so case variations share a counter
+        return None
+
+    def allow_request(self, request, view):
+        self._wait = check_rate(self.scope, self.get_ident(request), self.get_identity(request))
+        return self._wait is None
+
+    def wait(self):
+        return self._wait
+
+
+class LoginThrottle(SlidingWindowThrottle):
+    scope = 'login'
+
+
+class PasswordResetThrottle(SlidingWindowThrottle):
+    scope = 'password_reset'
+    identity_fields = ('email',)
+
+
+class RegisterThrottle(SlidingWindowThrottle):
+    scope = 'register'
+    identity_fields = ('email',)
@@ -0,0 +1,120 @@
+# In your Django app's tokens.py
+
+import uuid
+
+from django.conf import settings
+from django.contrib.auth.tokens import PasswordResetTokenGenerator
+from django.core.exceptions import ValidationError
+from django.utils.crypto import constant_time_compare
+from django.utils.http import base36_to_int
+
+from .models import PasswordResetToken, EmailVerificationToken
+
+# AUTH_TOKEN_MODE in settings.py picks how verification and reset tokens are issued:
+# 'signed' - HMAC/timestamp tokens, validated without touching a token table
+# 'table'  - random tokens stored in EmailVerificationToken / PasswordResetToken
+TOKEN_MODE_SIGNED = 'signed'
+TOKEN_MODE_TABLE = 'table'
+
+
+def get_token_mode():
+    return getattr(settings, 'AUTH_TOKEN_MODE', TOKEN_MODE_SIGNED)
+
+
+class SignedTokenGenerator(PasswordResetTokenGenerator):
+    """
+    Stateless token keyed on the user's password hash, email, email_verified_at and
+    is_active, so it stops validating as soon as it has been used (verifying the email
+    or resetting the password changes one of them) or once its timeout setting has passed.
+    """
+
+    def __init__(self, purpose, timeout_setting):
+        super().__init__()
+        self.key_salt = f"Users.tokens.SignedTokenGenerator.{purpose}" # Tokens can't be swapped between purposes
+        self.timeout_setting = timeout_setting
+
+    def _make_hash_value(self, user, timestamp):
+        verified_at = '' if user.email_verified_at is None else user.email_verified_at.replace(microsecond=0, tzinfo=None)
+        return f"{user.pk}{user.password}{user.email}{verified_at}{user.is_active}{timestamp}"
+
+    def check_token(self, user, token):
+        if not (user and token):
+            return False
+        try:
+            ts_b36, _ = token.split("-")
+            ts = base36_to_int(ts_b36)
+        except ValueError:
+            return False
+
+        # Check that the timestamp/user state has not been tampered with
+        for secret in [self.secret, *self.secret_fallbacks]:
+            if constant_time_compare(self._make_token_with_timestamp(user, ts, secret), token):
+                break
+        else:
+            return False
+
+        # Check the timestamp is within the purpose-specific limit
+        timeout_seconds = getattr(settings, self.timeout_setting) * 3600
+        return (self._num_seconds(self._now()) - ts) <= timeout_seconds
+
+
+email_verification_token_generator = SignedTokenGenerator('email-verification', 'EMAIL_VERIFICATION_TIMEOUT_HOURS')
+password_reset_token_generator = SignedTokenGenerator('password-reset', 'PASSWORD_RESET_TIMEOUT_HOURS')
+
+
+# --- Email verification ---
+def issue_email_verification_token(user):
+    """Returns the token to put in the verification link."""
+    if get_token_mode() == TOKEN_MODE_SIGNED:
+        return email_verification_token_generator.make_token(user)
+
+    # Delete any existing verification tokens for this user
+    EmailVerificationToken.objects.filter(user=user).delete()
+    return str(EmailVerificationToken.objects.create(user=user).token)
+
+
+def consume_email_verification_token(user, token):
+    """
+    Returns True if the token is valid for this user. Table-backed tokens are deleted
+    here; signed tokens stop validating once email_verified_at is set.
+    """
+    if get_token_mode() == TOKEN_MODE_SIGNED:
+        return email_verification_token_generator.check_token(user, token)
+
+    try:
+        verification_token = EmailVerificationToken.objects.get(user=user, token=token)
+    except (EmailVerificationToken.DoesNotExist, ValidationError): # ValidationError: token isn't a UUID
+        return False
+    if not verification_token.is_valid():
+        return False
+    verification_token.delete()
+    return True
+
+
+# --- Password reset ---
+def issue_password_reset_token(user):
+    """Returns the token to put in the password reset link."""
+    if get_token_mode() == TOKEN_MODE_SIGNED:
+        return password_reset_token_generator.make_token(user)
+
+    # Delete any existing tokens for this user to prevent multiple valid tokens
+    PasswordResetToken.objects.filter(user=user).delete()
+    return PasswordResetToken.objects.create(user=user, token=str(uuid.uuid4())).token
+
+
+def check_password_reset_token(user, token):
+    """Returns True if the token is valid for this user, without using it up."""
+    if get_token_mode() == TOKEN_MODE_SIGNED:
+        return password_reset_token_generator.check_token(user, token)
+
+    reset_token = PasswordResetToken.objects.filter(user=user, token=token).first()
+    return reset_token is not None and reset_token.is_valid()
+
+
+def consume_password_reset_token(user, token):
+    """
+    Call after the new password has been saved. Signed tokens are already invalid
+    at that point because the password hash changed.
+    """
+    if get_token_mode() == TOKEN_MODE_TABLE:
+        PasswordResetToken.objects.filter(user=user).delete()
@@ -4,6 +4,7 @@ from .views import (
     PasswordResetRequestView, PasswordResetConfirmView,
     AdminOnlyView, AuthenticatedOnlyView
 )
+from .async_views import login_view, password_reset_confirm_view
 
 urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
@@ -12,6 +13,9 @@ urlpatterns = [
     path('verify-email/', VerifyEmailView.as_view(), name='verify_email'), # New email verification endpoint
     path('password/forgot/', PasswordResetRequestView.as_view(), name='password_reset_request'),
     path('password/reset/', PasswordResetConfirmView.as_view(), name='password_reset_confirm'),
+    # Async variants that hash passwords in a process pool (serve through podcast/asgi.py)
+    path('async/login/', login_view, name='async_login'),
+    path('async/password/reset/', password_reset_confirm_view, name='async_password_reset_confirm'),
     path('admin-only/', AdminOnlyView.as_view(), name='admin_only'), # Example admin endpoint
     path('authenticated-only/', AuthenticatedOnlyView.as_view(), name='authenticated_only'), # Example authenticated endpoint
 ]
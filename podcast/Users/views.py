@@ -7,7 +7,6 @@ from rest_framework.authtoken.models import Token # For Token Authentication
 from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny # Permissions
 from django.contrib.auth import authenticate, login, logout # Django auth functions
 from django.conf import settings
-from django.core.mail import send_mail # For sending emails
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 from django.utils import timezone
@@ -19,17 +18,19 @@ from .serializers import (
     PasswordResetRequestSerializer, PasswordResetConfirmSerializer,
     UserSerializer # Keep UserSerializer for response
 )
-from .models import CustomUser, PasswordResetToken, EmailVerificationToken # Use CustomUser
-import uuid # Needed for UUID token generation
+from .models import CustomUser, normalize_email_identity # Use CustomUser
+from .outbox import enqueue_email # Emails are sent by the send_outbox worker, not inside the request
+from .throttling import LoginThrottle, PasswordResetThrottle, RegisterThrottle
+from .tokens import (
+    issue_email_verification_token, consume_email_verification_token,
+    issue_password_reset_token, consume_password_reset_token,
+)
 
 
 # Helper function to send email verification email
 def send_verification_email(user):
-    # Delete any existing verification tokens for this user
-    EmailVerificationToken.objects.filter(user=user).delete()
-
-    # Create a new verification token
-    verification_token = EmailVerificationToken.objects.create(user=user)
+    # Signed by default, or stored in EmailVerificationToken with AUTH_TOKEN_MODE = 'table'
+    token = issue_email_verification_token(user)
 
     # --- Send Email ---
     # You'll need to build the verification link pointing to your frontend or API endpoint
@@ -37,7 +38,7 @@ def send_verification_email(user):
     # verification_link = f"{settings.BASE_API_URL}{reverse('verify_email')}?token={verification_token.token}" # Configure BASE_API_URL in settings
 
     # Option 2: Link to a frontend page that calls your API endpoint
-    verification_link = f"{settings.FRONTEND_VERIFY_EMAIL_URL}?token={verification_token.token}&email={user.email}" # Configure frontend URL in settings
+    verification_link = f"{settings.FRONTEND_VERIFY_EMAIL_URL}?token={token}&email={user.email}" # Configure frontend URL in settings
 
     subject = 'Verify Your Email Address'
     # Create an HTML email template (e.g., emails/verify_email.html)
@@ -46,7 +47,7 @@ def send_verification_email(user):
     from_email = settings.DEFAULT_FROM_EMAIL
     to_email = user.email
 
-    send_mail(subject, plain_message, from_email, [to_email], html_message=html_message)
+    enqueue_email(subject, plain_message, from_email, [to_email], html_message=html_message)
     # -----------
 
 
@@ -55,6 +56,7 @@ class RegisterView(generics.CreateAPIView):
     queryset = CustomUser.objects.all() # Use CustomUser
     serializer_class = RegisterSerializer
     permission_classes = [AllowAny] # Anyone can register
+    throttle_classes = [RegisterThrottle] # Per-IP and per-email sliding windows, checked before validation
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -84,18 +86,12 @@ class VerifyEmailView(APIView):
             return Response({'detail': 'Token and email are required.'}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            user = CustomUser.objects.get(email=email) # Use CustomUser
+            user = CustomUser.objects.get(email_normalized=normalize_email_identity(email)) # Indexed, case-insensitive
         except CustomUser.DoesNotExist: # Use CustomUser
              # Be vague for security
             return Response({'detail': 'Invalid or expired verification link.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        try:
-            verification_token = EmailVerificationToken.objects.get(user=user, token=token)
-        except EmailVerificationToken.DoesNotExist:
-             # Be vague for security
-            return Response({'detail': 'Invalid or expired verification link.'}, status=status.HTTP_400_BAD_REQUEST)
-
-        if not verification_token.is_valid():
+        if not consume_email_verification_token(user, token):
              # Be vague for security
              return Response({'detail': 'Invalid or expired verification link.'}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -103,10 +99,7 @@ class VerifyEmailView(APIView):
         # Mandatory: Mark user as active and set verification timestamp
         user.is_active = True
         user.email_verified_at = timezone.now()
-        user.save()
-
-        # Delete the used verification token
-        verification_token.delete()
+        user.save() # Setting email_verified_at also invalidates a signed token
 
         return Response({'detail': 'Email verified successfully. You can now log in.'}, status=status.HTTP_200_OK)
 
@@ -114,9 +107,10 @@ class VerifyEmailView(APIView):
 # --- Login (using Token Authentication) ---
 class LoginView(APIView):
     permission_classes = [AllowAny] # Allow anyone to attempt login
+    throttle_classes = [LoginThrottle] # Rejects credential stuffing before any password hashing
 
     def post(self, request, *args, **kwargs):
-        serializer = LoginSerializer(data=request.data)
+        serializer = LoginSerializer(data=request.data, context={'request': request})
         serializer.is_valid(raise_exception=True) # Validation includes active status check
 
         user = serializer.validated_data['user']
@@ -136,7 +130,10 @@ class LogoutView(APIView):
     def post(self, request, *args, **kwargs):
         try:
             # Delete the user's token to log them out
-            request.user.auth_token.delete()
+            # request.auth is the Token we authenticated with, so no extra lookup is needed.
+            # Deleting it also evicts it from the token cache (see Users/signals.py).
+            token = request.auth if isinstance(request.auth, Token) else request.user.auth_token
+            token.delete()
         except Exception:
              # Handle cases where token might be missing for some reason
              pass # Or log the error
@@ -146,6 +143,7 @@ class LogoutView(APIView):
 # --- Password Reset Request ---
 class PasswordResetRequestView(APIView):
     permission_classes = [AllowAny] # Anyone can request a password reset
+    throttle_classes = [PasswordResetThrottle] # Limits reset emails per IP and per address
 
     def post(self, request, *args, **kwargs):
         serializer = PasswordResetRequestSerializer(data=request.data)
@@ -153,19 +151,13 @@ class PasswordResetRequestView(APIView):
         email = serializer.validated_data['email']
 
         try:
-            user = CustomUser.objects.get(email=email) # Use CustomUser
+            user = CustomUser.objects.get(email_normalized=normalize_email_identity(email)) # Indexed, case-insensitive
         except CustomUser.DoesNotExist: # Use CustomUser
             # Mandatory: Return success even if user not found to prevent enumeration
             return Response({'detail': 'If a user with that email exists, a password reset link has been sent.'}, status=status.HTTP_200_OK)
 
-        # Delete any existing tokens for this user to prevent multiple valid tokens
-        PasswordResetToken.objects.filter(user=user).delete()
-
-        # Generate a new token
-        token = uuid.uuid4() # Using UUID for password reset tokens too
-
-        # Create the password reset token record
-        PasswordResetToken.objects.create(user=user, token=token)
+        # Signed by default, or stored in PasswordResetToken with AUTH_TOKEN_MODE = 'table'
+        token = issue_password_reset_token(user)
 
         # --- Send Email ---
         # You would typically render an HTML template for the email
@@ -177,7 +169,7 @@ class PasswordResetRequestView(APIView):
         from_email = settings.DEFAULT_FROM_EMAIL
         to_email = user.email
 
-        send_mail(subject, plain_message, from_email, [to_email], html_message=html_message)
+        enqueue_email(subject, plain_message, from_email, [to_email], html_message=html_message)
         # -----------
 
         # Mandatory: Return a success response (again, generic)
@@ -194,14 +186,13 @@ class PasswordResetConfirmView(APIView):
 
         user = serializer.validated_data['user'] # Get user from validated data
         new_password = serializer.validated_data['password']
-        reset_token_obj = serializer.validated_data['reset_token_obj'] # Get token object from validated data
 
         # Mandatory: Set the new password (handles hashing)
         user.set_password(new_password)
         user.save()
 
-        # Mandatory: Delete the used token after successful reset
-        reset_token_obj.delete()
+        # Mandatory: Invalidate the used token after successful reset
+        consume_password_reset_token(user, serializer.validated_data['token'])
 
         return Response({'detail': 'Password has been reset successfully.'}, status=status.HTTP_200_OK)
 
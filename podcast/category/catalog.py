@@ -0,0 +1,137 @@
+# In your Django app's catalog.py
+# Categories change maybe once a month but are read on every podcast response, so
+# the whole table is kept in memory. Each process holds its own copy tagged with the
+# catalog version; the version counter and a serialized copy live in a shared cache
+# so one process's change reaches the others without a DB query per request.
+
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .models import Category
+
+# Defaults, override with CATEGORY_CATALOG in settings.py
+DEFAULT_CATEGORY_CATALOG = {
+    'CACHE': 'default', # CACHES alias for the version counter and the shared copy
+    'CHECK_INTERVAL': 1.0, # Seconds a process trusts its copy before re-reading the version
+    'MAX_AGE': 300, # Seconds before a copy is reloaded from the DB anyway (bounds staleness with a per-process cache)
+}
+
+VERSION_KEY = 'catalog:categories:version'
+
+
+def get_catalog_settings():
+    return {**DEFAULT_CATEGORY_CATALOG, **getattr(settings, 'CATEGORY_CATALOG', {})}
+
+
+class CategoryCatalog:
+    """
+    Categories as CategorySerializer output ({'id', 'name', 'slug'}), by id and by slug.
+    Treat the returned dicts as read-only, they are shared between requests.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._checked_at = 0.0
+        self._loaded_at = 0.0
+        self._items = []
+        self._by_id = {}
+        self._by_slug = {}
+        self.loads = 0 # DB loads, for monitoring how often the catalog is rebuilt
+
+    def _cache(self):
+        return caches[get_catalog_settings()['CACHE']]
+
+    @staticmethod
+    def _payload_key(version):
+        return f'catalog:categories:{version}'
+
+    def _shared_version(self, cache):
+        version = cache.get(VERSION_KEY)
+        if version is None:
+            # Never start over at a number an older copy may already be tagged with
+            cache.add(VERSION_KEY, time.time_ns(), None)
+            version = cache.get(VERSION_KEY)
+        return version
+
+    def _load(self, cache, version, from_db=False):
+        items = None if from_db else cache.get(self._payload_key(version))
+        if items is None:
+            items = list(Category.objects.order_by('id').values('id', 'name', 'slug'))
+            cache.set(self._payload_key(version), items, None)
+            self.loads += 1
+        self._items = items
+        self._by_id = {item['id']: item for item in items}
+        self._by_slug = {item['slug']: item for item in items}
+        self._version = version
+        self._loaded_at = time.monotonic()
+
+    def _refresh(self):
+        config = get_catalog_settings()
+        now = time.monotonic()
+        if self._version is not None and now - self._checked_at < config['CHECK_INTERVAL']:
+            return
+        with self._lock:
+            if self._version is not None and now - self._checked_at < config['CHECK_INTERVAL']:
+                return
+            cache = self._cache()
+            version = self._shared_version(cache)
+            if version != self._version:
+                self._load(cache, version)
+            elif now - self._loaded_at >= config['MAX_AGE']:
+                # With a per-process cache (LocMem) other workers never see our bumps
+                self._load(cache, version, from_db=True)
+            self._checked_at = now
+
+    # --- Reads ---
+    def all(self):
+        self._refresh()
+        return self._items
+
+    def get(self, pk):
+        self._refresh()
+        return self._by_id.get(pk)
+
+    def get_referenced(self, pk):
+        """
+        get() for an id read from a row (podcast.category_id): the category exists, so a
+        miss means this copy predates it and the catalog is reloaded from the DB first.
+        """
+        item = self.get(pk)
+        if item is None and pk is not None:
+            with self._lock:
+                if pk not in self._by_id:
+                    cache = self._cache()
+                    self._load(cache, self._shared_version(cache), from_db=True)
+            item = self._by_id.get(pk)
+        return item
+
+    def get_by_slug(self, slug):
+        self._refresh()
+        return self._by_slug.get(slug)
+
+    def version(self):
+        self._refresh()
+        return self._version
+
+    # --- Invalidation ---
+    def bump(self):
+        """New version for every process; this one reloads on its next read."""
+        cache = self._cache()
+        try:
+            cache.incr(VERSION_KEY)
+        except ValueError: # Key missing or evicted
+            cache.set(VERSION_KEY, time.time_ns(), None)
+        with self._lock:
+            self._version = None
+
+    def bump_on_commit(self):
+        # After commit, otherwise another process could cache the old rows under the new version
+        transaction.on_commit(self.bump)
+
+
+category_catalog = CategoryCatalog()
@@ -0,0 +1,39 @@
+# Last-Modified (podcast/conditional.py) is the newest timestamp a response depends
+# on. Most changes move an updated_at, but some leave nothing behind: a deleted row,
+# a renamed category (names come from the catalog), an episode leaving a page. Those
+# record the moment here, in the same transaction as the change, so every process
+# sees it; the views fold the markers they depend on into Last-Modified.
+
+from django.db import IntegrityError, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import ChangeMarker
+
+CATEGORIES = 'categories' # Any category saved or deleted
+PODCASTS_DELETED = 'podcasts:deleted'
+
+
+def episodes_key(podcast_id):
+    """Any episode of the podcast written (episodes_app/visibility.py invalidate_podcast_episodes)."""
+    return f'episodes:{podcast_id}'
+
+
+def subscriptions_deleted_key(user_id):
+    return f'subscriptions:deleted:{user_id}'
+
+
+def mark_changed(key):
+    now = timezone.now()
+    if ChangeMarker.objects.filter(key=key).update(changed_at=now):
+        return
+    try:
+        with transaction.atomic():
+            ChangeMarker.objects.create(key=key, changed_at=now)
+    except IntegrityError: # Created concurrently
+        ChangeMarker.objects.filter(key=key).update(changed_at=now)
+
+
+def last_changed(*keys):
+    """Newest changed_at of the markers (one primary key lookup), None if none was set."""
+    return ChangeMarker.objects.filter(key__in=keys).aggregate(newest=Max('changed_at'))['newest']
@@ -0,0 +1,110 @@
+# In your Django app's counters.py
+# Denormalized counters on Podcast, kept up to date with single-row F() updates:
+#   subscriber_count         Subscription rows (subscriptions/signals.py)
+#   episode_count            all episodes, drafts included (Episode.save/delete)
+#   published_episode_count  released episodes (Episode.released)
+#   total_duration           seconds of those released episodes
+# A scheduled episode is counted once its time has come and
+# `python manage.py release_episodes` (run it every minute) has released it.
+# Bulk operations (QuerySet.update/delete, bulk_create) bypass them; run
+# `python manage.py reconcile_podcast_counters` to repair any drift.
+
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .models import Podcast
+
+COUNTER_FIELDS = ('subscriber_count', 'episode_count', 'published_episode_count', 'total_duration')
+
+
+def adjust_counters(podcast_id, **deltas):
+    """Adds the deltas in one UPDATE; updated_at moves too since the serialized podcast changed."""
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    if not deltas or podcast_id is None:
+        return
+    Podcast.objects.filter(pk=podcast_id).update(updated_at=timezone.now(), **{
+        # Clamped: after drift a decrement below zero would fail the unsigned column's CHECK
+        name: F(name) + delta if delta > 0 else Greatest(F(name) + delta, 0) for name, delta in deltas.items()
+    })
+
+
+def episode_contribution(podcast_id, released, duration):
+    """What one episode in this state adds to its podcast's counters."""
+    return podcast_id, {
+        'episode_count': 1,
+        'published_episode_count': 1 if released else 0,
+        'total_duration': (duration or 0) if released else 0,
+    }
+
+
+def apply_episode_change(before, after):
+    """
+    before / after are episode_contribution() results (or None for create / delete).
+    Moves the difference onto the podcast(s) involved.
+    """
+    if before and after and before[0] == after[0]:
+        adjust_counters(after[0], **{name: after[1][name] - before[1][name] for name in after[1]})
+        return
+    if before:
+        adjust_counters(before[0], **{name: -value for name, value in before[1].items()})
+    if after:
+        adjust_counters(after[0], **after[1])
+
+
+def release_due_episodes(now=None):
+    """Counts the scheduled episodes whose publish time has passed. Returns how many were released."""
+    from episodes_app.models import Episode
+
+    now = now or timezone.now()
+    due = Episode.objects.filter(released=False, published_at__lte=now) # episode_scheduled_idx
+    released = 0
+    for pk in due.values_list('pk', flat=True).iterator():
+        with transaction.atomic():
+            # The conditional UPDATE claims the episode, so a concurrent run or save can't count it twice
+            if not due.filter(pk=pk).update(released=True):
+                continue
+            podcast_id, duration = Episode.objects.filter(pk=pk).values_list('podcast_id', 'duration').get()
+            adjust_counters(podcast_id, published_episode_count=1, total_duration=duration or 0)
+        released += 1
+    return released
+
+
+# --- Reconciliation ---
+def actual_counter_expressions():
+    """Correlated subqueries computing each counter from the source tables."""
+    from episodes_app.models import Episode
+    from subscriptions.models import Subscription
+
+    def scalar(queryset, aggregate):
+        return Coalesce(
+            Subquery(queryset.filter(podcast=OuterRef('pk')).order_by().values('podcast').annotate(v=aggregate).values('v')),
+            Value(0), output_field=IntegerField(),
+        )
+
+    published = Episode.objects.filter(released=True)
+    return {
+        'subscriber_count': scalar(Subscription.objects.all(), Count('id')),
+        'episode_count': scalar(Episode.objects.all(), Count('id')),
+        'published_episode_count': scalar(published, Count('id')),
+        'total_duration': scalar(published, Sum(Coalesce('duration', 0))),
+    }
+
+
+def drifted_ids(podcast_ids):
+    """Ids among podcast_ids whose stored counters differ from the source tables."""
+    actual = actual_counter_expressions()
+    condition = Q()
+    for name in COUNTER_FIELDS:
+        condition |= ~Q(**{name: F(f'actual_{name}')})
+    return list(
+        Podcast.objects.filter(pk__in=podcast_ids)
+        .annotate(**{f'actual_{name}': expression for name, expression in actual.items()})
+        .filter(condition).values_list('pk', flat=True)
+    )
+
+
+def recompute_counters(podcast_ids):
+    """Rewrites the counters of podcast_ids from the source tables in one UPDATE."""
+    return Podcast.objects.filter(pk__in=podcast_ids).update(updated_at=timezone.now(), **actual_counter_expressions())
@@ -0,0 +1,183 @@
+# In your Django app's filters.py
+# Query-parameter filtering for PodcastListCreateView and the facet counts served
+# next to it. Both read the same parameters:
+#   ?category=<slug>  (or "none" for uncategorized podcasts)
+#   ?is_featured=true|false
+#   ?user_id=<id>
+#   ?created_after=<ISO date/datetime>&created_before=<ISO date/datetime>
+
+import datetime
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+
+from .catalog import category_catalog
+from .models import Podcast
+
+# Defaults, override with PODCAST_FACETS in settings.py
+DEFAULT_PODCAST_FACETS = {
+    'CACHE': 'default', # CACHES alias holding the computed counts
+    'TTL': 300, # Seconds; saves and deletes also invalidate through the version key
+}
+
+FACETS_VERSION_KEY = 'podcastfacets:version'
+
+
+def get_facet_settings():
+    return {**DEFAULT_PODCAST_FACETS, **getattr(settings, 'PODCAST_FACETS', {})}
+
+
+def _parse_bool(name, value):
+    lowered = value.strip().lower()
+    if lowered in ('true', '1', 'yes'):
+        return True
+    if lowered in ('false', '0', 'no'):
+        return False
+    raise ValidationError({name: ["Must be true or false."]})
+
+
+def _parse_moment(name, value, end_of_day=False):
+    try:
+        day = parse_date(value) # First: parse_datetime also takes a bare date, as midnight
+        moment = parse_datetime(value) if day is None else None
+    except ValueError: # Well formed but out of range, e.g. 2025-02-30
+        day = moment = None
+    if day is not None:
+        # A bare date in created_before includes that whole day
+        moment = datetime.datetime.combine(day + datetime.timedelta(days=1) if end_of_day else day, datetime.time.min)
+    if moment is None:
+        raise ValidationError({name: ["Must be an ISO 8601 date or datetime."]})
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+class PodcastFilter:
+    """Parses the filter parameters once and applies them to a Podcast queryset."""
+
+    def __init__(self, query_params):
+        self.category = None
+        self.is_featured = None
+        self.user_id = None
+        self.created_after = None
+        self.created_before = None
+
+        category = query_params.get('category')
+        if category:
+            self.category = category.strip()
+        if query_params.get('is_featured'):
+            self.is_featured = _parse_bool('is_featured', query_params['is_featured'])
+        if query_params.get('user_id'):
+            try:
+                self.user_id = int(query_params['user_id'])
+            except ValueError:
+                raise ValidationError({'user_id': ["Must be an integer."]})
+        if query_params.get('created_after'):
+            self.created_after = _parse_moment('created_after', query_params['created_after'])
+        if query_params.get('created_before'):
+            self.created_before = _parse_moment('created_before', query_params['created_before'], end_of_day=True)
+
+    def signature(self):
+        """Canonical form of the parameters, so equivalent URLs share a facet cache entry."""
+        return (
+            self.category, self.is_featured, self.user_id,
+            self.created_after.isoformat() if self.created_after else None,
+            self.created_before.isoformat() if self.created_before else None,
+        )
+
+    # Facets are disjunctive: category counts ignore ?category= and featured counts
+    # ignore ?is_featured=, so the client can show how many results each choice gives.
+    def filter_common(self, queryset):
+        if self.user_id is not None:
+            queryset = queryset.filter(user_id=self.user_id)
+        if self.created_after is not None:
+            queryset = queryset.filter(created_at__gte=self.created_after)
+        if self.created_before is not None:
+            queryset = queryset.filter(created_at__lt=self.created_before)
+        return queryset
+
+    def matches_category(self, slug):
+        return self.category is None or self.category == (slug or 'none')
+
+    def matches_featured(self, is_featured):
+        return self.is_featured is None or self.is_featured == is_featured
+
+    def filter_queryset(self, queryset):
+        queryset = self.filter_common(queryset)
+        if self.category == 'none':
+            queryset = queryset.filter(category__isnull=True)
+        elif self.category is not None:
+            # Slug resolved in memory, so the filter is on category_id and needs no JOIN
+            item = category_catalog.get_by_slug(self.category)
+            queryset = queryset.filter(category_id=item['id']) if item else queryset.filter(category__slug=self.category)
+        if self.is_featured is not None:
+            queryset = queryset.filter(is_featured=self.is_featured)
+        return queryset
+
+
+def compute_facets(podcast_filter):
+    """
+    All facet counts from one GROUP BY (category, is_featured) query over the rows
+    matching the non-facet filters; each facet then sums the groups the other allows.
+    The grouping only reads podcast_facets_idx; slugs and names come from the category catalog.
+    """
+    rows = list(
+        podcast_filter.filter_common(Podcast.objects.all())
+        .values('category_id', 'is_featured')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+
+    categories = {}
+    featured = {'true': 0, 'false': 0}
+    total = 0
+    for row in rows:
+        category = category_catalog.get_referenced(row['category_id'])
+        slug = category['slug'] if category else None
+        in_category = podcast_filter.matches_category(slug)
+        if podcast_filter.matches_featured(row['is_featured']):
+            entry = categories.setdefault(row['category_id'], {
+                'id': row['category_id'], 'slug': slug, 'name': category['name'] if category else None, 'count': 0,
+            })
+            entry['count'] += row['count']
+            if in_category:
+                total += row['count']
+        if in_category:
+            featured['true' if row['is_featured'] else 'false'] += row['count']
+    return {
+        'total': total,
+        # Biggest first, uncategorized (id None) reported like any other bucket
+        'categories': sorted(categories.values(), key=lambda entry: (-entry['count'], entry['slug'] or '')),
+        'is_featured': featured,
+    }
+
+
+def _facet_cache():
+    return caches[get_facet_settings()['CACHE']]
+
+
+def bump_facets_version():
+    """Invalidates every cached facet result at once (called from category/signals.py)."""
+    cache = _facet_cache()
+    try:
+        cache.incr(FACETS_VERSION_KEY)
+    except ValueError: # Key missing or evicted
+        cache.set(FACETS_VERSION_KEY, 1, None)
+
+
+def get_facets(podcast_filter):
+    config = get_facet_settings()
+    cache = _facet_cache()
+    version = cache.get(FACETS_VERSION_KEY, 0)
+    digest = hashlib.sha1(repr(podcast_filter.signature()).encode()).hexdigest()
+    key = f'podcastfacets:{version}:{digest}'
+    facets = cache.get(key)
+    if facets is None:
+        facets = compute_facets(podcast_filter)
+        cache.set(key, facets, config['TTL'])
+    return facets
@@ -0,0 +1,223 @@
+# In your Django app's imaging.py
+# Fixed-size JPEG/WebP derivatives of Podcast.image, generated off the request path.
+# Files are stored beside the original (podcasts/user_<id>/cover_small.jpg, ...) and
+# recorded in Podcast.image_derivatives:
+#   {'source': 'podcasts/user_1/cover.png', 'files': {'small': {'jpeg': '...', 'webp': '...'}, ...}}
+# 'source' makes regeneration idempotent: a row whose derivatives were made from the
+# current image is skipped unless forced. Podcasts sharing a deduplicated image share
+# the derivative names too: the second one adopts the first one's record, and files
+# are replaced atomically, so a reader never sees a half-written derivative.
+
+import io
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from podcast.media_store import plain_storage
+
+from .models import Podcast
+
+logger = logging.getLogger(__name__)
+
+# Defaults, override with PODCAST_IMAGE_DERIVATIVES in settings.py
+DEFAULT_PODCAST_IMAGE_DERIVATIVES = {
+    'SIZES': {'small': 120, 'medium': 300, 'large': 600}, # Square edge in pixels
+    'FORMATS': ('jpeg', 'webp'),
+    'QUALITY': 82,
+    'WORKERS': 2, # Threads; Pillow releases the GIL while resizing and encoding
+    'MAX_PENDING': 200, # Jobs queued or running; beyond that new jobs are left to the backfill command
+}
+
+EXTENSIONS = {'jpeg': 'jpg', 'webp': 'webp'}
+
+
+def get_derivative_settings():
+    return {**DEFAULT_PODCAST_IMAGE_DERIVATIVES, **getattr(settings, 'PODCAST_IMAGE_DERIVATIVES', {})}
+
+
+def derivative_name(source, size_name, fmt):
+    """Beside the original: podcasts/user_1/cover.png -> podcasts/user_1/cover_small.jpg"""
+    stem, _ = os.path.splitext(source)
+    return f'{stem}_{size_name}.{EXTENSIONS[fmt]}'
+
+
+def is_current(podcast, config=None):
+    """True if the stored derivatives were made from the current image with the current sizes."""
+    config = config or get_derivative_settings()
+    derivatives = podcast.image_derivatives or {}
+    files = derivatives.get('files', {})
+    return (
+        derivatives.get('source') == podcast.image.name
+        and set(files) == set(config['SIZES'])
+        and all(set(formats) == set(config['FORMATS']) for formats in files.values())
+    )
+
+
+def delete_derivative_files(derivatives, storage):
+    for formats in (derivatives or {}).get('files', {}).values():
+        for name in formats.values():
+            if storage.exists(name):
+                storage.delete(name)
+
+
+# --- Timing metrics ---
+_stats_lock = threading.Lock()
+_stats = {} # 'small.webp' -> {'count', 'total_ms', 'max_ms'}
+
+
+def _record(key, elapsed_ms):
+    with _stats_lock:
+        entry = _stats.setdefault(key, {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+        entry['count'] += 1
+        entry['total_ms'] += elapsed_ms
+        entry['max_ms'] = max(entry['max_ms'], elapsed_ms)
+
+
+def derivative_stats():
+    """Per derivative ('small.webp'): count and time spent encoding + storing; 'small.resize' is the shared downscale."""
+    with _stats_lock:
+        return {key: {**entry, 'avg_ms': entry['total_ms'] / entry['count']} for key, entry in _stats.items()}
+
+
+# --- Generation ---
+def store_derivative(storage, name, data):
+    """Writes `data` under its fixed name through a temporary file in the same directory."""
+    path = storage.path(name)
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, temporary = tempfile.mkstemp(dir=directory, suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as handle:
+            handle.write(data)
+        os.chmod(temporary, storage.file_permissions_mode or 0o644) # mkstemp() files are private to us
+        os.replace(temporary, path) # Readers get the old file or the new one, never part of either
+    except BaseException:
+        os.remove(temporary)
+        raise
+    return name
+
+
+def resize(image, edge):
+    """Center-cropped square of `edge` pixels."""
+    return ImageOps.fit(image, (edge, edge), Image.Resampling.LANCZOS)
+
+
+def encode(image, fmt, quality):
+    buffer = io.BytesIO()
+    if fmt == 'jpeg':
+        image.save(buffer, 'JPEG', quality=quality, optimize=True, progressive=True)
+    else:
+        image.save(buffer, 'WEBP', quality=quality, method=4)
+    return buffer.getvalue()
+
+
+def generate_derivatives(podcast_id, force=False):
+    """
+    Makes every configured derivative for one podcast. Returns True if files were
+    written, False if there was nothing to do (no image, already current, row gone).
+    """
+    config = get_derivative_settings()
+    podcast = Podcast.objects.filter(pk=podcast_id).only('id', 'image', 'image_derivatives').first()
+    if podcast is None or not podcast.image:
+        return False
+    if not force and is_current(podcast, config):
+        return False
+
+    source = podcast.image.name
+    if not force:
+        # Same deduplicated image as another podcast whose derivatives are current: nothing to draw
+        sibling = (
+            Podcast.objects.filter(image=source, image_derivatives__source=source).exclude(pk=podcast_id)
+            .only('id', 'image', 'image_derivatives').first()
+        )
+        if sibling is not None and is_current(sibling, config):
+            return bool(Podcast.objects.filter(pk=podcast_id, image=source).update(
+                image_derivatives=sibling.image_derivatives, updated_at=timezone.now(),
+            ))
+
+    with podcast.image.storage.open(source, 'rb') as handle:
+        image = Image.open(handle)
+        # JPEG sources can be decoded at a reduced scale that is still bigger than the largest size
+        largest = max(config['SIZES'].values())
+        image.draft('RGB', (largest, largest))
+        image = ImageOps.exif_transpose(image) # Phone photos carry their rotation in EXIF
+        image = image.convert('RGB')
+
+    # Named after the source, so a deduplicated image shares its derivatives too
+    storage = plain_storage(podcast.image.storage)
+    files = {}
+    # Largest first, each size resized from the previous one instead of the full-size original
+    for size_name, edge in sorted(config['SIZES'].items(), key=lambda item: -item[1]):
+        # Downscale once per size, the formats share the resized pixels
+        started = time.perf_counter()
+        image = resize(image, edge)
+        _record(f'{size_name}.resize', (time.perf_counter() - started) * 1000)
+        for fmt in config['FORMATS']:
+            started = time.perf_counter()
+            data = encode(image, fmt, config['QUALITY'])
+            # Same name on regeneration, and for every podcast sharing this image
+            files.setdefault(size_name, {})[fmt] = store_derivative(storage, derivative_name(source, size_name, fmt), data)
+            _record(f'{size_name}.{fmt}', (time.perf_counter() - started) * 1000)
+
+    # Only record them if the image wasn't replaced while we were working; updated_at moves the ETag
+    updated = Podcast.objects.filter(pk=podcast_id, image=source).update(
+        image_derivatives={'source': source, 'files': files}, updated_at=timezone.now(),
+    )
+    if not updated and not Podcast.objects.filter(image=source).exists():
+        delete_derivative_files({'files': files}, storage)
+    return bool(updated)
+
+
+class DerivativePool:
+    """Bounded ThreadPoolExecutor for derivative jobs, shared by save() and the backfill command."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self.pending = 0
+        self.skipped = 0 # Jobs dropped because MAX_PENDING was reached
+
+    def _get_executor(self, config):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=config['WORKERS'], thread_name_prefix='podcast-images')
+            return self._executor
+
+    def _run(self, podcast_id, force):
+        try:
+            return generate_derivatives(podcast_id, force)
+        except Exception:
+            logger.exception("Image derivatives for podcast %s failed", podcast_id)
+            return False
+        finally:
+            close_old_connections() # Worker threads hold their own DB connection
+            with self._lock:
+                self.pending -= 1
+
+    def submit(self, podcast_id, force=False):
+        """Queues a job; returns the Future, or None if the pool is full."""
+        config = get_derivative_settings()
+        executor = self._get_executor(config)
+        with self._lock:
+            if self.pending >= config['MAX_PENDING']:
+                self.skipped += 1
+                return None
+            self.pending += 1
+        return executor.submit(self._run, podcast_id, force)
+
+
+derivative_pool = DerivativePool()
+
+
+def schedule_derivatives(podcast):
+    """Called from Podcast.save(): generate once the row (and its image) is committed."""
+    podcast_id = podcast.pk
+    transaction.on_commit(lambda: derivative_pool.submit(podcast_id))
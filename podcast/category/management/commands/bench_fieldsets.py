@@ -0,0 +1,82 @@
+import gzip
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from Users.models import CustomUser
+from category.models import Category, Podcast
+from episodes_app.models import Episode
+from subscriptions.models import Subscription
+
+# Field sets the mobile clients use, compared with the full representation
+MOBILE_FIELDSETS = (
+    ('/api/podcasts/', 'id,title,image'),
+    ('/api/me/subscriptions/', 'id,podcast.id,podcast.title,podcast.image'),
+    ('/api/podcasts/{podcast}/episodes/', 'id,title,duration,published_at,audio_url'),
+)
+
+
+def text(rng, words):
+    # Varied prose, repeated filler would gzip unrealistically well
+    return ' '.join(''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(2, 9))) for _ in range(words))
+
+
+class Command(BaseCommand):
+    help = "Seeds rows in a rolled-back transaction and compares payload size and latency of full responses and ?fields= subsets."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=2_000, help="Podcasts, subscriptions and episodes to seed.")
+        parser.add_argument('--page-size', type=int, default=100)
+        parser.add_argument('--requests', type=int, default=30, help="Requests per variant, the median is reported.")
+        parser.add_argument('--instances', action='store_true', help="Serialize model instances (FAST_READ_SERIALIZERS = False).")
+
+    def measure(self, client, url, params, count):
+        timings = []
+        for _ in range(count):
+            started = time.perf_counter()
+            response = client.get(url, params)
+            timings.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200, response.content[:200]
+        return len(response.content), len(gzip.compress(response.content)), statistics.median(timings)
+
+    def handle(self, *args, **options):
+        rows, page_size, count = options['rows'], options['page_size'], options['requests']
+        with transaction.atomic(), override_settings(FAST_READ_SERIALIZERS=not options['instances']):
+            user = CustomUser.objects.create_user(username='bench-fieldsets', email='bench-fieldsets@example.com', password='x')
+            category = Category.objects.create(name='Bench fieldsets', slug='bench-fieldsets')
+            now = timezone.now()
+            rng = random.Random(1)
+            podcasts = Podcast.objects.bulk_create([
+                Podcast(
+                    user=user, category=category, title=f'Podcast {i}', description=text(rng, 180),
+                    image=f'podcasts/user_{user.pk}/cover{i}.png',
+                    image_derivatives={'source': f'podcasts/user_{user.pk}/cover{i}.png', 'files': {
+                        size: {'jpeg': f'podcasts/cover{i}_{size}.jpg', 'webp': f'podcasts/cover{i}_{size}.webp'}
+                        for size in ('small', 'medium', 'large')
+                    }},
+                )
+                for i in range(rows)
+            ], batch_size=2000)
+            Subscription.objects.bulk_create([Subscription(user=user, podcast=podcast) for podcast in podcasts], batch_size=2000)
+            Episode.objects.bulk_create([
+                Episode(podcast=podcasts[0], user=user, title=f'Episode {i}', audio_url=f'episodes/e{i}.mp3',
+                        duration=1800, show_notes=text(rng, 300), published_at=now)
+                for i in range(rows)
+            ], batch_size=2000)
+
+            client = APIClient(HTTP_HOST='localhost')
+            client.force_authenticate(user)
+            for url, fields in MOBILE_FIELDSETS:
+                url = url.format(podcast=podcasts[0].pk)
+                full = self.measure(client, url, {'page_size': page_size}, count)
+                sparse = self.measure(client, url, {'page_size': page_size, 'fields': fields}, count)
+                self.stdout.write(f"{url}  ?fields={fields}")
+                for label, (size, gzipped, latency) in (('full', full), ('fields', sparse)):
+                    self.stdout.write(f"  {label:<7} {size / 1024:8.1f} KiB  {gzipped / 1024:7.1f} KiB gzip  {latency:7.1f} ms")
+            transaction.set_rollback(True)
@@ -0,0 +1,59 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from Users.models import CustomUser
+from category.models import Podcast
+from category.views import PodcastListCreateView
+from podcast.pagination import KeysetPagination
+
+
+class Command(BaseCommand):
+    help = "Seeds podcasts in a rolled-back transaction and compares deep-page latency of OFFSET and keyset paging."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--podcasts', type=int, default=200_000)
+        parser.add_argument('--page-size', type=int, default=20)
+        parser.add_argument('--depths', type=int, nargs='+', default=[1, 100, 1000, 5000])
+
+    def handle(self, *args, **options):
+        total, page_size = options['podcasts'], options['page_size']
+        factory = APIRequestFactory()
+        view = PodcastListCreateView()
+        with transaction.atomic():
+            user = CustomUser.objects.create_user(username='bench-pages', email='bench-pages@example.com', password='x')
+            now = timezone.now()
+            self.stdout.write(f"Seeding {total:,} podcasts...")
+            for start in range(0, total, 10_000):
+                Podcast.objects.bulk_create([
+                    Podcast(user=user, title=f'Podcast {i}', description='', created_at=now - timezone.timedelta(seconds=i))
+                    for i in range(start, min(start + 10_000, total))
+                ])
+            queryset = Podcast.objects.all()
+
+            for depth in options['depths']:
+                offset = (depth - 1) * page_size
+                if offset >= total:
+                    continue
+                started = time.perf_counter()
+                list(queryset.order_by('-created_at', '-id')[offset:offset + page_size])
+                offset_ms = (time.perf_counter() - started) * 1000
+
+                # Position a keyset cursor on the last row of the previous page, as a client would have it
+                paginator = KeysetPagination()
+                cursor = None
+                if offset:
+                    previous = queryset.order_by('-created_at', '-id').values('created_at', 'id')[offset - 1]
+                    cursor = paginator.encode_cursor([previous['created_at'], previous['id']], False)
+                params = {'page_size': page_size, **({'cursor': cursor} if cursor else {})}
+                request = Request(factory.get('/api/podcasts/', params))
+                started = time.perf_counter()
+                paginator.paginate_queryset(queryset, request, view)
+                keyset_ms = (time.perf_counter() - started) * 1000
+
+                self.stdout.write(f"page {depth:>6}: OFFSET {offset_ms:8.2f} ms   keyset {keyset_ms:6.2f} ms")
+            transaction.set_rollback(True)
@@ -0,0 +1,76 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+
+from Users.models import CustomUser
+from category.models import Category, Podcast
+from category.serializers import PodcastSerializer
+from episodes_app.models import Episode
+from episodes_app.serializers import EpisodeSerializer
+from podcast.projection import RowProjection
+from subscriptions.models import Subscription
+from subscriptions.serializers import SubscriptionSerializer
+
+
+class Command(BaseCommand):
+    help = "Seeds rows in a rolled-back transaction and compares list serialization throughput of the ModelSerializers and podcast/projection.py."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10_000, help="Rows per page.")
+        parser.add_argument('--repeat', type=int, default=3, help="Runs per variant, the best one is reported.")
+
+    def best(self, repeat, function):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - started)
+        return min(timings)
+
+    def handle(self, *args, **options):
+        rows, repeat = options['rows'], options['repeat']
+        context = {'request': APIRequestFactory().get('/api/podcasts/', HTTP_HOST='localhost')}
+        with transaction.atomic():
+            user = CustomUser.objects.create_user(username='bench-serializers', email='bench-serializers@example.com', password='x')
+            category = Category.objects.create(name='Bench serializers', slug='bench-serializers')
+            now = timezone.now()
+            podcasts = Podcast.objects.bulk_create([
+                Podcast(
+                    user=user, category=category if i % 2 else None, title=f'Podcast {i}', description='x' * 300,
+                    image=f'podcasts/user_{user.pk}/cover{i}.png' if i % 3 else None,
+                    image_derivatives={'source': f'podcasts/user_{user.pk}/cover{i}.png', 'files': {
+                        size: {'jpeg': f'cover{i}_{size}.jpg', 'webp': f'cover{i}_{size}.webp'} for size in ('small', 'medium', 'large')
+                    }} if i % 3 else {},
+                )
+                for i in range(rows)
+            ], batch_size=2000)
+            Episode.objects.bulk_create([
+                Episode(podcast=podcasts[0], user=user, title=f'Episode {i}', audio_url=f'episodes/e{i}.mp3',
+                        duration=1800, show_notes='x' * 1000, published_at=now if i % 2 else None)
+                for i in range(rows)
+            ], batch_size=2000)
+            Subscription.objects.bulk_create([Subscription(user=user, podcast=podcast) for podcast in podcasts], batch_size=2000)
+
+            cases = (
+                (PodcastSerializer, Podcast.objects.filter(user=user).select_related('user').order_by('-created_at', '-id')),
+                (EpisodeSerializer, Episode.objects.filter(podcast=podcasts[0]).order_by('-published_at', '-created_at', '-id')),
+                (SubscriptionSerializer, Subscription.objects.filter(user=user).select_related('podcast__user').order_by('-subscribed_at', '-id')),
+            )
+            for serializer_class, queryset in cases:
+                projection = RowProjection(serializer_class())
+                instances = list(queryset[:rows])
+                values = list(queryset.values(*projection.columns)[:rows])
+                # Serialization alone, then the query included as the views run it
+                drf = self.best(repeat, lambda: serializer_class(instances, many=True, context=context).data)
+                fast = self.best(repeat, lambda: projection.serialize_many(values, context))
+                drf_total = self.best(repeat, lambda: serializer_class(queryset[:rows], many=True, context=context).data)
+                fast_total = self.best(repeat, lambda: projection.serialize_many(queryset.values(*projection.columns)[:rows], context))
+                self.stdout.write(
+                    f"{serializer_class.__name__:<23} serialize: DRF {rows / drf:9,.0f} rows/s  projection {rows / fast:9,.0f} rows/s"
+                    f" ({drf / fast:5.1f}x)   with query: DRF {rows / drf_total:9,.0f} rows/s  projection {rows / fast_total:9,.0f} rows/s"
+                    f" ({drf_total / fast_total:4.1f}x)"
+                )
+            transaction.set_rollback(True)
@@ -0,0 +1,59 @@
+import time
+from concurrent.futures import wait
+
+from django.core.management.base import BaseCommand
+
+from category.imaging import derivative_pool, derivative_stats, get_derivative_settings, is_current
+from category.models import Podcast
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates missing or outdated image derivatives for existing podcasts through the "
+        "derivative pool. Safe to re-run: podcasts whose derivatives are current are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help="Regenerate even if the derivatives look current.")
+        parser.add_argument('--batch-size', type=int, default=200, help="Podcasts read and queued at a time.")
+        parser.add_argument('ids', nargs='*', type=int, help="Only these podcast ids.")
+
+    def handle(self, *args, **options):
+        config = get_derivative_settings()
+        # Stay under MAX_PENDING so the pool never drops our jobs
+        batch_size = max(1, min(options['batch_size'], config['MAX_PENDING']))
+        queryset = Podcast.objects.exclude(image='').exclude(image__isnull=True).only('id', 'image', 'image_derivatives')
+        if options['ids']:
+            queryset = queryset.filter(pk__in=options['ids'])
+
+        started = time.monotonic()
+        generated = skipped = failed = 0
+        last_id = 0
+        while True:
+            # Walk by primary key so each batch is an index range scan
+            batch = list(queryset.filter(pk__gt=last_id).order_by('pk')[:batch_size])
+            if not batch:
+                break
+            last_id = batch[-1].pk
+            futures = []
+            for podcast in batch:
+                if not options['force'] and is_current(podcast, config):
+                    skipped += 1
+                    continue
+                future = derivative_pool.submit(podcast.pk, force=options['force'])
+                if future is None:
+                    failed += 1
+                else:
+                    futures.append(future)
+            wait(futures)
+            for future in futures:
+                if future.result():
+                    generated += 1
+                else:
+                    failed += 1 # Errors are logged by the pool
+            self.stdout.write(f"  up to id {last_id}: {generated:,} generated, {skipped:,} current, {failed:,} failed")
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(f"Done in {elapsed:.1f}s: {generated:,} generated, {skipped:,} already current, {failed:,} failed")
+        for key, entry in sorted(derivative_stats().items()):
+            self.stdout.write(f"  {key:<14} {entry['count']:>6} x  avg {entry['avg_ms']:7.1f} ms  max {entry['max_ms']:7.1f} ms")
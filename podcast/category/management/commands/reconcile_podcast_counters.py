@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from category.counters import drifted_ids, recompute_counters
+from category.models import Podcast
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares Podcast subscriber/episode/duration counters with the Subscription and Episode "
+        "tables in primary-key batches and rewrites the ones that drifted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Podcasts checked per batch.")
+        parser.add_argument('--sleep', type=float, default=0.0, help="Seconds to pause between batches.")
+        parser.add_argument('--dry-run', action='store_true', help="Only report how many podcasts drifted.")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        checked = repaired = 0
+        last_id = 0
+        while True:
+            ids = list(
+                Podcast.objects.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:options['batch_size']]
+            )
+            if not ids:
+                break
+            last_id = ids[-1]
+            checked += len(ids)
+            with transaction.atomic():
+                drifted = drifted_ids(ids)
+                if drifted and not options['dry_run']:
+                    # Recomputed inside the UPDATE, so concurrent F() increments aren't lost
+                    recompute_counters(drifted)
+            repaired += len(drifted)
+            if drifted:
+                self.stdout.write(f"  ids {ids[0]}-{last_id}: {len(drifted)} drifted")
+            if options['sleep']:
+                time.sleep(options['sleep'])
+        verb = "would be repaired" if options['dry_run'] else "repaired"
+        self.stdout.write(f"Checked {checked:,} podcasts in {time.monotonic() - started:.1f}s, {repaired:,} {verb}")
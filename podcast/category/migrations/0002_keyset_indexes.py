@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:28
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('category', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='podcast',
+            index=models.Index(fields=['-created_at', '-id'], name='podcast_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='podcast',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='podcast_user_created_idx'),
+        ),
+    ]
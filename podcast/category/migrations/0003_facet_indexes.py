@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:02
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('category', '0002_keyset_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='podcast',
+            index=models.Index(fields=['category', '-created_at', '-id'], name='podcast_category_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='podcast',
+            index=models.Index(fields=['is_featured', '-created_at', '-id'], name='podcast_featured_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='podcast',
+            index=models.Index(fields=['category', 'is_featured', 'created_at'], name='podcast_facets_idx'),
+        ),
+    ]
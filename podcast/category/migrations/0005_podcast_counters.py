@@ -0,0 +1,73 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:08
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    # One UPDATE with correlated subqueries, like reconcile_podcast_counters
+    Podcast = apps.get_model('category', 'Podcast')
+    Episode = apps.get_model('episodes_app', 'Episode')
+    Subscription = apps.get_model('subscriptions', 'Subscription')
+
+    def scalar(queryset, aggregate):
+        return Coalesce(
+            Subquery(queryset.filter(podcast=OuterRef('pk')).order_by().values('podcast').annotate(v=aggregate).values('v')),
+            Value(0), output_field=IntegerField(),
+        )
+
+    published = Episode.objects.filter(published_at__isnull=False)
+    Podcast.objects.update(
+        subscriber_count=scalar(Subscription.objects.all(), Count('id')),
+        episode_count=scalar(Episode.objects.all(), Count('id')),
+        published_episode_count=scalar(published, Count('id')),
+        total_duration=scalar(published, Sum(Coalesce('duration', 0))),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('category', '0004_image_derivatives'),
+        ('episodes_app', '0002_keyset_indexes'),
+        ('subscriptions', '0002_keyset_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='podcast',
+            name='episode_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='podcast',
+            name='published_episode_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='podcast',
+            name='subscriber_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='podcast',
+            name='total_duration',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='podcast',
+            index=models.Index(fields=['-subscriber_count', '-id'], name='podcast_subscribers_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='podcast',
+            index=models.Index(fields=['-published_episode_count', '-id'], name='podcast_episodes_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='podcast',
+            index=models.Index(fields=['-total_duration', '-id'], name='podcast_duration_idx'),
+        ),
+    ]
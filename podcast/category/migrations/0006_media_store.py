@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:38
+
+import category.models
+import podcast.media_store
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('category', '0005_podcast_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='podcast',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=podcast.media_store.media_storage, upload_to=category.models.podcast_image_upload_path),
+        ),
+        migrations.AddIndex(
+            model_name='podcast',
+            index=models.Index(fields=['image'], name='podcast_image_idx'),
+        ),
+    ]
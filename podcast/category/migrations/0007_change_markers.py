@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('category', '0006_media_store'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeMarker',
+            fields=[
+                ('key', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('changed_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='podcast',
+            index=models.Index(fields=['updated_at'], name='podcast_updated_idx'),
+        ),
+    ]
@@ -1,7 +1,9 @@
 from django.db import models
 from django.conf import settings # To link to your AUTH_USER_MODEL (CustomUser)
 from django.template.defaultfilters import slugify # To generate slugs
-import os # To help with deleting old files
+from podcast.file_cleanup import file_cleanup_queue # Deletes replaced files after commit
+from podcast.media_store import media_storage # Content-addressed store for the artwork
+from podcast.mixins import DirtyFieldsMixin # Tracks changed fields without an extra SELECT
 
 # Assuming CustomUser model from Task 1 exists and AUTH_USER_MODEL is set
 
@@ -26,7 +28,7 @@ def podcast_image_upload_path(instance, filename):
     # Files will be uploaded to MEDIA_ROOT/podcasts/user_<id>/<filename>
     return f'podcasts/user_{instance.user.id}/{filename}'
 
-class Podcast(models.Model):
+class Podcast(DirtyFieldsMixin, models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL, # Links to the creator of the podcast
         on_delete=models.CASCADE,
@@ -40,33 +42,77 @@ class Podcast(models.Model):
     )
     title = models.CharField(max_length=200)
     description = models.TextField()
-    image = models.ImageField(upload_to=podcast_image_upload_path, null=True, blank=True) # Optional image
+    image = models.ImageField(upload_to=podcast_image_upload_path, storage=media_storage, null=True, blank=True) # Optional image, deduplicated
+    # Resized copies of image, filled in the background by category/imaging.py
+    image_derivatives = models.JSONField(default=dict, blank=True, editable=False)
     is_featured = models.BooleanField(default=False) # Flag to mark as featured
+    # Denormalized counters, maintained with F() updates by category/counters.py
+    subscriber_count = models.PositiveIntegerField(default=0, editable=False)
+    episode_count = models.PositiveIntegerField(default=0, editable=False) # Drafts included
+    published_episode_count = models.PositiveIntegerField(default=0, editable=False) # Released ones, not scheduled
+    total_duration = models.PositiveBigIntegerField(default=0, editable=False) # Seconds of released episodes
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Keyset pagination of PodcastListCreateView, with and without ?user_id=
+            models.Index(fields=['-created_at', '-id'], name='podcast_created_idx'),
+            models.Index(fields=['user', '-created_at', '-id'], name='podcast_user_created_idx'),
+            # ?category= and ?is_featured= filters (category/filters.py), newest first
+            models.Index(fields=['category', '-created_at', '-id'], name='podcast_category_created_idx'),
+            models.Index(fields=['is_featured', '-created_at', '-id'], name='podcast_featured_created_idx'),
+            # Covers the facet GROUP BY, so counting never touches the table rows
+            models.Index(fields=['category', 'is_featured', 'created_at'], name='podcast_facets_idx'),
+            # ?ordering= on the counters (PodcastListCreateView.get_keyset_ordering), either direction
+            models.Index(fields=['-subscriber_count', '-id'], name='podcast_subscribers_idx'),
+            models.Index(fields=['-published_episode_count', '-id'], name='podcast_episodes_idx'),
+            models.Index(fields=['-total_duration', '-id'], name='podcast_duration_idx'),
+            # Whether a shared media blob (or its derivatives) is still used (podcast/media_store.py)
+            models.Index(fields=['image'], name='podcast_image_idx'),
+            # Newest change of any podcast, the Last-Modified of the lists (podcast/conditional.py)
+            models.Index(fields=['updated_at'], name='podcast_updated_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
     # Optional: Add a method to delete the old image file when a new one is uploaded
     def save(self, *args, **kwargs):
-        # Check if the instance already exists in the database
-        if self.pk:
-            try:
-                old_instance = Podcast.objects.get(pk=self.pk)
-                # Check if the image file has changed
-                if old_instance.image and self.image != old_instance.image:
-                    # Delete the old file
-                    if os.path.exists(old_instance.image.path):
-                        os.remove(old_instance.image.path)
-            except Podcast.DoesNotExist:
-                pass # New instance, no old file to delete
+        from .imaging import schedule_derivatives # imaging imports this module
+
+        # Dirty tracking (podcast.mixins) knows whether the image changed without re-reading the row
+        image_changed = self._state.adding or self.is_dirty('image')
+        if image_changed and not self._state.adding:
+            # The old derivatives belong to the old image; the old file itself is removed by the mixin
+            self.delete_derivative_files()
+            self.image_derivatives = {}
 
         super().save(*args, **kwargs)
+        if image_changed and self.image:
+            schedule_derivatives(self) # Resized in the background after commit
 
     # Optional: Add a method to delete the image file when the Podcast object is deleted
     def delete(self, *args, **kwargs):
-        if self.image:
-            if os.path.exists(self.image.path):
-                 os.remove(self.image.path)
-        super().delete(*args, **kwargs)
\ No newline at end of file
+        self.delete_derivative_files()
+        return super().delete(*args, **kwargs) # The mixin removes the image after commit
+
+    def delete_derivative_files(self):
+        """Queues the resized copies for deletion once the transaction commits."""
+        source = (self.image_derivatives or {}).get('source')
+        if source and Podcast.objects.filter(image=source).exclude(pk=self.pk).exists():
+            return # Another podcast has the same (deduplicated) image and shares its derivatives
+        names = [name for formats in (self.image_derivatives or {}).get('files', {}).values() for name in formats.values()]
+        file_cleanup_queue.delete_on_commit(self.image.storage, names)
+
+
+class ChangeMarker(models.Model):
+    """
+    When something last changed that leaves no updated_at behind (deletions, category
+    renames, episodes leaving a page), by key; see category/changes.py.
+    """
+    key = models.CharField(max_length=100, primary_key=True)
+    changed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.key} at {self.changed_at}"
@@ -2,6 +2,10 @@
 
 from rest_framework import serializers
 from Users.serializers import UserSerializer 
+from podcast.fieldsets import FieldsetSerializerMixin # ?fields= / ?expand=
+from podcast.projection import Projected, storage_url_function # Column-based fast path for list responses
+from podcast.relations import ScopedPrimaryKeyRelatedField # DB lookups once per request
+from .catalog import category_catalog # Cached copy of the Category table
 from .models import Category, Podcast # Import your new models
 
 # If models and serializers are in the same app, use:
@@ -13,21 +17,56 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'slug')
         read_only_fields = ('slug',) # Slug is auto-generated
 
-class PodcastSerializer(serializers.ModelSerializer):
+class CatalogCategoryField(serializers.Field):
+    """Nested CategorySerializer output read from the in-memory catalog instead of a JOIN."""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('source', 'category_id')
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return category_catalog.get_referenced(value) # Reloads if the category is newer than this copy
+
+
+def derivative_urls(context, image, derivatives):
+    """Absolute URLs like the image field itself, once the derivatives match the current image."""
+    derivatives = derivatives or {}
+    if not image or derivatives.get('source') != image:
+        return {}
+    url = storage_url_function(Podcast._meta.get_field('image').storage, context)
+    return {
+        size_name: {fmt: url(name) for fmt, name in formats.items()}
+        for size_name, formats in derivatives.get('files', {}).items()
+    }
+
+
+class PodcastSerializer(FieldsetSerializerMixin, serializers.ModelSerializer):
     # Use the UserSerializer to represent the creator
     user = UserSerializer(read_only=True)
-    # Use the CategorySerializer to represent the category details
-    category = CategorySerializer(read_only=True)
+    # Category details come from the category catalog (category/catalog.py), no JOIN or per-row serializer
+    category = CatalogCategoryField()
     # Add writeable fields for setting category by ID during creation/update
-    category_id = serializers.PrimaryKeyRelatedField(
+    # Checked against the DB, not the catalog: another process's copy may still list a deleted category
+    category_id = ScopedPrimaryKeyRelatedField(
          queryset=Category.objects.all(), source='category', write_only=True, allow_null=True, required=False
     )
+    # Resized artwork, {'small': {'jpeg': url, 'webp': url}, ...}; empty until the background job has run
+    image_derivatives = serializers.SerializerMethodField(read_only=True)
 
     class Meta:
         model = Podcast
         fields = (
             'id', 'user', 'category', 'category_id', 'title',
-            'description', 'image', 'is_featured', 'created_at', 'updated_at'
+            'description', 'image', 'image_derivatives', 'is_featured',
+            'subscriber_count', 'episode_count', 'published_episode_count', 'total_duration',
+            'created_at', 'updated_at'
         )
         read_only_fields = ('user', 'created_at', 'updated_at', 'is_featured') # User, timestamps, and featured are set by the system/admin
-        
\ No newline at end of file
+        # Method fields computed from columns when GET lists skip the serializer (podcast/projection.py)
+        projected_fields = {
+            'image_derivatives': Projected(['image', 'image_derivatives'], derivative_urls),
+        }
+        
+    def get_image_derivatives(self, obj):
+        return derivative_urls(self.context, obj.image.name, obj.image_derivatives)
@@ -0,0 +1,38 @@
+# In your Django app's signals.py
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import changes # Last-Modified markers
+from .catalog import category_catalog
+from .filters import bump_facets_version
+from .models import Category, Podcast
+
+
+@receiver(post_save, sender=Podcast)
+@receiver(post_delete, sender=Podcast)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_facets(sender, **kwargs):
+    # Any podcast or category change can move counts between buckets. After commit: bumped
+    # earlier, a request could cache the old counts again under the new version
+    transaction.on_commit(bump_facets_version)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_catalog(sender, **kwargs):
+    category_catalog.bump_on_commit()
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def mark_categories_changed(sender, **kwargs):
+    # Podcasts render category names from the catalog, their updated_at doesn't move
+    changes.mark_changed(changes.CATEGORIES)
+
+
+@receiver(post_delete, sender=Podcast)
+def mark_podcast_deleted(sender, **kwargs):
+    changes.mark_changed(changes.PODCASTS_DELETED)
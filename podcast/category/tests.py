@@ -1,3 +1,467 @@
-from django.test import TestCase
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.files.base import ContentFile
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APIRequestFactory
+
+from podcast.file_cleanup import file_cleanup_queue
+from podcast.media_store import plain_storage
+from podcast.projection import get_projection, narrow_queryset
+from podcast.testing import TemporaryMediaMixin
+from episodes_app.models import Episode
+from subscriptions.models import Subscription
+from Users.models import CustomUser
+from . import imaging
+from .catalog import category_catalog
+from .counters import release_due_episodes
+from .filters import PodcastFilter, compute_facets, get_facets
+from .models import Category, ChangeMarker, Podcast
+from .serializers import PodcastSerializer
+
+
+class PodcastProjectionParityTests(TestCase):
+    """The compiled list serialization (podcast/projection.py) must match PodcastSerializer exactly."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.media_root = tempfile.mkdtemp()
+        cls.media_override = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.media_override.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.media_override.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(username='owner', email='owner@example.com', password='x')
+        verified = CustomUser.objects.create_user(username='verified', email='verified@example.com', password='x')
+        verified.email_verified_at = timezone.now()
+        verified.save()
+        category = Category.objects.create(name='Science', slug='science')
+
+        Podcast.objects.create(user=cls.user, title='No category', description='')
+        Podcast.objects.create(user=verified, category=category, title='Featured', description='d', is_featured=True)
+        with_image = Podcast.objects.create(
+            user=verified, category=category, title='Artwork', description='d',
+            image=SimpleUploadedFile('cover.gif', b'GIF89a', content_type='image/gif'),
+        )
+        Podcast.objects.filter(pk=with_image.pk).update(image_derivatives={
+            'source': with_image.image.name,
+            'files': {'small': {'jpeg': 'podcasts/cover_small.jpg', 'webp': 'podcasts/cover_small.webp'}},
+        })
+        stale = Podcast.objects.create(
+            user=cls.user, title='Stale derivatives', description='d',
+            image=SimpleUploadedFile('old.gif', b'GIF89a', content_type='image/gif'),
+        )
+        Podcast.objects.filter(pk=stale.pk).update(image_derivatives={'source': 'podcasts/other.gif', 'files': {}})
+        # Names that need quoting take the storage.url() path
+        Podcast.objects.create(
+            user=cls.user, title='Quoted', description='d', image='podcasts/My Cover é.png',
+            image_derivatives={'source': 'podcasts/My Cover é.png', 'files': {'small': {'jpeg': 'podcasts/../a b_small.jpg'}}},
+        )
+
+    def render(self, data):
+        return json.loads(JSONRenderer().render(data))
+
+    def test_rows_match_serializer(self):
+        request = APIRequestFactory().get('/api/podcasts/')
+        context = {'request': request}
+        projection = get_projection(PodcastSerializer)
+        self.assertIsNotNone(projection)
+
+        queryset = Podcast.objects.order_by('id')
+        expected = PodcastSerializer(queryset.select_related('user'), many=True, context=context).data
+        actual = projection.serialize_many(queryset.values(*projection.columns), context)
+        self.assertEqual(self.render(actual), self.render(expected))
+
+    def test_list_view_matches_serializer(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        for params in ({}, {'ordering': 'subscribers'}, {'category': 'none'}, {'page_size': 2}, {'fields': 'id,title,image,user.username'}):
+            fast = client.get('/api/podcasts/', params)
+            with override_settings(FAST_READ_SERIALIZERS=False):
+                slow = client.get('/api/podcasts/', params)
+            self.assertEqual(fast.status_code, 200)
+            self.assertEqual(fast.json(), slow.json(), params)
+
+
+class MediaStoreTests(TemporaryMediaMixin, TestCase):
+    """Uploads are stored once per content and shared blobs survive deletes (podcast/media_store.py)."""
+
+    media_settings = {'MEDIA_STORE': {'GRACE': 0}}
+
+    def setUp(self):
+        super().setUp()
+        self.owner = CustomUser.objects.create_user(username='owner', email='owner@example.com', password='x')
+        self.podcast = Podcast.objects.create(user=self.owner, title='Show', description='d')
+
+    def test_same_bytes_share_one_blob(self):
+        data = os.urandom(10_000)
+        first = Episode(podcast=self.podcast, user=self.owner, title='One')
+        first.audio_url.save('take1.MP3', ContentFile(data), save=False)
+        second = Episode(podcast=self.podcast, user=self.owner, title='Two')
+        second.audio_url.save('take2.mp3', ContentFile(data), save=False)
+        digest = hashlib.sha256(data).hexdigest()
+        self.assertEqual(first.audio_url.name, f'cas/{digest[:2]}/{digest[2:4]}/{digest}.mp3')
+        self.assertEqual(second.audio_url.name, first.audio_url.name)
+        self.assertEqual(os.listdir(os.path.dirname(first.audio_url.path)), [f'{digest}.mp3'])
+        self.assertEqual(first.audio_url.url, f'/media/{first.audio_url.name}')
+
+        storage = first.audio_url.storage
+        first.save()
+        second.save()
+        first.delete()
+        storage.delete(first.audio_url.name) # What the cleanup queue does after commit
+        self.assertTrue(storage.exists(second.audio_url.name)) # Still used by the second episode
+        second.delete()
+        storage.delete(second.audio_url.name)
+        self.assertFalse(storage.exists(second.audio_url.name))
+
+    def test_recent_blob_kept_without_references(self):
+        with override_settings(MEDIA_STORE={'GRACE': 3600}):
+            self.podcast.image.save('cover.png', ContentFile(b'not really a png'), save=False)
+            storage = self.podcast.image.storage
+            storage.delete(self.podcast.image.name) # Might belong to a row that isn't committed yet
+            self.assertTrue(storage.exists(self.podcast.image.name))
+
+    def test_blob_touched_during_delete_kept(self):
+        with override_settings(MEDIA_STORE={'GRACE': 3600}):
+            self.podcast.image.save('cover.png', ContentFile(b'artwork'), save=False)
+            storage = self.podcast.image.storage
+            name = self.podcast.image.name
+            os.utime(storage.path(name), (0, 0)) # Long past the grace period
+
+            def adopted_meanwhile(blob):
+                storage.adopt(storage.path(name) + '.upload', hashlib.sha256(b'artwork').hexdigest(), 'again.png')
+                return False
+            with open(storage.path(name) + '.upload', 'wb') as handle:
+                handle.write(b'artwork')
+            with mock.patch('podcast.media_store.is_referenced', adopted_meanwhile):
+                storage.delete(name)
+            self.assertTrue(storage.exists(name))
+
+    def test_dedupe_keeps_old_file_still_used(self):
+        storage = Episode._meta.get_field('audio_url').storage
+        plain_storage(storage).save('episodes/shared.mp3', ContentFile(b'audio'))
+        for title in ('One', 'Two'):
+            Episode.objects.create(podcast=self.podcast, user=self.owner, title=title, audio_url='episodes/shared.mp3')
+        with mock.patch.object(file_cleanup_queue, 'delete_on_commit') as queued:
+            call_command('dedupe_media', batch_size=1, stdout=StringIO())
+        # Not after the first row's batch: the second row still pointed at it
+        self.assertEqual(queued.call_args_list, [mock.call(storage, ['episodes/shared.mp3'])])
+        self.assertEqual(len({episode.audio_url.name for episode in Episode.objects.all()}), 1)
+
+
+def png_bytes(size=(800, 600)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+@override_settings(PODCAST_IMAGE_DERIVATIVES={'SIZES': {'small': 120, 'large': 300}, 'FORMATS': ('jpeg', 'webp')})
+class ImageDerivativeTests(TemporaryMediaMixin, TransactionTestCase):
+    """Resized copies of Podcast.image (category/imaging.py); committed rows, the backfill uses worker threads."""
+
+    def setUp(self):
+        super().setUp()
+        self.owner = CustomUser.objects.create_user(username='owner', email='owner@example.com', password='x')
+
+    def create(self, title):
+        with mock.patch.object(imaging.derivative_pool, 'submit'): # Generated explicitly below
+            return Podcast.objects.create(
+                user=self.owner, title=title, description='d', image=SimpleUploadedFile('cover.png', png_bytes()),
+            )
+
+    def test_generate_once(self):
+        podcast = self.create('Show')
+        self.assertTrue(imaging.generate_derivatives(podcast.pk))
+        podcast.refresh_from_db()
+        self.assertTrue(imaging.is_current(podcast))
+        storage = plain_storage(podcast.image.storage)
+        for size_name, edge in (('small', 120), ('large', 300)):
+            for fmt in ('jpeg', 'webp'):
+                with Image.open(storage.path(podcast.image_derivatives['files'][size_name][fmt])) as image:
+                    self.assertEqual((image.format.lower(), image.size), (fmt, (edge, edge)))
+        self.assertFalse(imaging.generate_derivatives(podcast.pk)) # Current: nothing to do
+        self.assertTrue(imaging.generate_derivatives(podcast.pk, force=True))
+        self.assertEqual([name for name in os.listdir(os.path.dirname(podcast.image.path)) if name.endswith('.part')], [])
+
+    def test_shared_image_adopts_derivatives(self):
+        first, second = self.create('One'), self.create('Two')
+        self.assertEqual(first.image.name, second.image.name) # Deduplicated
+        imaging.generate_derivatives(first.pk)
+        with mock.patch.object(imaging, 'store_derivative') as stored:
+            self.assertTrue(imaging.generate_derivatives(second.pk))
+        stored.assert_not_called()
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(second.image_derivatives, first.image_derivatives)
+
+    def test_backfill_command(self):
+        podcasts = [self.create('One'), self.create('Two')]
+        Podcast.objects.create(user=self.owner, title='No image', description='d')
+        call_command('generate_image_derivatives', stdout=StringIO())
+        for podcast in podcasts:
+            podcast.refresh_from_db()
+            self.assertTrue(imaging.is_current(podcast))
+        out = StringIO()
+        call_command('generate_image_derivatives', stdout=out)
+        self.assertIn('0 generated, 2 already current', out.getvalue())
+
+
+class CategoryCatalogTests(TestCase):
+    """Another process's catalog copy can be stale until MAX_AGE (category/catalog.py)."""
+
+    def setUp(self):
+        caches['default'].clear()
+        category_catalog.bump()
+        self.user = CustomUser.objects.create_user(username='owner', email='owner@example.com', password='x')
+        category_catalog.all() # Loaded; the changes below aren't bumped (no commit in a TestCase)
+
+    def test_new_category_reloads(self):
+        category = Category.objects.create(name='New', slug='new')
+        podcast = Podcast.objects.create(user=self.user, title='Show', description='d', category=category)
+        self.assertEqual(PodcastSerializer(podcast).data['category'], {'id': category.pk, 'name': 'New', 'slug': 'new'})
+
+    def test_deleted_category_rejected(self):
+        category = Category.objects.create(name='Gone', slug='gone')
+        category_catalog.get_referenced(category.pk)
+        Category.objects.filter(pk=category.pk).delete()
+        self.assertIsNotNone(category_catalog.get(category.pk)) # Still in the stale copy
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.post('/api/podcasts/', {'title': 'Show', 'description': 'd', 'category_id': category.pk})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('category_id', response.data)
+
+
+class PodcastFilterTests(TestCase):
+    """?category= / ?is_featured= / ?user_id= / ?created_* and the facet counts (category/filters.py)."""
+
+    def setUp(self):
+        caches['default'].clear()
+        category_catalog.bump()
+        self.owner = CustomUser.objects.create_user(username='owner', email='owner@example.com', password='x')
+        other = CustomUser.objects.create_user(username='other', email='other@example.com', password='x')
+        news = Category.objects.create(name='News', slug='news')
+        tech = Category.objects.create(name='Tech', slug='tech')
+        self.ids = {}
+        for title, user, category, featured, created in (
+            ('a', self.owner, news, True, '2025-01-10T12:00:00Z'),
+            ('b', self.owner, news, False, '2025-02-10T12:00:00Z'),
+            ('c', other, tech, True, '2025-03-10T12:00:00Z'),
+            ('d', other, None, False, '2025-03-20T12:00:00Z'),
+        ):
+            podcast = Podcast.objects.create(user=user, title=title, description='d', category=category, is_featured=featured)
+            Podcast.objects.filter(pk=podcast.pk).update(created_at=created)
+            self.ids[title] = podcast.pk
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def titles(self, **params):
+        response = self.client.get('/api/podcasts/', params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return sorted(podcast['title'] for podcast in response.data['results'])
+
+    def test_filter_combinations(self):
+        self.assertEqual(self.titles(category='news', is_featured='true'), ['a'])
+        self.assertEqual(self.titles(category='none'), ['d'])
+        self.assertEqual(self.titles(is_featured='false', user_id=self.owner.pk), ['b'])
+        self.assertEqual(self.titles(created_after='2025-02-01', created_before='2025-03-10'), ['b', 'c']) # Whole last day
+        self.assertEqual(self.titles(category='missing'), [])
+        for params in ({'is_featured': 'maybe'}, {'user_id': 'x'}, {'created_after': 'March'}, {'created_before': '2025-02-30'}):
+            self.assertEqual(self.client.get('/api/podcasts/', params).status_code, 400)
+
+    def test_facets_from_one_grouping(self):
+        category_catalog.all()
+        podcast_filter = PodcastFilter({'category': 'news', 'is_featured': 'true'})
+        with self.assertNumQueries(1):
+            facets = compute_facets(podcast_filter)
+        self.assertEqual(facets['total'], 1)
+        # Each facet ignores its own parameter
+        self.assertEqual({entry['slug']: entry['count'] for entry in facets['categories']}, {'news': 1, 'tech': 1})
+        self.assertEqual(facets['is_featured'], {'true': 1, 'false': 1})
+
+    def test_facet_cache_bumped_after_commit(self):
+        podcast_filter = PodcastFilter({})
+        self.assertEqual(get_facets(podcast_filter)['total'], 4)
+        with self.captureOnCommitCallbacks() as callbacks:
+            Podcast.objects.create(user=self.owner, title='e', description='d')
+            self.assertEqual(get_facets(podcast_filter)['total'], 4) # Not committed yet
+        for callback in callbacks:
+            callback()
+        self.assertEqual(get_facets(podcast_filter)['total'], 5)
+
+
+class DirtyFieldsTests(TestCase):
+    """save(update_fields=...) leaves the other changes dirty (podcast/mixins.py)."""
+
+    def test_unsaved_fields_stay_dirty(self):
+        user = CustomUser.objects.create_user(username='owner', email='owner@example.com', password='x')
+        Podcast.objects.create(user=user, title='Show', description='d', image='old.png')
+        podcast = Podcast.objects.get()
+        podcast.title = 'New title'
+        podcast.description = 'New description'
+        podcast.image = 'new.png'
+        podcast.save(update_fields=['title'])
+        self.assertEqual(set(podcast.get_dirty_fields()), {'description', 'image'})
+
+        podcast.save()
+        podcast.refresh_from_db()
+        self.assertEqual((podcast.title, podcast.description, podcast.image.name), ('New title', 'New description', 'new.png'))
+        self.assertEqual(podcast.get_dirty_fields(), {})
+
+
+class PodcastCounterTests(TestCase):
+    """Denormalized counters follow saves and deletes; reconcile repairs drift (category/counters.py)."""
+
+    def counters(self):
+        self.podcast.refresh_from_db()
+        return (
+            self.podcast.subscriber_count, self.podcast.episode_count,
+            self.podcast.published_episode_count, self.podcast.total_duration,
+        )
+
+    def test_counters_and_reconcile(self):
+        owner = CustomUser.objects.create_user(username='owner', email='owner@example.com', password='x')
+        self.podcast = Podcast.objects.create(user=owner, title='Show', description='d')
+        Subscription.objects.create(user=owner, podcast=self.podcast)
+        Episode.objects.create(podcast=self.podcast, user=owner, title='Out', audio_url='a.mp3', duration=60, published_at=timezone.now())
+        draft = Episode.objects.create(podcast=self.podcast, user=owner, title='Draft', audio_url='b.mp3', duration=30)
+        self.assertEqual(self.counters(), (1, 2, 1, 60))
+
+        draft.published_at = timezone.now()
+        draft.save()
+        self.assertEqual(self.counters(), (1, 2, 2, 90))
+        draft.delete()
+        self.assertEqual(self.counters(), (1, 1, 1, 60))
+
+        # Bulk operations bypass the counters
+        Episode.objects.filter(podcast=self.podcast).update(duration=100)
+        Podcast.objects.filter(pk=self.podcast.pk).update(subscriber_count=5, episode_count=7)
+        self.assertEqual(self.counters(), (5, 7, 1, 60))
+        call_command('reconcile_podcast_counters', stdout=StringIO())
+        self.assertEqual(self.counters(), (1, 1, 1, 100))
+
+    def test_scheduled_counted_once_released(self):
+        owner = CustomUser.objects.create_user(username='owner', email='owner@example.com', password='x')
+        self.podcast = Podcast.objects.create(user=owner, title='Show', description='d')
+        soon = timezone.now() + timedelta(hours=1)
+        scheduled = Episode.objects.create(podcast=self.podcast, user=owner, title='Soon', audio_url='a.mp3', duration=60, published_at=soon)
+        self.assertEqual(self.counters(), (0, 1, 0, 0))
+        scheduled.title = 'Soon!'
+        scheduled.save()
+        self.assertEqual(release_due_episodes(), 0)
+        self.assertEqual(release_due_episodes(now=soon), 1)
+        self.assertEqual(release_due_episodes(now=soon), 0) # Counted once
+        self.assertEqual(self.counters(), (0, 1, 1, 60))
+        scheduled.refresh_from_db()
+        scheduled.delete()
+        self.assertEqual(self.counters(), (0, 0, 0, 0))
+
+    def test_decrement_clamped_at_zero(self):
+        owner = CustomUser.objects.create_user(username='owner', email='owner@example.com', password='x')
+        self.podcast = Podcast.objects.create(user=owner, title='Show', description='d')
+        subscription = Subscription.objects.create(user=owner, podcast=self.podcast)
+        Podcast.objects.filter(pk=self.podcast.pk).update(subscriber_count=0) # Drifted
+        subscription.delete() # Used to fail the CHECK on the unsigned column
+        self.assertEqual(self.counters()[0], 0)
+
+
+class PodcastLastModifiedTests(TestCase):
+    """Deletions and category renames move Last-Modified too (category/changes.py)."""
+
+    def setUp(self):
+        caches['default'].clear()
+        self.user = CustomUser.objects.create_user(username='owner', email='owner@example.com', password='x')
+        self.category = Category.objects.create(name='News', slug='news')
+        self.podcast = Podcast.objects.create(user=self.user, title='Show', description='d', category=self.category)
+        self.other = Podcast.objects.create(user=self.user, title='Other', description='d')
+        # Last-Modified never names the current second, so nothing in it could 304 yet
+        an_hour_ago = timezone.now() - timedelta(hours=1)
+        Podcast.objects.update(updated_at=an_hour_ago)
+        ChangeMarker.objects.update(changed_at=an_hour_ago)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def assert_revalidates(self, url, change):
+        last_modified = self.client.get(url)['Last-Modified']
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+        change()
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 200)
+
+    def test_list_after_a_delete(self):
+        self.assert_revalidates('/api/podcasts/', self.other.delete)
+
+    def test_list_after_an_edit_off_the_page(self):
+        url = f'/api/podcasts/?category={self.category.pk}'
+        self.assert_revalidates(url, lambda: Podcast.objects.get(pk=self.other.pk).save()) # Not on this page
+
+    def test_detail_after_a_category_rename(self):
+        def rename():
+            self.category.name = 'World news'
+            self.category.save()
+        self.assert_revalidates(f'/api/podcasts/{self.podcast.pk}/', rename)
+
+
+class FieldsetTests(TestCase):
+    """?fields= and ?expand= (podcast/fieldsets.py) and the columns they load (podcast/projection.py)."""
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='owner', email='owner@example.com', password='x')
+        self.podcast = Podcast.objects.create(user=self.user, title='Show', description='Long description')
+        Episode.objects.create(podcast=self.podcast, user=self.user, title='Out', audio_url='a.mp3', published_at=timezone.now())
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get(self, url, **params):
+        return self.client.get(url, params)
+
+    def test_fields_and_expand(self):
+        data = self.get(f'/api/podcasts/{self.podcast.pk}/', fields='id,title,user.username').data
+        self.assertEqual(data, {'id': self.podcast.pk, 'title': 'Show', 'user': {'username': 'owner'}})
+        url = f'/api/podcasts/{self.podcast.pk}/episodes/'
+        self.assertEqual(self.get(url, fields='id,podcast').data['results'][0]['podcast'], self.podcast.pk)
+        episode = self.get(url, expand='podcast', fields='title,podcast.title').data['results'][0]
+        self.assertEqual(episode, {'title': 'Out', 'podcast': {'title': 'Show'}})
+
+    def test_errors(self):
+        detail = f'/api/podcasts/{self.podcast.pk}/'
+        for url, params, key in (
+            (detail, {'fields': 'id,nope'}, 'fields'),
+            (detail, {'fields': 'user.nope'}, 'fields'),
+            (detail, {'fields': 'title.length'}, 'fields'), # Not a nested serializer
+            (f'/api/podcasts/{self.podcast.pk}/episodes/', {'expand': 'title'}, 'expand'),
+        ):
+            response = self.get(url, **params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertIn(key, response.data)
+
+    def test_narrowed_columns(self):
+        column = f'"{Podcast._meta.db_table}"."description"'
+        self.assertNotIn(column, str(narrow_queryset(Podcast.objects.all(), ['id', 'title']).query))
+        for params, loaded in (({'fields': 'id,title'}, False), ({}, True)):
+            with CaptureQueriesContext(connection) as captured:
+                self.assertEqual(self.get(f'/api/podcasts/{self.podcast.pk}/', **params).status_code, 200)
+            selects = [query['sql'] for query in captured if query['sql'].startswith('SELECT') and column in query['sql']]
+            self.assertEqual(bool(selects), loaded, params)
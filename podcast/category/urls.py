@@ -3,7 +3,7 @@
 from django.urls import path
 from .views import (
     CategoryListCreateView, CategoryDetailView,
-    PodcastListCreateView, PodcastDetailView
+    PodcastListCreateView, PodcastDetailView, PodcastFacetsView
 )
 
 urlpatterns = [
@@ -13,5 +13,6 @@ urlpatterns = [
 
     # Podcast URLs (Authenticated - User Ownership for edit/delete)
     path('podcasts/', PodcastListCreateView.as_view(), name='podcast-list-create'),
+    path('podcasts/facets/', PodcastFacetsView.as_view(), name='podcast-facets'), # Counts for the list filters
     path('podcasts/<int:pk>/', PodcastDetailView.as_view(), name='podcast-detail'), # Using ID (pk)
 ]
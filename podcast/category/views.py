@@ -1,9 +1,17 @@
 from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated, IsAdminUser # Permissions
 from rest_framework.parsers import MultiPartParser, FormParser # To handle file uploads
-
+from django.db.models import Max
+
+from podcast.conditional import ConditionalGetMixin # ETag / Last-Modified, 304 without a full fetch
+from podcast.pagination import KeysetPagination # Cursor pagination on (created_at, id)
+from podcast.projection import ProjectedListMixin, ProjectedRetrieveMixin # Reads fetch only the serialized columns
+from . import changes # Deletions and category renames, for Last-Modified
+from .catalog import category_catalog # Cached copy of the Category table
+from .filters import PodcastFilter, get_facets # Query-parameter filters and cached facet counts
 from .models import Category, Podcast # Import your new models
 from .serializers import CategorySerializer, PodcastSerializer # Import your new serializers
 
@@ -14,6 +22,10 @@ class CategoryListCreateView(generics.ListCreateAPIView):
     # Mandatory: Only admin users can list or create categories
     permission_classes = [IsAdminUser]
 
+    def list(self, request, *args, **kwargs):
+        # Already serialized in the category catalog, no query needed
+        return Response(category_catalog.all())
+
 class CategoryDetailView(generics.RetrieveUpdateDestroyAPIView):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
@@ -21,48 +33,99 @@ class CategoryDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsAdminUser]
     lookup_field = 'slug' # Use slug instead of ID in the URL
 
+    def retrieve(self, request, *args, **kwargs):
+        # Reads come from the catalog; updates and deletes still load the row through get_object()
+        item = category_catalog.get_by_slug(kwargs[self.lookup_field])
+        if item is None:
+            return super().retrieve(request, *args, **kwargs) # 404, or created since the last refresh
+        return Response(item)
+
 
 # --- Podcast Management (User Ownership) ---
-class PodcastListCreateView(generics.ListCreateAPIView):
+class PodcastListCreateView(ConditionalGetMixin, ProjectedListMixin, generics.ListCreateAPIView):
     # No queryset defined here, we'll filter it in get_queryset
     serializer_class = PodcastSerializer
     # Mandatory: Only authenticated users can list or create podcasts
     permission_classes = [IsAuthenticated]
     # Add parsers for file uploads (image)
     parser_classes = [MultiPartParser, FormParser]
+    # Newest first; served by the podcast_created_idx / podcast_user_created_idx indexes
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-created_at', '-id')
+    # ?ordering=<name> or -<name> (descending); each has a (-column, -id) index
+    ordering_fields = {
+        'created_at': 'created_at',
+        'subscribers': 'subscriber_count',
+        'episodes': 'published_episode_count',
+        'duration': 'total_duration',
+    }
+
+    def get_keyset_ordering(self):
+        ordering = self.request.query_params.get('ordering')
+        if not ordering:
+            return self.keyset_ordering
+        descending = ordering.startswith('-')
+        column = self.ordering_fields.get(ordering.lstrip('-'))
+        if column is None:
+            raise ValidationError({'ordering': [f"Must be one of {', '.join(self.ordering_fields)}, optionally prefixed with -."]})
+        prefix = '-' if descending else ''
+        return (prefix + column, prefix + 'id') # id breaks ties so the cursor is unique
+
+    def get_conditional_extra(self):
+        return (category_catalog.version(),) # Category names are rendered from the catalog
+
+    def get_conditional_changes(self):
+        # A podcast edited onto or off this page, or deleted, moves neither the page's rows nor their count
+        newest = Podcast.objects.aggregate(newest=Max('updated_at'))['newest'] # podcast_updated_idx
+        return (newest, changes.last_changed(changes.PODCASTS_DELETED, changes.CATEGORIES))
 
     def get_queryset(self):
         """
-        Optionally restricts the returned podcasts to a given user
-        by filtering against a `user_id` in the URL.
+        Optionally restricts the returned podcasts by category, featured status,
+        owner (`user_id`) or creation date, see category/filters.py.
         Or, for authenticated users, show only their podcasts.
         """
         queryset = Podcast.objects.all()
 
-        # Example: Filter by user ID if provided in query params (optional)
-        user_id = self.request.query_params.get('user_id', None)
-        if user_id is not None:
-            queryset = queryset.filter(user__id=user_id)
+        # Filter by ?category=, ?is_featured=, ?user_id= and ?created_after= / ?created_before=
+        queryset = PodcastFilter(self.request.query_params).filter_queryset(queryset)
         # else: # Default behavior: show all podcasts to authenticated users
         #    pass # Keep queryset as all podcasts
 
         # You could also restrict viewing *other* users' podcasts if needed
         # e.g., return queryset.filter(user=self.request.user) # Only show current user's podcasts
 
-        return queryset.select_related('user', 'category') # Eager load related objects
+        return queryset.select_related('user') # Eager load the creator; categories come from the catalog
 
     def perform_create(self, serializer):
         # Mandatory: Set the podcast's user to the currently authenticated user
         serializer.save(user=self.request.user)
 
 
-class PodcastDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Podcast.objects.all().select_related('user', 'category') # Eager load
+class PodcastFacetsView(APIView):
+    """
+    Counts per category and featured vs not for the same filters as PodcastListCreateView,
+    e.g. GET /api/podcasts/facets/?is_featured=true&created_after=2025-01-01
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response(get_facets(PodcastFilter(request.query_params)))
+
+
+class PodcastDetailView(ConditionalGetMixin, ProjectedRetrieveMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = Podcast.objects.all().select_related('user') # Eager load (category comes from the catalog)
     serializer_class = PodcastSerializer
     # Mandatory: Only authenticated users can retrieve, update, or delete podcasts
     permission_classes = [IsAuthenticated]
     lookup_field = 'pk' # Use ID for detail view
 
+    def get_conditional_extra(self):
+        return (category_catalog.version(),) # Category names are rendered from the catalog
+
+    def get_conditional_changes(self):
+        return (changes.last_changed(changes.CATEGORIES),) # A renamed category leaves the podcast as it was
+
     def get_object(self):
         """
         Ensures that a user can only update or delete their own podcasts,
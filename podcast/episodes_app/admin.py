@@ -1,4 +1,6 @@
 from django.contrib import admin
+from django.db import transaction
+from django.utils import timezone
 from .models import Episode
 
 @admin.register(Episode)
@@ -21,14 +23,25 @@ class EpisodeAdmin(admin.ModelAdmin):
     readonly_fields = ('created_at', 'updated_at')
 
     # Custom admin actions
+    # One save() per episode, not a bulk UPDATE: the podcast counters, updated_at (ETags), the
+    # search index and the cached episode lists and feed follow along (episodes_app/signals.py)
     def make_published(self, request, queryset):
         now = timezone.now()
-        updated_count = queryset.filter(published_at__isnull=True).update(published_at=now)
+        updated_count = 0
+        with transaction.atomic():
+            for episode in queryset.filter(published_at__isnull=True):
+                episode.published_at = now
+                episode.save()
+                updated_count += 1
         self.message_user(request, f"{updated_count} episodes marked as published.")
     make_published.short_description = "Mark selected episodes as published now"
 
     def make_draft(self, request, queryset):
-        updated_count = queryset.filter(published_at__isnull=False).update(published_at=None)
+        updated_count = 0
+        with transaction.atomic():
+            for episode in queryset.filter(published_at__isnull=False):
+                episode.published_at = None
+                episode.save()
+                updated_count += 1
         self.message_user(request, f"{updated_count} episodes marked as draft.")
     make_draft.short_description = "Mark selected episodes as draft"
-    
\ No newline at end of file
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class EpisodesAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'episodes_app'
+
+    def ready(self):
+        from . import signals # noqa: F401  Invalidates cached episode lists and feeds
@@ -0,0 +1,213 @@
+# In your Django app's audio.py
+# Episode audio delivery with HTTP Range support (RFC 9110 section 14), used by EpisodeAudioView.
+#   MODE 'direct'      Django sends the file. Whole files and single ranges go out as FileResponse
+#                      over a bounded file object, so a WSGI server with wsgi.file_wrapper
+#                      (gunicorn, uWSGI) uses os.sendfile(); multi-range responses are
+#                      multipart/byteranges read with os.pread().
+#   MODE 'x-accel'     nginx: Django checks access and answers with X-Accel-Redirect, nginx
+#                      serves the file (ranges, validators) from an `internal` location.
+#   MODE 'x-sendfile'  Apache mod_xsendfile / lighttpd: same with X-Sendfile and the full path.
+# Storages without local paths (S3, ...) get a redirect to storage.url(), they do ranges themselves.
+
+import mimetypes
+import os
+import secrets
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, HttpResponseRedirect, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+
+# Defaults, override with EPISODE_AUDIO in settings.py
+DEFAULT_EPISODE_AUDIO = {
+    'MODE': 'direct', # 'direct', 'x-accel' or 'x-sendfile'
+    'ACCEL_PREFIX': '/protected-media/', # nginx `internal` location aliased to MEDIA_ROOT (x-accel)
+    'MAX_RANGES': 16, # More (after merging overlaps) and the whole file is sent instead
+    'CHUNK_SIZE': 256 * 1024, # Bytes per read for multi-range responses
+    'MAX_AGE': 3600, # Cache-Control max-age; always private, access depends on the user
+}
+
+
+def get_audio_settings():
+    return {**DEFAULT_EPISODE_AUDIO, **getattr(settings, 'EPISODE_AUDIO', {})}
+
+
+class BoundedFile:
+    """
+    Unbuffered file positioned at `start` that reads at most `length` bytes. It has fileno()
+    but no tell()/seek(), so FileResponse leaves Content-Length to us and a sendfile()-capable
+    wsgi.file_wrapper sends exactly Content-Length bytes from the current offset.
+    """
+
+    def __init__(self, path, start, length):
+        self._file = open(path, 'rb', buffering=0)
+        self._file.seek(start)
+        self._remaining = length
+
+    def fileno(self):
+        return self._file.fileno()
+
+    def read(self, size=-1):
+        if self._remaining <= 0:
+            return b''
+        size = self._remaining if size is None or size < 0 else min(size, self._remaining)
+        data = self._file.read(size)
+        self._remaining -= len(data)
+        return data
+
+    def close(self):
+        self._file.close()
+
+
+def parse_ranges(header, size):
+    """
+    'bytes=0-99,200-,-50' -> sorted, merged [(start, end_inclusive), ...].
+    None: no usable Range header (serve the whole file); []: nothing satisfiable (416).
+    """
+    if not header:
+        return None
+    unit, _, spec = header.partition('=')
+    if unit.strip().lower() != 'bytes' or not spec:
+        return None
+    ranges = []
+    for part in spec.split(','):
+        first, dash, last = part.strip().partition('-')
+        if not dash:
+            return None
+        try:
+            if first:
+                start = int(first)
+                end = int(last) if last else size - 1
+                if last and start > end:
+                    return None # Invalid, the header is ignored
+            elif last:
+                start, end = max(size - int(last), 0), size - 1 # Suffix: the last N bytes
+                if int(last) == 0:
+                    continue
+            else:
+                return None
+        except ValueError:
+            return None
+        if start < size:
+            ranges.append((start, min(end, size - 1)))
+
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def range_applies(request, etag, last_modified):
+    """If-Range: only honour Range if the client's copy is still current (strong comparison)."""
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def multipart_body(path, ranges, size, content_type, boundary, chunk_size):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        for start, end in ranges:
+            yield (
+                f'\r\n--{boundary}\r\nContent-Type: {content_type}\r\n'
+                f'Content-Range: bytes {start}-{end}/{size}\r\n\r\n'
+            ).encode()
+            position = start
+            while position <= end:
+                data = os.pread(fd, min(chunk_size, end - position + 1), position)
+                if not data:
+                    return
+                position += len(data)
+                yield data
+        yield f'\r\n--{boundary}--\r\n'.encode()
+    finally:
+        os.close(fd)
+
+
+def multipart_length(ranges, size, content_type, boundary):
+    headers = sum(
+        len(f'\r\n--{boundary}\r\nContent-Type: {content_type}\r\nContent-Range: bytes {start}-{end}/{size}\r\n\r\n')
+        for start, end in ranges
+    )
+    return headers + sum(end - start + 1 for start, end in ranges) + len(f'\r\n--{boundary}--\r\n')
+
+
+def serve_audio(request, storage, name):
+    """Response for GET/HEAD of the stored file `name`, once access has been checked."""
+    config = get_audio_settings()
+    try:
+        path = storage.path(name)
+    except NotImplementedError:
+        return HttpResponseRedirect(storage.url(name)) # Remote storage serves ranges itself
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+
+    if config['MODE'] == 'x-accel':
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = config['ACCEL_PREFIX'] + quote(name)
+        patch_cache_control(response, private=True, max_age=config['MAX_AGE'])
+        return response
+    if config['MODE'] == 'x-sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = path
+        patch_cache_control(response, private=True, max_age=config['MAX_AGE'])
+        return response
+
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    size = stat.st_size
+    # Strong validators: a replaced file gets a new name, inode or mtime
+    etag = f'"{stat.st_ino:x}-{size:x}-{stat.st_mtime_ns:x}"'
+    last_modified = int(stat.st_mtime)
+
+    def finish(response):
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        response['Accept-Ranges'] = 'bytes'
+        patch_cache_control(response, private=True, max_age=config['MAX_AGE'])
+        return response
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return finish(not_modified) # 304, or 412 for a failed If-Match
+
+    ranges = parse_ranges(request.META.get('HTTP_RANGE'), size) if range_applies(request, etag, last_modified) else None
+    if ranges is not None and not ranges:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return finish(response)
+    if ranges is not None and len(ranges) > config['MAX_RANGES']:
+        ranges = None # Lots of small ranges cost more than the file, send it whole
+
+    head = request.method == 'HEAD'
+    if ranges is None or len(ranges) == 1:
+        start, end = ranges[0] if ranges else (0, size - 1)
+        length = max(end - start + 1, 0)
+        if head:
+            response = HttpResponse(content_type=content_type, status=206 if ranges else 200)
+        else:
+            response = FileResponse(BoundedFile(path, start, length), content_type=content_type, status=206 if ranges else 200)
+        response['Content-Length'] = length
+        if ranges:
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        return finish(response)
+
+    boundary = secrets.token_hex(16)
+    multipart_type = f'multipart/byteranges; boundary={boundary}'
+    if head:
+        response = HttpResponse(content_type=multipart_type, status=206)
+    else:
+        response = StreamingHttpResponse(
+            multipart_body(path, ranges, size, content_type, boundary, config['CHUNK_SIZE']),
+            content_type=multipart_type, status=206,
+        )
+    response['Content-Length'] = multipart_length(ranges, size, content_type, boundary)
+    return finish(response)
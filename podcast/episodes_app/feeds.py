@@ -0,0 +1,213 @@
+"""
+Podcast RSS feeds (RSS 2.0 with iTunes tags) at /api/podcasts/<pk>/feed.xml.
+
+Podcast apps poll feeds constantly, so a feed is rendered once and kept in
+PODCAST_FEEDS['CACHE'] already gzipped, with its ETag and Last-Modified; a hit
+costs one cache read and no query. Only published episodes with audio are
+listed, with the same rule as EpisodeListCreateView (published_at <= now).
+
+Invalidation:
+- saves and deletes of an Episode or Podcast bump the podcast's feed version
+  after commit (episodes_app/visibility.py invalidate_podcast_episodes(), from
+  episodes_app/signals.py and the UPDATE-only paths: the background metadata
+  probe and dedupe_media);
+- a built feed expires by itself when the next scheduled episode's
+  published_at passes.
+Username and category renames show up within TTL.
+
+Rebuilds are incremental: every <item> is cached as an XML fragment next to
+the updated_at it was rendered from. A rebuild reads (id, updated_at) of the
+visible episodes and renders only the new or changed ones; the rest is joined
+from the fragments and compressed once.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import time
+from io import StringIO
+from urllib.parse import urljoin
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Min
+from django.http import HttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.encoding import filepath_to_uri
+from django.utils.feedgenerator import Enclosure, Rss201rev2Feed
+from django.utils.http import http_date
+from django.utils.xmlutils import SimplerXMLGenerator
+
+from category.models import Podcast
+
+from .models import Episode
+
+# Defaults, override with PODCAST_FEEDS in settings.py
+DEFAULT_PODCAST_FEEDS = {
+    'CACHE': 'default',
+    'TTL': 86400, # Seconds a built feed is kept; changes invalidate it earlier
+    'MAX_AGE': 300, # Cache-Control max-age sent to podcast apps
+    'COMPRESSLEVEL': 6,
+}
+
+FEED_FORMAT = 1 # Bump when the XML changes, so cached fragments are rendered again
+ITUNES_NAMESPACE = 'http://www.itunes.com/dtds/podcast-1.0.dtd'
+ITEM_COLUMNS = ('id', 'title', 'show_notes', 'published_at', 'audio_url', 'duration', 'updated_at')
+
+
+def get_feed_settings():
+    return {**DEFAULT_PODCAST_FEEDS, **getattr(settings, 'PODCAST_FEEDS', {})}
+
+
+class PodcastFeed(Rss201rev2Feed):
+    """Rss201rev2Feed plus the iTunes tags podcast apps read."""
+
+    def rss_attributes(self):
+        return {**super().rss_attributes(), 'xmlns:itunes': ITUNES_NAMESPACE}
+
+    def add_root_elements(self, handler):
+        super().add_root_elements(handler)
+        handler.addQuickElement('itunes:author', self.feed['author_name'])
+        handler.addQuickElement('itunes:summary', self.feed['description'])
+        if self.feed['image']:
+            handler.addQuickElement('itunes:image', None, {'href': self.feed['image']})
+        if self.feed['itunes_category']:
+            handler.addQuickElement('itunes:category', None, {'text': self.feed['itunes_category']})
+        handler.addQuickElement('itunes:explicit', 'false')
+
+    def add_item_elements(self, handler, item):
+        super().add_item_elements(handler, item)
+        if item['duration']:
+            handler.addQuickElement('itunes:duration', str(item['duration']))
+
+    def latest_post_date(self):
+        return self.feed['last_modified'] # Not "now": the same episodes give the same bytes
+
+
+def _feed_cache():
+    return caches[get_feed_settings()['CACHE']]
+
+
+def _version_key(podcast_id):
+    return f'podcastfeed:{podcast_id}:version'
+
+
+def _feed_version(cache, podcast_id):
+    version = cache.get(_version_key(podcast_id))
+    if version is None:
+        # Never restart at a number an older feed may still be cached under
+        cache.add(_version_key(podcast_id), time.time_ns(), None)
+        version = cache.get(_version_key(podcast_id))
+    return version
+
+
+def bump_feed_version(podcast_id):
+    """Makes the next request rebuild the podcast's feed."""
+    cache = _feed_cache()
+    try:
+        cache.incr(_version_key(podcast_id))
+    except ValueError: # Key missing or evicted
+        cache.set(_version_key(podcast_id), time.time_ns(), None)
+
+
+def render_item(feed, row, podcast_id, media_url):
+    """One <item> as UTF-8 bytes; media_url is the absolute MEDIA_URL."""
+    storage = Episode._meta.get_field('audio_url').storage
+    name = row['audio_url']
+    try:
+        length = storage.size(name)
+    except OSError:
+        length = 0 # Missing file; apps still list the episode
+    feed.add_item(
+        # Episodes have no page of their own (the API needs a login), so items link to the podcast
+        title=row['title'], link=feed.feed['link'], description=row['show_notes'], pubdate=row['published_at'],
+        unique_id=f'podcast-{podcast_id}-episode-{row["id"]}', unique_id_is_permalink=False,
+        enclosures=[Enclosure(media_url + filepath_to_uri(name), str(length), mimetypes.guess_type(name)[0] or 'audio/mpeg')],
+        duration=row['duration'],
+    )
+    out = StringIO()
+    handler = SimplerXMLGenerator(out, 'utf-8', short_empty_elements=True)
+    feed.write_items(handler)
+    feed.items.clear()
+    return out.getvalue().encode()
+
+
+def build_feed(podcast_id, base_url, cache, config):
+    """Renders the feed, reusing cached item fragments; None if the podcast doesn't exist."""
+    podcast = Podcast.objects.select_related('user', 'category').filter(pk=podcast_id).first()
+    if podcast is None:
+        return None
+    now = timezone.now()
+    episodes = Episode.objects.filter(podcast_id=podcast_id)
+    # Same visibility as EpisodeListCreateView for non-owners, in its order (episode_podcast_published_idx)
+    rows = list(
+        episodes.filter(published_at__isnull=False, published_at__lte=now).exclude(audio_url='')
+        .order_by('-published_at', '-created_at', '-id').values_list('id', 'updated_at', 'published_at')
+    )
+    pending = episodes.filter(published_at__gt=now).aggregate(next=Min('published_at'))['next']
+    last_modified = max([podcast.updated_at, *[updated for _, updated, _ in rows], *[published for _, _, published in rows]])
+
+    feed = PodcastFeed(
+        title=podcast.title, link=urljoin(base_url, reverse('podcast-detail', args=[podcast_id])),
+        description=podcast.description, language=settings.LANGUAGE_CODE, author_name=podcast.user.username,
+        feed_url=urljoin(base_url, reverse('podcast-feed', args=[podcast_id])),
+        image=urljoin(base_url, podcast.image.url) if podcast.image else None,
+        itunes_category=podcast.category.name if podcast.category_id else None, last_modified=last_modified,
+    )
+
+    items_key = f'podcastfeed:{FEED_FORMAT}:{podcast_id}:{hashlib.sha1(base_url.encode()).hexdigest()[:16]}:items'
+    cached = cache.get(items_key) or {}
+    fragments = {pk: cached[pk] for pk, updated, _ in rows if pk in cached and cached[pk][0] == updated}
+    stale = [pk for pk, _, _ in rows if pk not in fragments]
+    media_url = urljoin(base_url, Episode._meta.get_field('audio_url').storage.base_url) # storage.url() without a join per item
+    for start in range(0, len(stale), 500):
+        for row in episodes.filter(pk__in=stale[start:start + 500]).values(*ITEM_COLUMNS):
+            fragments[row['id']] = (row['updated_at'], render_item(feed, row, podcast_id, media_url))
+    if stale or len(fragments) != len(cached):
+        cache.set(items_key, fragments, config['TTL'])
+
+    # The channel without items ends in </channel></rss>; the items go in between
+    head, tail = feed.writeString('utf-8').rsplit('</channel>', 1)
+    body = b''.join([head.encode(), *[fragments[pk][1] for pk, _, _ in rows], f'</channel>{tail}'.encode()])
+    compressed = gzip.compress(body, compresslevel=config['COMPRESSLEVEL'], mtime=0)
+    return {
+        'etag': f'W/"{hashlib.sha1(compressed).hexdigest()}"', # Hashing the smaller copy; mtime=0 keeps it stable
+        'last_modified': int(last_modified.timestamp()),
+        'expires': pending.timestamp() if pending else None, # The next scheduled episode goes live
+        'gzip': compressed,
+        'rendered': len(stale),
+    }
+
+
+def get_feed(podcast_id, base_url):
+    """The cached feed of the podcast, rebuilt if it changed; None if there is no such podcast."""
+    config = get_feed_settings()
+    cache = _feed_cache()
+    # Read before building: a change committed meanwhile bumps it, so this build isn't served as current
+    version = _feed_version(cache, podcast_id)
+    key = f'podcastfeed:{FEED_FORMAT}:{podcast_id}:{version}:{hashlib.sha1(base_url.encode()).hexdigest()[:16]}'
+    feed = cache.get(key)
+    if feed is not None and (feed['expires'] is None or feed['expires'] > time.time()):
+        return feed
+    feed = build_feed(podcast_id, base_url, cache, config)
+    if feed is not None:
+        cache.set(key, feed, config['TTL'])
+    return feed
+
+
+def feed_response(request, feed):
+    """200 with the gzipped (or, for the rare client without gzip, plain) feed, or 304."""
+    response = get_conditional_response(request, etag=feed['etag'], last_modified=feed['last_modified'])
+    if response is None:
+        if 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', ''):
+            response = HttpResponse(feed['gzip'], content_type=PodcastFeed.content_type)
+            response['Content-Encoding'] = 'gzip'
+        else:
+            response = HttpResponse(gzip.decompress(feed['gzip']), content_type=PodcastFeed.content_type)
+    response['ETag'] = feed['etag']
+    response['Last-Modified'] = http_date(feed['last_modified'])
+    response['Cache-Control'] = f"public, max-age={get_feed_settings()['MAX_AGE']}"
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
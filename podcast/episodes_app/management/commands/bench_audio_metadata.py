@@ -0,0 +1,160 @@
+import os
+import random
+import struct
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from episodes_app.metadata import probe
+
+# Synthetic files: real headers, sparse (zero) audio data, so an hour-long episode costs no disk
+MP3_HEADER = 0xFFE00000 | 3 << 19 | 1 << 17 | 1 << 16 # MPEG-1 Layer III, no CRC
+MP3_BITRATE_INDEX = {128000: 9, 192000: 11, 64000: 5}
+
+
+def mp3_header(bitrate=128000, mono=False):
+    return struct.pack('>I', MP3_HEADER | MP3_BITRATE_INDEX[bitrate] << 12 | (3 if mono else 0) << 6) # 44.1 kHz
+
+
+def write_sparse(path, parts, size):
+    """Writes (offset, bytes) parts into a file of `size` bytes; the gaps stay holes."""
+    with open(path, 'wb') as handle:
+        handle.truncate(size)
+        for offset, data in parts:
+            handle.seek(offset)
+            handle.write(data)
+
+
+def build_mp3(path, seconds, kind='cbr', bitrate=128000, mono=False):
+    """kind 'cbr' (timed from the size), 'xing' or 'vbri' (VBR headers). Returns the expected duration."""
+    tag = b'ID3\x04\x00\x00' + bytes([0, 0, 7, 104]) + b'\x00' * 1000 # ID3v2.4, 1000 bytes of frames
+    frame = 144 * bitrate // 44100
+    frames = int(seconds * 44100 / 1152)
+    header = mp3_header(bitrate, mono)
+    first = len(tag)
+    parts = [(0, tag), (first, header), (first + frame, header)]
+    if kind == 'xing':
+        side_info = 17 if mono else 32
+        parts.append((first + 4 + side_info, b'Xing' + struct.pack('>III', 3, frames, frames * frame)))
+    elif kind == 'vbri':
+        parts.append((first + 36, b'VBRI' + struct.pack('>HHHII', 1, 0, 75, frames * frame, frames)))
+    write_sparse(path, parts, first + (frames + 1) * frame)
+    return frames * 1152 / 44100 if kind != 'cbr' else (frames + 1) * frame * 8 / bitrate
+
+
+def build_wav(path, seconds, sample_rate=44100, channels=2):
+    byte_rate = sample_rate * channels * 2
+    data_size = int(seconds * byte_rate)
+    fmt = struct.pack('<4sIHHIIHH', b'fmt ', 16, 1, channels, sample_rate, byte_rate, channels * 2, 16)
+    extra = struct.pack('<4sI', b'LIST', 4) + b'INFO' # A chunk to skip before 'data'
+    data = struct.pack('<4sI', b'data', data_size)
+    head = struct.pack('<4sI4s', b'RIFF', 4 + len(fmt) + len(extra) + len(data) + data_size, b'WAVE') + fmt + extra + data
+    write_sparse(path, [(0, head)], len(head) + data_size)
+    return data_size / byte_rate
+
+
+def box(kind, payload):
+    return struct.pack('>I4s', 8 + len(payload), kind) + payload
+
+
+def build_mp4(path, seconds, sample_rate=44100, channels=2, bitrate=128000, moov_last=True):
+    """M4A with an AAC sound track; moov_last is what most encoders write without faststart."""
+    mvhd = box(b'mvhd', struct.pack('>IIIII', 0, 0, 0, 1000, int(seconds * 1000)) + b'\x00' * 80)
+    hdlr = box(b'hdlr', struct.pack('>II4s', 0, 0, b'soun') + b'\x00' * 12 + b'SoundHandler\x00')
+    entry = box(b'mp4a', b'\x00' * 6 + struct.pack('>H', 1) + b'\x00' * 8 + struct.pack('>HHHHI', channels, 16, 0, 0, sample_rate << 16))
+    stsd = box(b'stsd', struct.pack('>II', 0, 1) + entry)
+    trak = box(b'trak', box(b'mdia', hdlr + box(b'minf', box(b'stbl', stsd))))
+    moov = box(b'moov', mvhd + trak)
+    ftyp = box(b'ftyp', b'M4A \x00\x00\x02\x00isomiso2')
+    media = int(seconds * bitrate / 8)
+    mdat = struct.pack('>I4s', 8 + media, b'mdat')
+    if moov_last:
+        write_sparse(path, [(0, ftyp + mdat), (len(ftyp) + 8 + media, moov)], len(ftyp) + 8 + media + len(moov))
+    else:
+        write_sparse(path, [(0, ftyp + moov + mdat)], len(ftyp) + len(moov) + 8 + media)
+    return seconds
+
+
+BUILDERS = {
+    'mp3-cbr': ('.mp3', lambda path, seconds: build_mp3(path, seconds, 'cbr')),
+    'mp3-xing': ('.mp3', lambda path, seconds: build_mp3(path, seconds, 'xing')),
+    'mp3-vbri': ('.mp3', lambda path, seconds: build_mp3(path, seconds, 'vbri')),
+    'wav': ('.wav', build_wav),
+    'm4a': ('.m4a', build_mp4),
+}
+
+
+class CountingFile:
+    """Counts the bytes probe() actually reads."""
+
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        data = self._file.read(size)
+        self.bytes_read += len(data)
+        return data
+
+    def seek(self, *args):
+        return self._file.seek(*args)
+
+    def tell(self):
+        return self._file.tell()
+
+    def close(self):
+        self._file.close()
+
+
+class Command(BaseCommand):
+    help = (
+        "Probes synthetic MP3 (CBR, Xing, VBRI), WAV and M4A files of realistic length and reports files/s "
+        "and bytes read per file, single-threaded and with a thread pool."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--files', type=int, default=500)
+        parser.add_argument('--minutes', type=int, default=60, help="Length of each episode.")
+        parser.add_argument('--workers', type=int, default=4)
+
+    def probe_file(self, item):
+        path, expected = item
+        handle = CountingFile(path)
+        try:
+            info = probe(handle)
+        finally:
+            handle.close()
+        ok = info is not None and abs(info['duration'] - expected) < 1
+        return ok, handle.bytes_read, os.path.getsize(path)
+
+    def run(self, label, items, workers):
+        started = time.perf_counter()
+        if workers == 1:
+            results = [self.probe_file(item) for item in items]
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(self.probe_file, items))
+        elapsed = time.perf_counter() - started
+        wrong = sum(1 for ok, _, _ in results if not ok)
+        read = sum(bytes_read for _, bytes_read, _ in results) / len(results)
+        size = sum(file_size for _, _, file_size in results) / len(results)
+        self.stdout.write(
+            f"{label:<12} {len(results) / elapsed:9,.0f} files/s  read {read / 1024:6.1f} KiB of "
+            f"{size / 1024 / 1024:6.1f} MiB per file  wrong {wrong}"
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(1)
+        with tempfile.TemporaryDirectory() as directory:
+            items = []
+            for index in range(options['files']):
+                kind = list(BUILDERS)[index % len(BUILDERS)]
+                extension, build = BUILDERS[kind]
+                path = os.path.join(directory, f'{index}{extension}')
+                items.append((path, build(path, options['minutes'] * 60 * rng.uniform(0.5, 1.5))))
+            for kind in BUILDERS:
+                self.run(kind, [item for index, item in enumerate(items) if index % len(BUILDERS) == list(BUILDERS).index(kind)], 1)
+            self.run('all, 1', items, 1)
+            self.run(f"all, {options['workers']}", items, options['workers'])
@@ -0,0 +1,180 @@
+import http.client
+import os
+import random
+import socketserver
+import statistics
+import threading
+import time
+from urllib.parse import urlsplit
+from wsgiref.simple_server import ServerHandler, WSGIRequestHandler, WSGIServer
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from rest_framework.authtoken.models import Token
+
+from Users.models import CustomUser
+from category.models import Podcast
+from episodes_app.models import Episode
+from podcast.file_cleanup import file_cleanup_queue
+
+
+class SendfileServerHandler(ServerHandler):
+    """wsgiref handler that sends wsgi.file_wrapper responses with os.sendfile(), like gunicorn does."""
+
+    def sendfile(self):
+        try:
+            fd = self.result.filelike.fileno()
+            length = int(self.headers['Content-Length'])
+        except (AttributeError, KeyError, TypeError, ValueError, OSError):
+            return False
+        if not self.headers_sent:
+            self.send_headers()
+        self.stdout.flush()
+        out = self.stdout.fileno()
+        offset = os.lseek(fd, 0, os.SEEK_CUR)
+        while length > 0:
+            sent = os.sendfile(out, fd, offset, length)
+            if not sent:
+                break
+            offset += sent
+            length -= sent
+        return True
+
+
+class RequestHandler(WSGIRequestHandler):
+    handler_class = ServerHandler
+
+    def log_message(self, *args):
+        pass
+
+    def handle(self):
+        # WSGIRequestHandler.handle() with a configurable ServerHandler
+        self.raw_requestline = self.rfile.readline(65537)
+        if not self.parse_request():
+            return
+        handler = self.handler_class(self.rfile, self.wfile, self.get_stderr(), self.get_environ(), multithread=True)
+        handler.request_handler = self
+        handler.run(self.server.get_app())
+
+
+class ThreadingServer(socketserver.ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test of /api/episodes/<pk>/audio/: concurrent clients seeking to random offsets with Range requests. "
+        "Without --url it starts an in-process threaded WSGI server and compares sendfile() with copying through Python."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help="Base URL of a running deployment (e.g. http://127.0.0.1:8000); needs --token and --episode.")
+        parser.add_argument('--token', help="API token for --url.")
+        parser.add_argument('--episode', type=int, help="Episode id for --url.")
+        parser.add_argument('--clients', type=int, default=8, help="Concurrent clients.")
+        parser.add_argument('--requests', type=int, default=200, help="Range requests per client.")
+        parser.add_argument('--chunk-kb', type=int, default=256, help="Bytes per Range request, like a player's read-ahead.")
+        parser.add_argument('--size-mb', type=int, default=64, help="Size of the generated audio file.")
+
+    def run_clients(self, base_url, token, episode_id, size, options):
+        target = urlsplit(base_url)
+        path = f'/api/episodes/{episode_id}/audio/'
+        chunk = options['chunk_kb'] * 1024
+        latencies, received, errors = [], [], []
+        lock = threading.Lock()
+
+        def client(seed):
+            rng = random.Random(seed)
+            mine, total = [], 0
+            for _ in range(options['requests']):
+                start = rng.randrange(0, max(size - chunk, 1)) # Seek anywhere
+                connection = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=30)
+                started = time.perf_counter()
+                try:
+                    connection.request('GET', path, headers={
+                        'Authorization': f'Token {token}', 'Range': f'bytes={start}-{start + chunk - 1}', 'Accept': 'audio/*',
+                    })
+                    response = connection.getresponse()
+                    body = response.read()
+                    if response.status != 206 or len(body) != min(chunk, size - start):
+                        errors.append(response.status)
+                finally:
+                    connection.close()
+                mine.append(time.perf_counter() - started)
+                total += len(body)
+            with lock:
+                latencies.extend(mine)
+                received.append(total)
+
+        threads = [threading.Thread(target=client, args=(seed,)) for seed in range(options['clients'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        latencies.sort()
+        return {
+            'requests': len(latencies) / elapsed,
+            'mb': sum(received) / elapsed / 1024 / 1024,
+            'p50': statistics.median(latencies) * 1000,
+            'p95': latencies[int(len(latencies) * 0.95) - 1] * 1000,
+            'errors': len(errors),
+        }
+
+    def report(self, label, result):
+        self.stdout.write(
+            f"{label:<10} {result['requests']:8.1f} req/s  {result['mb']:8.1f} MiB/s  "
+            f"p50 {result['p50']:6.1f} ms  p95 {result['p95']:6.1f} ms  errors {result['errors']}"
+        )
+
+    def handle(self, *args, **options):
+        if options['url']:
+            if not (options['token'] and options['episode']):
+                self.stderr.write("--url needs --token and --episode")
+                return
+            size = int(self.head_size(options))
+            self.report('remote', self.run_clients(options['url'], options['token'], options['episode'], size, options))
+            return
+
+        # Rows have to be committed for the server threads to see them; removed at the end
+        size = options['size_mb'] * 1024 * 1024
+        user = CustomUser.objects.create_user(username='bench-audio', email='bench-audio@example.com', password='x')
+        episode = None
+        try:
+            token, _ = Token.objects.get_or_create(user=user)
+            podcast = Podcast.objects.create(user=user, title='Bench audio', description='')
+            episode = Episode(podcast=podcast, user=user, title='Bench audio', published_at=None)
+            storage = Episode._meta.get_field('audio_url').storage
+            name = f'episodes/bench/audio_{user.pk}.mp3'
+            path = storage.path(name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as handle:
+                for _ in range(options['size_mb']):
+                    handle.write(os.urandom(1024 * 1024))
+            episode.audio_url.name = name
+            episode.save()
+
+            for label, handler_class in (('sendfile', SendfileServerHandler), ('copy', ServerHandler)):
+                handler = type('Handler', (RequestHandler,), {'handler_class': handler_class})
+                server = ThreadingServer(('127.0.0.1', 0), handler)
+                server.set_app(WSGIHandler())
+                thread = threading.Thread(target=server.serve_forever, daemon=True)
+                thread.start()
+                try:
+                    base_url = f'http://127.0.0.1:{server.server_address[1]}'
+                    self.report(label, self.run_clients(base_url, token.key, episode.pk, size, options))
+                finally:
+                    server.shutdown()
+                    server.server_close()
+        finally:
+            if episode is not None and episode.pk:
+                episode.delete() # Queues the audio file for deletion
+            user.delete()
+            file_cleanup_queue.join()
+
+    def head_size(self, options):
+        target = urlsplit(options['url'])
+        connection = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=30)
+        connection.request('HEAD', f"/api/episodes/{options['episode']}/audio/", headers={'Authorization': f"Token {options['token']}"})
+        return connection.getresponse().getheader('Content-Length')
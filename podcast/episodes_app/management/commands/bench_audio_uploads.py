@@ -0,0 +1,168 @@
+import hashlib
+import http.client
+import json
+import os
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from rest_framework.authtoken.models import Token
+
+from Users.models import CustomUser
+from category.models import Podcast
+from episodes_app.models import Episode
+from podcast.file_cleanup import file_cleanup_queue
+from .bench_audio_streaming import RequestHandler, ThreadingServer
+
+
+def file_slice(path, start, length, block=64 * 1024):
+    with open(path, 'rb') as handle:
+        handle.seek(start)
+        while length > 0:
+            data = handle.read(min(block, length))
+            if not data:
+                return
+            length -= len(data)
+            yield data
+
+
+class Command(BaseCommand):
+    help = (
+        "Uploads one large audio file through an in-process WSGI server, once as a multipart POST to "
+        "/api/podcasts/<pk>/episodes/ and once as a resumable chunked upload with a dropped connection "
+        "halfway, and reports time and peak Python memory (tracemalloc) for each."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size-mb', type=int, default=256, help="Size of the uploaded file.")
+        parser.add_argument('--chunk-mb', type=int, default=16, help="Bytes per PUT of the chunked upload.")
+
+    def request(self, method, path, body=None, headers=None):
+        connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=120)
+        try:
+            connection.request(method, path, body=body, headers={'Authorization': f'Token {self.token}', **(headers or {})})
+            response = connection.getresponse()
+            return response.status, response.read()
+        finally:
+            connection.close()
+
+    def json_request(self, method, path, payload=None):
+        status, body = self.request(method, path, json.dumps(payload or {}), {'Content-Type': 'application/json'})
+        return status, json.loads(body) if body else None
+
+    def put_chunk(self, url, path, start, length, size):
+        return self.request('PUT', url, file_slice(path, start, length), {
+            'Content-Type': 'application/octet-stream', 'Content-Length': str(length),
+            'Content-Range': f'bytes {start}-{start + length - 1}/{size}',
+        })
+
+    def drop_chunk(self, url, path, start, length, size):
+        """Announces a full chunk but sends half of it, then closes the connection."""
+        connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=120)
+        connection.putrequest('PUT', url)
+        for header, value in (
+            ('Authorization', f'Token {self.token}'), ('Content-Type', 'application/octet-stream'),
+            ('Content-Length', str(length)), ('Content-Range', f'bytes {start}-{start + length - 1}/{size}'),
+        ):
+            connection.putheader(header, value)
+        connection.endheaders()
+        for data in file_slice(path, start, length // 2):
+            connection.send(data)
+        connection.close()
+
+    def multipart(self, podcast, path, size):
+        boundary = 'bench-boundary'
+        head = (
+            f'--{boundary}\r\nContent-Disposition: form-data; name="title"\r\n\r\nMultipart\r\n'
+            f'--{boundary}\r\nContent-Disposition: form-data; name="podcast_id"\r\n\r\n{podcast.pk}\r\n'
+            f'--{boundary}\r\nContent-Disposition: form-data; name="audio_url"; filename="multipart.mp3"\r\n'
+            f'Content-Type: audio/mpeg\r\n\r\n'
+        ).encode()
+        tail = f'\r\n--{boundary}--\r\n'.encode()
+
+        def body():
+            yield head
+            yield from file_slice(path, 0, size)
+            yield tail
+
+        status, content = self.request('POST', f'/api/podcasts/{podcast.pk}/episodes/', body(), {
+            'Content-Type': f'multipart/form-data; boundary={boundary}', 'Content-Length': str(len(head) + size + len(tail)),
+        })
+        assert status == 201, content[:300]
+
+    def chunked(self, podcast, path, size, checksum, chunk):
+        status, session = self.json_request('POST', f'/api/podcasts/{podcast.pk}/uploads/', {
+            'filename': 'chunked.mp3', 'size': size, 'checksum': checksum,
+        })
+        assert status == 201, session
+        url = f"/api/uploads/{session['id']}/"
+        received, dropped = 0, False
+        while received < size:
+            length = min(chunk, size - received)
+            if not dropped and received >= size // 2:
+                # Connection lost mid-chunk: ask the server where to resume
+                dropped = True
+                self.drop_chunk(url, path, received, length, size)
+                for _ in range(100):
+                    status, state = self.json_request('GET', url)
+                    if state['received'] > received:
+                        break
+                    time.sleep(0.05)
+                self.stdout.write(f"  dropped at {received + length // 2:,} bytes, resuming from {state['received']:,}")
+                received = state['received']
+                continue
+            status, content = self.put_chunk(url, path, received, length, size)
+            if status == 409: # Still held by the dropped request
+                time.sleep(0.05)
+                received = self.json_request('GET', url)[1]['received']
+                continue
+            assert status == 200, content[:300]
+            received = json.loads(content)['received']
+        status, episode = self.json_request('POST', url + 'finalize/', {'title': 'Chunked'})
+        assert status == 201, episode
+
+    def measure(self, label, function, size):
+        tracemalloc.reset_peak()
+        started = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1]
+        self.stdout.write(f"{label:<10} {elapsed:6.2f} s  {size / elapsed / 1024 / 1024:7.1f} MiB/s  peak traced {peak / 1024 / 1024:6.2f} MiB")
+
+    def handle(self, *args, **options):
+        size = options['size_mb'] * 1024 * 1024
+        digest = hashlib.sha256()
+        with tempfile.NamedTemporaryFile(suffix='.mp3') as source:
+            for _ in range(options['size_mb']):
+                data = os.urandom(1024 * 1024)
+                digest.update(data)
+                source.write(data)
+            source.flush()
+
+            # Rows have to be committed for the server threads to see them; removed at the end
+            user = CustomUser.objects.create_user(username='bench-uploads', email='bench-uploads@example.com', password='x')
+            try:
+                self.token = Token.objects.get_or_create(user=user)[0].key
+                podcast = Podcast.objects.create(user=user, title='Bench uploads', description='')
+                server = ThreadingServer(('127.0.0.1', 0), RequestHandler)
+                server.set_app(WSGIHandler())
+                threading.Thread(target=server.serve_forever, daemon=True).start()
+                self.port = server.server_address[1]
+                tracemalloc.start()
+                try:
+                    self.measure('multipart', lambda: self.multipart(podcast, source.name, size), size)
+                    self.measure('chunked', lambda: self.chunked(
+                        podcast, source.name, size, digest.hexdigest(), options['chunk_mb'] * 1024 * 1024,
+                    ), size)
+                finally:
+                    tracemalloc.stop()
+                    server.shutdown()
+                    server.server_close()
+            finally:
+                for episode in Episode.objects.filter(podcast__user=user):
+                    episode.delete() # Queues the audio files for deletion
+                user.delete()
+                file_cleanup_queue.join()
@@ -0,0 +1,82 @@
+import tempfile
+import time
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand
+from django.db import connection, reset_queries, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from Users.models import CustomUser
+from category.models import Podcast
+from episodes_app.models import Episode
+from episodes_app.views import EpisodeListCreateView
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds a large episode table in a rolled-back transaction, then creates episodes through "
+        "POST /api/podcasts/<pk>/episodes/ and reports requests/s and queries per request, for the owner "
+        "and for a user posting to a podcast they don't own."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--episodes', type=int, default=10_000_000, help="Rows seeded into the episode table.")
+        parser.add_argument('--podcasts', type=int, default=10_000, help="Podcasts the seeded episodes are spread over.")
+        parser.add_argument('--requests', type=int, default=2000, help="Requests per run.")
+
+    def seed(self, user, options):
+        podcasts = Podcast.objects.bulk_create([
+            Podcast(user=user, title=f'Bench show {i}', description='d') for i in range(options['podcasts'])
+        ], batch_size=1000)
+        first = podcasts[0].pk
+        assert [podcast.pk for podcast in podcasts] == list(range(first, first + len(podcasts)))
+        now = connection.ops.adapt_datetimefield_value(timezone.now())
+        started = time.perf_counter()
+        # One INSERT ... SELECT over a generated sequence; bulk_create would take most of an hour here
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {Episode._meta.db_table} '
+                '(podcast_id, user_id, title, audio_url, duration, audio_probed, show_notes, published_at, released, created_at, updated_at) '
+                'WITH RECURSIVE n(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM n WHERE i + 1 < %s) '
+                "SELECT %s + i %% %s, %s, 'Episode ' || i, 'episodes/bench/' || i || '.mp3', 1800, '', '', %s, 1, %s, %s FROM n",
+                [options['episodes'], first, len(podcasts), user.pk, now, now, now],
+            )
+        self.stdout.write(f"Seeded {options['episodes']:,} episodes over {len(podcasts):,} podcasts in {time.perf_counter() - started:.0f}s")
+        return podcasts[0]
+
+    def run(self, label, count, user, podcast):
+        view = EpisodeListCreateView.as_view()
+        factory = APIRequestFactory()
+        url = f'/api/podcasts/{podcast.pk}/episodes/'
+        elapsed = 0.0
+        queries = lookups = 0
+        for i in range(count):
+            request = factory.post(url, {
+                'podcast_id': podcast.pk, 'title': f'New {i}', 'audio_url': SimpleUploadedFile('new.mp3', b'ID3' + b'\0' * 1024),
+            }, format='multipart', HTTP_HOST='localhost')
+            force_authenticate(request, user)
+            reset_queries() # CaptureQueriesContext counts from connection.queries, which is capped
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = view(request, podcast_pk=podcast.pk)
+                elapsed += time.perf_counter() - started
+            queries += len(captured)
+            lookups += sum(1 for query in captured if query['sql'].startswith('SELECT') and f'FROM "{Podcast._meta.db_table}"' in query['sql'])
+        self.stdout.write(
+            f"{label:<12} {count / elapsed:8,.0f} req/s  {elapsed / count * 1000:7.2f} ms  "
+            f"{queries / count:5.1f} queries  {lookups / count:4.1f} podcast lookups  status {response.status_code}"
+        )
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as media, override_settings(MEDIA_ROOT=media), transaction.atomic():
+            try:
+                owner = CustomUser.objects.create_user(username='bench-writes', email='bench-writes@example.com', password='x')
+                stranger = CustomUser.objects.create_user(username='bench-stranger', email='bench-stranger@example.com', password='x')
+                podcast = self.seed(owner, options)
+                self.run('owner', options['requests'], owner, podcast)
+                self.run('not owner', options['requests'], stranger, podcast)
+            finally:
+                transaction.set_rollback(True)
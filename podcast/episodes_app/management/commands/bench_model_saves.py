@@ -0,0 +1,55 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import models, transaction
+from django.utils import timezone
+
+from Users.models import CustomUser
+from category.models import Podcast
+from episodes_app.models import Episode
+
+
+def legacy_save(instance):
+    """What save() did before DirtyFieldsMixin: re-read the row, then write every column."""
+    type(instance).objects.get(pk=instance.pk)
+    models.Model.save(instance)
+
+
+class Command(BaseCommand):
+    help = "Seeds rows in a rolled-back transaction and compares update throughput of the old and dirty-field save()."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=20_000, help="Rows per model in the table.")
+        parser.add_argument('--updates', type=int, default=5_000, help="Updates timed per model and variant.")
+
+    def run(self, label, instances, save):
+        started = time.perf_counter()
+        for i, instance in enumerate(instances):
+            instance.title = f'{label} {i}'
+            save(instance)
+        elapsed = time.perf_counter() - started
+        return len(instances) / elapsed
+
+    def handle(self, *args, **options):
+        rows, updates = options['rows'], options['updates']
+        with transaction.atomic():
+            user = CustomUser.objects.create_user(username='bench-saves', email='bench-saves@example.com', password='x')
+            now = timezone.now()
+            podcasts = Podcast.objects.bulk_create(
+                [Podcast(user=user, title=f'Podcast {i}', description='x' * 500) for i in range(rows)], batch_size=5000,
+            )
+            Episode.objects.bulk_create([
+                Episode(podcast=podcasts[i % len(podcasts)], user=user, title=f'Episode {i}', audio_url=f'episodes/e{i}.mp3',
+                        show_notes='x' * 2000, published_at=now)
+                for i in range(rows)
+            ], batch_size=5000)
+
+            for model in (Podcast, Episode):
+                ids = list(model.objects.order_by('?').values_list('pk', flat=True)[:updates])
+                before = self.run('legacy', list(model.objects.filter(pk__in=ids)), legacy_save)
+                after = self.run('dirty', list(model.objects.filter(pk__in=ids)), lambda instance: instance.save())
+                self.stdout.write(
+                    f"{model.__name__:<8} old save() {before:8,.0f} updates/s   dirty-field save() {after:8,.0f} updates/s"
+                    f"   ({after / before:.2f}x)"
+                )
+            transaction.set_rollback(True)
@@ -0,0 +1,77 @@
+import gzip
+import time
+
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+
+from Users.models import CustomUser
+from category.models import Podcast
+from episodes_app import feeds
+from episodes_app.models import Episode
+from episodes_app.views import PodcastFeedView
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds a podcast with many published episodes in a rolled-back transaction and reports requests/s "
+        "of its RSS feed: served from the cache, answered with 304, rebuilt after one episode changed, and cold."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--episodes', type=int, default=5000)
+        parser.add_argument('--requests', type=int, default=2000, help="Requests per cached run.")
+        parser.add_argument('--rebuilds', type=int, default=20, help="Requests per rebuild run.")
+
+    def run(self, label, count, prepare=None, **headers):
+        view = PodcastFeedView.as_view()
+        factory = APIRequestFactory()
+        elapsed = 0.0
+        for _ in range(count):
+            if prepare:
+                prepare()
+            request = factory.get(self.url, HTTP_HOST='localhost', HTTP_ACCEPT_ENCODING='gzip', **headers)
+            started = time.perf_counter()
+            response = view(request, podcast_pk=self.podcast.pk)
+            elapsed += time.perf_counter() - started
+        self.stdout.write(f"{label:<22} {count / elapsed:9,.0f} req/s  {elapsed / count * 1000:8.2f} ms  status {response.status_code}")
+        return response
+
+    def handle(self, *args, **options):
+        config = feeds.get_feed_settings()
+        cache = caches[config['CACHE']]
+        with transaction.atomic():
+            user = CustomUser.objects.create_user(username='bench-feed', email='bench-feed@example.com', password='x')
+            self.podcast = Podcast.objects.create(user=user, title='Bench feed', description='A long running show')
+            self.url = f'/api/podcasts/{self.podcast.pk}/feed.xml'
+            now = timezone.now()
+            Episode.objects.bulk_create([
+                Episode(
+                    podcast=self.podcast, user=user, title=f'Episode {i}', show_notes=f'Notes for episode {i}. ' * 20,
+                    audio_url=f'episodes/podcast_{self.podcast.pk}/{i}.mp3', duration=1800 + i,
+                    published_at=now - timezone.timedelta(hours=i),
+                ) for i in range(options['episodes'])
+            ], batch_size=1000)
+            episode = Episode.objects.filter(podcast=self.podcast).order_by('pk').first()
+
+            def cold():
+                feeds.bump_feed_version(self.podcast.pk)
+                cache.clear() # The item fragments too
+
+            def one_changed():
+                episode.title = f'Edited {time.perf_counter()}'
+                episode.save()
+                feeds.bump_feed_version(self.podcast.pk) # What the signal does after commit
+
+            try:
+                response = self.run('cold', options['rebuilds'], cold)
+                body = gzip.decompress(response.content)
+                self.stdout.write(f"  {options['episodes']:,} items, {len(body) / 1024:,.0f} KiB, gzipped {len(response.content) / 1024:,.0f} KiB")
+                self.run('one episode changed', options['rebuilds'], one_changed)
+                response = self.run('cached', options['requests'])
+                self.run('cached, 304', options['requests'], HTTP_IF_NONE_MATCH=response['ETag'])
+            finally:
+                transaction.set_rollback(True)
+                feeds.bump_feed_version(self.podcast.pk)
@@ -0,0 +1,64 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from podcast.media_gc import OrphanCollector, get_media_gc_settings
+from podcast.media_store import media_storage
+
+
+def mib(size):
+    return f"{size / 1024 / 1024:,.1f} MiB"
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes (or quarantines) files under MEDIA_ROOT that no row references any more, e.g. after queryset, "
+        "cascade or admin bulk deletes. Files modified in the last MEDIA_GC['GRACE'] seconds are kept. "
+        "Streams the tree and checks references a batch at a time, so it runs in bounded memory."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Only report what would be removed.")
+        parser.add_argument('--grace', type=int, help="Seconds since the last change before a file may go (default MEDIA_GC['GRACE']).")
+        parser.add_argument('--batch-size', type=int, help="Files looked up per round of queries (default MEDIA_GC['BATCH_SIZE']).")
+        parser.add_argument('--quarantine', help="Move orphans to this directory below MEDIA_ROOT instead of deleting them.")
+        parser.add_argument('--loop', action='store_true', help="Keep running, sweeping every --interval seconds.")
+        parser.add_argument('--interval', type=float, default=86400.0)
+
+    def sweep(self, config, options):
+        collector = OrphanCollector(media_storage(), dry_run=options['dry_run'], config=config)
+        started = time.monotonic()
+        reported = [0]
+
+        def progress(collector):
+            if collector.scanned - reported[0] >= 100_000:
+                reported[0] = collector.scanned
+                rate = collector.scanned / (time.monotonic() - started)
+                self.stdout.write(f"  {collector.scanned:,} files scanned, {collector.orphans:,} orphans ({rate:,.0f} files/s)")
+
+        collector.sweep(progress)
+        elapsed = time.monotonic() - started
+        verb = "would be removed" if options['dry_run'] else ("quarantined" if config['QUARANTINE'] else "deleted")
+        self.stdout.write(
+            f"Scanned {collector.scanned:,} files ({mib(collector.scanned_bytes)}) in {elapsed:.1f}s: "
+            f"{collector.referenced:,} referenced, {collector.recent:,} within the grace period, "
+            f"{collector.orphans:,} orphans {verb} ({mib(collector.orphan_bytes)}), {collector.failed:,} failed"
+        )
+        if config['QUARANTINE']:
+            self.stdout.write(f"Purged {collector.purged:,} quarantined files older than {config['QUARANTINE_TTL']:,}s")
+        reclaimed = "Would reclaim" if options['dry_run'] else "Reclaimed"
+        self.stdout.write(f"{reclaimed} {mib(collector.reclaimed_bytes)}")
+
+    def handle(self, *args, **options):
+        storage = media_storage()
+        if not hasattr(storage, 'location'):
+            raise CommandError("Orphan collection needs a local file system storage for media.")
+        config = get_media_gc_settings()
+        for option, key in (('grace', 'GRACE'), ('batch_size', 'BATCH_SIZE'), ('quarantine', 'QUARANTINE')):
+            if options[option] is not None:
+                config[key] = options[option]
+        while True:
+            self.sweep(config, options)
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
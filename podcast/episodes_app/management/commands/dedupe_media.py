@@ -0,0 +1,133 @@
+import hashlib
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from category.models import Podcast
+from episodes_app.models import Episode
+from episodes_app.visibility import invalidate_podcast_episodes
+from podcast.file_cleanup import file_cleanup_queue
+from podcast.media_store import ContentAddressedStorage, get_media_store_settings, is_referenced
+
+
+def episode_changes(row, blob):
+    # Keep the probed metadata (episodes_app/metadata.py), the bytes are the same
+    return {'audio_probed': blob} if row['audio_probed'] == row['audio_url'] else {}
+
+
+def podcast_changes(row, blob):
+    # The existing derivatives stay current (category/imaging.py is_current)
+    derivatives = row['image_derivatives'] or {}
+    return {'image_derivatives': {**derivatives, 'source': blob}} if derivatives.get('source') == row['image'] else {}
+
+
+# (label, model, file field, other columns read, extra changes for the UPDATE)
+TARGETS = (
+    ('episode audio', Episode, 'audio_url', ('audio_probed', 'podcast_id'), episode_changes),
+    ('podcast images', Podcast, 'image', ('image_derivatives',), podcast_changes),
+)
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for chunk in iter(lambda: handle.read(1024 * 1024), b''):
+            digest.update(chunk) # Releases the GIL, so threads hash in parallel
+    return digest.hexdigest()
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves media stored under upload_to names (episodes/podcast_<id>/..., podcasts/user_<id>/...) into the "
+        "content-addressed store: files are hashed in parallel, hard-linked to their blob (identical files share "
+        "one), the rows repointed, and the old files removed. Safe to re-run and to run while serving."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help="Files hashed in parallel.")
+        parser.add_argument('--batch-size', type=int, default=200, help="Rows hashed, then updated in one transaction.")
+        parser.add_argument('--dry-run', action='store_true', help="Only hash and report what would be saved.")
+
+    def handle(self, *args, **options):
+        storage = Episode._meta.get_field('audio_url').storage
+        if not isinstance(storage, ContentAddressedStorage) or Podcast._meta.get_field('image').storage is not storage:
+            raise CommandError("STORAGES['media'] is not a ContentAddressedStorage (see podcast/media_store.py).")
+        prefix = get_media_store_settings()['PREFIX'] + '/'
+
+        def hash_row(name):
+            try:
+                return file_sha256(storage.path(name))
+            except OSError as error:
+                return error
+
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            for label, model, field, columns, changes in TARGETS:
+                self.dedupe(label, model, field, columns, changes, storage, prefix, executor, hash_row, options)
+        file_cleanup_queue.join()
+
+    def dedupe(self, label, model, field, columns, changes, storage, prefix, executor, hash_row, options):
+        queryset = model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True}).exclude(**{f'{field}__startswith': prefix})
+        started = time.monotonic()
+        seen = set() # Digests stored (or found) in this run, for the dry-run numbers
+        moved = missing = 0
+        total_bytes = duplicate_bytes = 0
+        last_id = 0
+        while True:
+            # Walk by primary key so each batch is an index range scan
+            rows = list(queryset.filter(pk__gt=last_id).order_by('pk').values('pk', field, *columns)[:options['batch_size']])
+            if not rows:
+                break
+            last_id = rows[-1]['pk']
+            digests = list(executor.map(hash_row, [row[field] for row in rows]))
+
+            replaced = []
+            with transaction.atomic():
+                for row, digest in zip(rows, digests):
+                    name = row[field]
+                    if isinstance(digest, Exception):
+                        missing += 1 # Left alone; the row points at a file that isn't there
+                        continue
+                    size = os.path.getsize(storage.path(name))
+                    total_bytes += size
+                    blob = storage.blob_name(digest, name)
+                    if digest in seen or storage.exists(blob):
+                        duplicate_bytes += size
+                    seen.add(digest)
+                    if options['dry_run']:
+                        continue
+                    # Link the old file in under a temporary name, adopt() moves that into place
+                    fd, temporary = tempfile.mkstemp(dir=storage.temporary_directory())
+                    os.close(fd)
+                    os.remove(temporary)
+                    os.link(storage.path(name), temporary)
+                    blob = storage.adopt(temporary, digest, name)
+                    # Only if the row still has the file we hashed; updated_at moves the ETag (new URL)
+                    updated = model.objects.filter(pk=row['pk'], **{field: name}).update(
+                        **{field: blob}, updated_at=timezone.now(), **changes(row, blob),
+                    )
+                    if updated:
+                        replaced.append(name)
+                        moved += 1
+                        invalidate_podcast_episodes(row['podcast_id'] if model is Episode else row['pk']) # New enclosure or image URL
+                # Rows in later batches may still use the same old name; the last one moved removes it
+                replaced = [name for name in dict.fromkeys(replaced) if not is_referenced(name)]
+                if replaced:
+                    file_cleanup_queue.delete_on_commit(storage, replaced)
+
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f"  {label} up to id {last_id}: {moved:,} moved, {missing:,} missing "
+                f"({total_bytes / elapsed / 1024 / 1024:,.1f} MiB/s)"
+            )
+
+        elapsed = time.monotonic() - started
+        verb = "would free" if options['dry_run'] else "freed"
+        self.stdout.write(
+            f"{label}: {moved:,} moved, {missing:,} missing files in {elapsed:.1f}s; {len(seen):,} distinct of "
+            f"{total_bytes / 1024 / 1024:,.1f} MiB, duplicates {verb} {duplicate_bytes / 1024 / 1024:,.1f} MiB"
+        )
@@ -0,0 +1,72 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+
+from episodes_app.metadata import get_metadata_settings, metadata_stats, read_metadata, store_metadata
+from episodes_app.models import Episode
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        "Reads duration, bitrate, sample rate and channels from the audio headers of existing episodes. "
+        "Safe to re-run: episodes already probed for their current file are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help="Probe again even if the current file was probed.")
+        parser.add_argument('--workers', type=int, help="Files probed in parallel (default EPISODE_AUDIO_METADATA['WORKERS']).")
+        parser.add_argument('--batch-size', type=int, default=500, help="Episodes probed, then written in one transaction.")
+        parser.add_argument('ids', nargs='*', type=int, help="Only these episode ids.")
+
+    def handle(self, *args, **options):
+        storage = Episode._meta.get_field('audio_url').storage
+        queryset = Episode.objects.exclude(audio_url='')
+        if not options['force']:
+            queryset = queryset.exclude(audio_probed=F('audio_url'))
+        if options['ids']:
+            queryset = queryset.filter(pk__in=options['ids'])
+
+        def read(row):
+            try:
+                return read_metadata(storage, row[1])
+            except Exception as error: # Missing or unreadable file; left for the next run
+                logger.warning("Audio metadata for episode %s failed: %s", row[0], error)
+                return error
+
+        started = time.monotonic()
+        probed = skipped = failed = 0
+        last_id = 0
+        workers = options['workers'] or get_metadata_settings()['WORKERS']
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='episode-metadata') as executor:
+            while True:
+                # Walk by primary key so each batch is an index range scan
+                rows = list(queryset.filter(pk__gt=last_id).order_by('pk').values_list('pk', 'audio_url')[:options['batch_size']])
+                if not rows:
+                    break
+                last_id = rows[-1][0]
+                # The probes run in parallel; the writes share one commit instead of one per file
+                results = list(executor.map(read, rows))
+                with transaction.atomic():
+                    for (pk, name), info in zip(rows, results):
+                        if isinstance(info, Exception):
+                            failed += 1
+                        elif store_metadata(pk, name, info):
+                            probed += 1
+                        else:
+                            skipped += 1 # Replaced or deleted meanwhile
+                elapsed = time.monotonic() - started
+                self.stdout.write(
+                    f"  up to id {last_id}: {probed:,} probed, {skipped:,} skipped, {failed:,} failed ({probed / elapsed:,.0f} files/s)"
+                )
+
+        elapsed = time.monotonic() - started
+        rate = probed / elapsed if elapsed else 0.0
+        self.stdout.write(f"Done in {elapsed:.1f}s: {probed:,} probed, {skipped:,} skipped, {failed:,} failed ({rate:,.0f} files/s)")
+        for key, entry in sorted(metadata_stats().items()):
+            self.stdout.write(f"  {key:<8} {entry['count']:>7} x  avg {entry['avg_ms']:7.2f} ms  max {entry['max_ms']:7.2f} ms")
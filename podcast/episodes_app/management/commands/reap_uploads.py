@@ -0,0 +1,56 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from episodes_app.models import AudioUploadSession
+from episodes_app.uploads import discard_partial, get_upload_settings
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes resumable upload sessions that received no chunk for EPISODE_UPLOADS['SESSION_TTL'] "
+        "seconds, together with their partial files."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Only report what would be deleted.")
+        parser.add_argument('--batch-size', type=int, default=500, help="Sessions deleted per transaction.")
+        parser.add_argument('--loop', action='store_true', help="Keep running, reaping every --interval seconds.")
+        parser.add_argument('--interval', type=float, default=3600.0)
+
+    def reap(self, options):
+        cutoff = timezone.now() - timezone.timedelta(seconds=get_upload_settings()['SESSION_TTL'])
+        # upload_session_updated_idx
+        stale = AudioUploadSession.objects.filter(updated_at__lte=cutoff).order_by('updated_at')
+        if options['dry_run']:
+            self.stdout.write(f"{stale.count():,} stale upload sessions would be deleted")
+            return
+        deleted = freed = 0
+        while True:
+            with transaction.atomic():
+                rows = list(stale.values_list('pk', 'partial_path')[:options['batch_size']])
+                if not rows:
+                    break
+                # Same cutoff again: a chunk that arrived meanwhile keeps its session
+                AudioUploadSession.objects.filter(pk__in=[pk for pk, _ in rows], updated_at__lte=cutoff).delete()
+            kept = set(AudioUploadSession.objects.filter(pk__in=[pk for pk, _ in rows]).values_list('pk', flat=True))
+            for pk, path in rows:
+                if pk in kept:
+                    continue
+                try:
+                    freed += os.path.getsize(path)
+                except OSError:
+                    pass
+                discard_partial(path)
+                deleted += 1
+        self.stdout.write(f"Deleted {deleted:,} stale upload sessions, {freed / 1024 / 1024:,.1f} MiB of partial files")
+
+    def handle(self, *args, **options):
+        while True:
+            self.reap(options)
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from category.counters import release_due_episodes
+
+
+class Command(BaseCommand):
+    help = (
+        "Counts scheduled episodes whose publish time has passed in their podcast's "
+        "published_episode_count and total_duration. Run it every minute (or with --loop)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help="Keep running, releasing every --interval seconds.")
+        parser.add_argument('--interval', type=float, default=60.0)
+
+    def handle(self, *args, **options):
+        while True:
+            released = release_due_episodes()
+            if released or not options['loop']:
+                self.stdout.write(f"Released {released:,} scheduled episodes")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
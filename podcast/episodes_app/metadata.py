@@ -0,0 +1,386 @@
+# In your Django app's metadata.py
+# Duration, bitrate, sample rate and channels of uploaded episode audio, read from the
+# container/frame headers only (a few KiB per file, found with seek(), never the whole file):
+#   MP3   ID3v2 skipped, first frame header, then the Xing/Info or VBRI header for VBR files;
+#         CBR files are timed from the file size.
+#   WAV   RIFF 'fmt ' and 'data' chunks.
+#   MP4   (M4A/AAC) moov/mvhd for the duration, the sound track's stsd entry for rate/channels;
+#         a moov after mdat is reached by seeking over mdat.
+# Runs after upload in a bounded thread pool (Episode.save() schedules it on commit) and from
+# `python manage.py extract_audio_metadata` for existing rows.
+
+import logging
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from category.counters import apply_episode_change, episode_contribution
+from .models import Episode
+from .visibility import invalidate_podcast_episodes
+
+logger = logging.getLogger(__name__)
+
+# Defaults, override with EPISODE_AUDIO_METADATA in settings.py
+DEFAULT_EPISODE_AUDIO_METADATA = {
+    'WORKERS': 2, # Threads; the work is a few small reads per file
+    'MAX_PENDING': 500, # Jobs queued or running; beyond that new jobs are left to the backfill command
+    'SYNC_WINDOW': 64 * 1024, # Bytes searched for the first MP3 frame after the ID3v2 tag
+}
+
+METADATA_FIELDS = ('bitrate', 'sample_rate', 'channels')
+
+
+def get_metadata_settings():
+    return {**DEFAULT_EPISODE_AUDIO_METADATA, **getattr(settings, 'EPISODE_AUDIO_METADATA', {})}
+
+
+def _read_at(handle, position, size):
+    handle.seek(position)
+    return handle.read(size)
+
+
+def _file_size(handle):
+    handle.seek(0, 2)
+    return handle.tell()
+
+
+# --- MP3 ---
+MP3_BITRATES = { # kbit/s by (MPEG-1?, layer)
+    (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+MP3_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)} # By version bits
+
+
+def mp3_frame_header(data):
+    """The decoded 4-byte frame header at the start of `data`, or None if it isn't one."""
+    if len(data) < 4:
+        return None
+    header = struct.unpack('>I', data[:4])[0]
+    if header >> 21 != 0x7FF:
+        return None
+    version = (header >> 19) & 3 # 3: MPEG-1, 2: MPEG-2, 0: MPEG-2.5
+    layer = 4 - ((header >> 17) & 3) # Bits 3, 2, 1 -> layer I, II, III
+    bitrate_index = (header >> 12) & 15
+    rate_index = (header >> 10) & 3
+    if version == 1 or layer == 4 or bitrate_index in (0, 15) or rate_index == 3:
+        return None # Reserved values, or free format
+    mpeg1 = version == 3
+    bitrate = MP3_BITRATES[(mpeg1, layer)][bitrate_index] * 1000
+    sample_rate = MP3_SAMPLE_RATES[version][rate_index]
+    padding = (header >> 9) & 1
+    mono = (header >> 6) & 3 == 3
+    samples = 384 if layer == 1 else 1152 if layer == 2 or mpeg1 else 576
+    if layer == 1:
+        length = (12 * bitrate // sample_rate + padding) * 4
+    else:
+        length = samples // 8 * bitrate // sample_rate + padding
+    return {
+        'mpeg1': mpeg1, 'bitrate': bitrate, 'sample_rate': sample_rate, 'channels': 1 if mono else 2,
+        'samples': samples, 'length': length,
+        'side_info': (17 if mono else 32) if mpeg1 else (9 if mono else 17), # Layer III, where Xing sits after it
+    }
+
+
+def id3v2_end(handle, position=0):
+    """Offset after any ID3v2 tags at `position` (they can be stacked)."""
+    while True:
+        header = _read_at(handle, position, 10)
+        if len(header) < 10 or header[:3] != b'ID3':
+            return position
+        size = (header[6] & 0x7F) << 21 | (header[7] & 0x7F) << 14 | (header[8] & 0x7F) << 7 | header[9] & 0x7F
+        position += 10 + size + (10 if header[5] & 0x10 else 0) # Footer flag
+
+
+def find_mp3_frame(handle, start):
+    """(offset, decoded header) of the first real frame at or after `start`, or None."""
+    limit = get_metadata_settings()['SYNC_WINDOW']
+    size = min(4096, limit) # Usually right after the tag; look further only if needed
+    while True:
+        window = _read_at(handle, start, size)
+        offset = window.find(b'\xff')
+        while offset != -1:
+            frame = mp3_frame_header(window[offset:offset + 4])
+            if frame:
+                # A second header where this frame ends rules out a stray 0xFFE in tag padding or junk
+                following = _read_at(handle, start + offset + frame['length'], 4)
+                if len(following) < 4 or mp3_frame_header(following):
+                    return start + offset, frame
+            offset = window.find(b'\xff', offset + 1)
+        if len(window) < size or size >= limit:
+            return None
+        size = min(size * 4, limit)
+
+
+def probe_mp3(handle):
+    found = find_mp3_frame(handle, id3v2_end(handle))
+    if found is None:
+        return None
+    first, frame = found
+    head = _read_at(handle, first, 4 + frame['side_info'] + 16)
+    frames = audio_bytes = None
+
+    xing = head[4 + frame['side_info']:]
+    if xing[:4] in (b'Xing', b'Info'):
+        flags = struct.unpack('>I', xing[4:8])[0]
+        fields = xing[8:16]
+        if flags & 1:
+            frames, fields = struct.unpack('>I', fields[:4])[0], fields[4:]
+        if flags & 2 and len(fields) >= 4:
+            audio_bytes = struct.unpack('>I', fields[:4])[0]
+    else:
+        vbri = _read_at(handle, first + 36, 18)
+        if vbri[:4] == b'VBRI':
+            audio_bytes, frames = struct.unpack('>II', vbri[10:18])
+
+    if frames:
+        duration = frames * frame['samples'] / frame['sample_rate']
+        if not audio_bytes:
+            audio_bytes = _file_size(handle) - first
+        bitrate = round(audio_bytes * 8 / duration) if duration else frame['bitrate']
+    else:
+        # Constant bitrate: everything after the first frame up to an ID3v1 tag is audio
+        end = _file_size(handle)
+        if end >= 128 and _read_at(handle, end - 128, 3) == b'TAG':
+            end -= 128
+        duration = (end - first) * 8 / frame['bitrate']
+        bitrate = frame['bitrate']
+    return {
+        'format': 'mp3', 'duration': duration, 'bitrate': bitrate,
+        'sample_rate': frame['sample_rate'], 'channels': frame['channels'],
+    }
+
+
+# --- WAV ---
+def probe_wav(handle):
+    size = _file_size(handle)
+    position = 12
+    fmt = data_size = None
+    while position + 8 <= size and (fmt is None or data_size is None):
+        chunk_id, chunk_size = struct.unpack('<4sI', _read_at(handle, position, 8))
+        if chunk_id == b'fmt ':
+            fmt = struct.unpack('<HHIIHH', _read_at(handle, position + 8, 16))
+        elif chunk_id == b'data':
+            # Streaming writers leave 0 or 0xFFFFFFFF; then the data runs to the end of the file
+            data_size = chunk_size if 0 < chunk_size <= size - position - 8 else size - position - 8
+        position += 8 + chunk_size + (chunk_size & 1) # Chunks are word aligned
+    if fmt is None or data_size is None:
+        return None
+    _, channels, sample_rate, byte_rate, _, _ = fmt
+    if not byte_rate:
+        return None
+    return {
+        'format': 'wav', 'duration': data_size / byte_rate, 'bitrate': byte_rate * 8,
+        'sample_rate': sample_rate, 'channels': channels,
+    }
+
+
+# --- MP4 / M4A ---
+def mp4_boxes(handle, start, end):
+    """(type, content start, box end) for each box between start and end, found by seeking."""
+    position = start
+    while position + 8 <= end:
+        header = _read_at(handle, position, 16)
+        if len(header) < 8:
+            return
+        size, kind = struct.unpack('>I4s', header[:8])
+        header_size = 8
+        if size == 1 and len(header) == 16:
+            size, header_size = struct.unpack('>Q', header[8:])[0], 16 # 64-bit size, large mdat
+        elif size == 0:
+            size = end - position # Runs to the end
+        if size < header_size:
+            return
+        yield kind, position + header_size, position + size
+        position += size
+
+
+def mp4_child(handle, start, end, *path):
+    """Content range of the first box at `path` below (start, end), or None."""
+    for kind in path:
+        for child, content, child_end in mp4_boxes(handle, start, end):
+            if child == kind:
+                start, end = content, child_end
+                break
+        else:
+            return None
+    return start, end
+
+
+def probe_mp4(handle):
+    size = _file_size(handle)
+    moov = None
+    media_bytes = 0
+    for kind, content, end in mp4_boxes(handle, 0, size):
+        if kind == b'moov':
+            moov = (content, end)
+        elif kind == b'mdat':
+            media_bytes += end - content
+    if moov is None:
+        return None
+    mvhd = mp4_child(handle, *moov, b'mvhd')
+    if mvhd is None:
+        return None
+    body = _read_at(handle, mvhd[0], 32)
+    if body[0] == 1:
+        timescale, length = struct.unpack('>IQ', body[20:32]) # Version 1: 64-bit times
+    else:
+        timescale, length = struct.unpack('>II', body[12:20])
+    if not timescale:
+        return None
+    duration = length / timescale
+
+    sample_rate = channels = None
+    for kind, content, end in mp4_boxes(handle, *moov):
+        if kind != b'trak':
+            continue
+        hdlr = mp4_child(handle, content, end, b'mdia', b'hdlr')
+        if hdlr is None or _read_at(handle, hdlr[0] + 8, 4) != b'soun':
+            continue
+        stsd = mp4_child(handle, content, end, b'mdia', b'minf', b'stbl', b'stsd')
+        if stsd is not None:
+            # Full box header and entry count, then the first sample entry (AudioSampleEntry)
+            entry = _read_at(handle, stsd[0] + 8, 36)
+            if len(entry) == 36:
+                channels = struct.unpack('>H', entry[24:26])[0]
+                sample_rate = struct.unpack('>I', entry[32:36])[0] >> 16 # 16.16 fixed point
+        break
+    return {
+        'format': 'mp4', 'duration': duration,
+        'bitrate': round((media_bytes or size) * 8 / duration) if duration else None,
+        'sample_rate': sample_rate, 'channels': channels,
+    }
+
+
+def probe(handle):
+    """{'format', 'duration' (seconds), 'bitrate' (bit/s), 'sample_rate', 'channels'}, or None if unknown."""
+    head = _read_at(handle, 0, 12)
+    try:
+        if head[:4] == b'RIFF' and head[8:12] == b'WAVE':
+            return probe_wav(handle)
+        if head[4:8] == b'ftyp':
+            return probe_mp4(handle)
+        return probe_mp3(handle) # ID3 tag or a bare frame sync; anything else finds no frames
+    except struct.error:
+        return None # Truncated headers
+
+
+# --- Timing metrics ---
+_stats_lock = threading.Lock()
+_stats = {} # 'mp3' -> {'count', 'total_ms', 'max_ms'}
+
+
+def _record(key, elapsed_ms):
+    with _stats_lock:
+        entry = _stats.setdefault(key, {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+        entry['count'] += 1
+        entry['total_ms'] += elapsed_ms
+        entry['max_ms'] = max(entry['max_ms'], elapsed_ms)
+
+
+def metadata_stats():
+    """Per format ('mp3', 'unknown'...): count and time spent opening and probing."""
+    with _stats_lock:
+        return {key: {**entry, 'avg_ms': entry['total_ms'] / entry['count']} for key, entry in _stats.items()}
+
+
+# --- Extraction ---
+def read_metadata(storage, name):
+    """probe() on a stored file, timed per format."""
+    started = time.perf_counter()
+    with storage.open(name, 'rb') as handle:
+        info = probe(handle)
+    _record(info['format'] if info else 'unknown', (time.perf_counter() - started) * 1000)
+    return info
+
+
+def store_metadata(episode_id, name, info):
+    """Records a probe of `name` (None: not a format we read). Returns True if the row was updated."""
+    values = {field: info[field] for field in METADATA_FIELDS} if info else dict.fromkeys(METADATA_FIELDS)
+    with transaction.atomic():
+        # Only if the audio wasn't replaced while we were reading it; updated_at moves the ETag
+        updated = Episode.objects.filter(pk=episode_id, audio_url=name).update(
+            audio_probed=name, updated_at=timezone.now(), **values,
+        )
+        if updated:
+            row = Episode.objects.filter(pk=episode_id).values('podcast_id', 'released').first()
+            invalidate_podcast_episodes(row['podcast_id']) # No post_save for this UPDATE
+        if updated and info and info['duration']:
+            # A duration the client gave is kept; released ones count towards total_duration
+            duration = max(round(info['duration']), 1)
+            if Episode.objects.filter(pk=episode_id, duration__isnull=True).update(duration=duration):
+                apply_episode_change(
+                    episode_contribution(row['podcast_id'], row['released'], None),
+                    episode_contribution(row['podcast_id'], row['released'], duration),
+                )
+    return bool(updated)
+
+
+def extract_metadata(episode_id, force=False):
+    """
+    Probes one episode's audio and stores what it finds. Returns True if the row was
+    updated, False if there was nothing to do (no audio, already probed, row gone or changed).
+    """
+    episode = Episode.objects.filter(pk=episode_id).only('id', 'audio_url', 'audio_probed').first()
+    if episode is None or not episode.audio_url:
+        return False
+    name = episode.audio_url.name
+    if not force and episode.audio_probed == name:
+        return False
+    return store_metadata(episode_id, name, read_metadata(episode.audio_url.storage, name))
+
+
+class MetadataPool:
+    """Bounded ThreadPoolExecutor for the metadata jobs Episode.save() schedules."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self.pending = 0
+        self.skipped = 0 # Jobs dropped because MAX_PENDING was reached
+
+    def _get_executor(self, config):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=config['WORKERS'], thread_name_prefix='episode-metadata')
+            return self._executor
+
+    def _run(self, episode_id, force):
+        try:
+            return extract_metadata(episode_id, force)
+        except Exception:
+            logger.exception("Audio metadata for episode %s failed", episode_id)
+            return False
+        finally:
+            close_old_connections() # Worker threads hold their own DB connection
+            with self._lock:
+                self.pending -= 1
+
+    def submit(self, episode_id, force=False):
+        """Queues a job; returns the Future, or None if the pool is full."""
+        config = get_metadata_settings()
+        executor = self._get_executor(config)
+        with self._lock:
+            if self.pending >= config['MAX_PENDING']:
+                self.skipped += 1
+                return None
+            self.pending += 1
+        return executor.submit(self._run, episode_id, force)
+
+
+metadata_pool = MetadataPool()
+
+
+def schedule_metadata(episode):
+    """Called from Episode.save(): probe once the row (and its audio) is committed."""
+    episode_id = episode.pk
+    transaction.on_commit(lambda: metadata_pool.submit(episode_id))
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:28
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('category', '0002_keyset_indexes'),
+        ('episodes_app', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='episode',
+            index=models.Index(fields=['podcast', '-published_at', '-created_at', '-id'], name='episode_podcast_published_idx'),
+        ),
+    ]
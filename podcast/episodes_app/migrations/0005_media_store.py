@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:38
+
+import episodes_app.models
+import podcast.media_store
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('category', '0006_media_store'),
+        ('episodes_app', '0004_audio_metadata'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='episode',
+            name='audio_url',
+            field=models.FileField(storage=podcast.media_store.media_storage, upload_to=episodes_app.models.episode_audio_upload_path),
+        ),
+        migrations.AddIndex(
+            model_name='episode',
+            index=models.Index(fields=['audio_url'], name='episode_audio_idx'),
+        ),
+    ]
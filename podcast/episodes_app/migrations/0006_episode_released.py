@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:55
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Now
+
+
+def release_published(apps, schema_editor):
+    # Published episodes are released; scheduled ones leave the counters until release_episodes counts them
+    Podcast = apps.get_model('category', 'Podcast')
+    Episode = apps.get_model('episodes_app', 'Episode')
+    Episode.objects.filter(published_at__lte=Now()).update(released=True)
+
+    def scalar(queryset, aggregate):
+        return Coalesce(
+            Subquery(queryset.filter(podcast=OuterRef('pk')).order_by().values('podcast').annotate(v=aggregate).values('v')),
+            Value(0), output_field=IntegerField(),
+        )
+
+    released = Episode.objects.filter(released=True)
+    scheduled = Episode.objects.filter(released=False, published_at__isnull=False).values('podcast')
+    Podcast.objects.filter(pk__in=scheduled).update(
+        published_episode_count=scalar(released, Count('id')),
+        total_duration=scalar(released, Sum(Coalesce('duration', 0))),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('category', '0007_change_markers'),
+        ('episodes_app', '0005_media_store'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='episode',
+            name='released',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='episode',
+            index=models.Index(condition=models.Q(('released', False)), fields=['published_at'], name='episode_scheduled_idx'),
+        ),
+        migrations.RunPython(release_published, migrations.RunPython.noop),
+    ]
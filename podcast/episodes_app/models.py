@@ -1,8 +1,12 @@
-from django.db import models
+import uuid
+
+from django.db import models, transaction
 from django.conf import settings # To link to AUTH_USER_MODEL (CustomUser)
 from django.utils import timezone
-import os # To help with deleting old files
+from category.counters import apply_episode_change, episode_contribution # Podcast counter upkeep
 from category.models import Podcast 
+from podcast.media_store import media_storage # Content-addressed store for the audio
+from podcast.mixins import DirtyFieldsMixin # Tracks changed fields without an extra SELECT
 
 def episode_audio_upload_path(instance, filename):
     """Generates upload path for episode audio."""
@@ -11,7 +15,7 @@ def episode_audio_upload_path(instance, filename):
     return f'episodes/podcast_{instance.podcast.id}/{filename}'
 
 
-class Episode(models.Model):
+class Episode(DirtyFieldsMixin, models.Model):
     podcast = models.ForeignKey(
         Podcast,
         on_delete=models.CASCADE, # If podcast is deleted, delete episodes
@@ -23,15 +27,31 @@ class Episode(models.Model):
         related_name='episodes' # Allows accessing user.episodes
     )
     title = models.CharField(max_length=200)
-    audio_url = models.FileField(upload_to=episode_audio_upload_path) # Stores the audio file
+    audio_url = models.FileField(upload_to=episode_audio_upload_path, storage=media_storage) # Stores the audio file (deduplicated, see podcast/media_store.py)
     duration = models.PositiveIntegerField(null=True, blank=True) # Duration in seconds
+    # Read from the audio headers after upload by episodes_app/metadata.py (duration too, unless given)
+    bitrate = models.PositiveIntegerField(null=True, blank=True, editable=False) # Bits per second, average for VBR
+    sample_rate = models.PositiveIntegerField(null=True, blank=True, editable=False) # Hz
+    channels = models.PositiveSmallIntegerField(null=True, blank=True, editable=False)
+    audio_probed = models.CharField(max_length=100, blank=True, editable=False) # audio_url name the values above are from
     show_notes = models.TextField(blank=True) # Notes for the episode
     published_at = models.DateTimeField(null=True, blank=True) # Null means draft, timestamp means published
+    # Counted in the podcast's published counters: set on save once published_at has passed,
+    # for scheduled episodes by release_episodes when their time comes (category/counters.py)
+    released = models.BooleanField(default=False, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-published_at', '-created_at'] # Order by most recent published first
+        indexes = [
+            # Keyset pagination of EpisodeListCreateView within one podcast
+            models.Index(fields=['podcast', '-published_at', '-created_at', '-id'], name='episode_podcast_published_idx'),
+            # Whether a shared media blob is still used (podcast/media_store.py)
+            models.Index(fields=['audio_url'], name='episode_audio_idx'),
+            # Scheduled episodes waiting for release_episodes
+            models.Index(fields=['published_at'], condition=models.Q(released=False), name='episode_scheduled_idx'),
+        ]
 
     def __str__(self):
         return f"{self.podcast.title} - {self.title}"
@@ -40,21 +60,75 @@ class Episode(models.Model):
         """Checks if the episode is published."""
         return self.published_at is not None and self.published_at <= timezone.now()
 
-    # Optional: Add methods to delete the old audio file when updated/deleted
+    # Replaced audio files (save) and the audio of deleted episodes (delete) are
+    # removed after commit by DirtyFieldsMixin, no SELECT or os.remove on the request thread
+
+    def loaded_contribution(self):
+        """This episode's share of the podcast counters as it was loaded, before any changes."""
+        loaded = self._loaded_values or {}
+        if all(name in loaded for name in ('podcast_id', 'released', 'duration')):
+            return episode_contribution(loaded['podcast_id'], loaded['released'], loaded['duration'])
+        # Not loaded from the DB (or loaded with only()), read the stored state
+        row = Episode.objects.filter(pk=self.pk).values('podcast_id', 'released', 'duration').first()
+        return episode_contribution(row['podcast_id'], row['released'], row['duration']) if row else None
+
     def save(self, *args, **kwargs):
-        if self.pk:
-            try:
-                old_instance = Episode.objects.get(pk=self.pk)
-                if old_instance.audio_url and self.audio_url != old_instance.audio_url:
-                     if os.path.exists(old_instance.audio_url.path):
-                        os.remove(old_instance.audio_url.path)
-            except Episode.DoesNotExist:
-                pass
-        super().save(*args, **kwargs)
+        from .metadata import METADATA_FIELDS, schedule_metadata # metadata imports this module
+
+        before = None if self._state.adding else self.loaded_contribution()
+        audio_changed = self._state.adding or self.is_dirty('audio_url')
+        if audio_changed and not self._state.adding:
+            # The probed values describe the old file; a duration sent along with the new one is kept
+            for field in METADATA_FIELDS:
+                setattr(self, field, None)
+            self.audio_probed = ''
+            if not self.is_dirty('duration'):
+                self.duration = None
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'published_at' in update_fields:
+            # Scheduled ones are counted by release_episodes once their time comes
+            self.released = self.is_published()
+            if update_fields is not None:
+                kwargs['update_fields'] = [*update_fields, 'released']
+        # Row and counters change together, or not at all
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            apply_episode_change(before, episode_contribution(self.podcast_id, self.released, self.duration))
+        if audio_changed and self.audio_url:
+            schedule_metadata(self) # Probed in the background after commit
 
     def delete(self, *args, **kwargs):
-        if self.audio_url:
-             if os.path.exists(self.audio_url.path):
-                 os.remove(self.audio_url.path)
-        super().delete(*args, **kwargs)
-        
+        before = self.loaded_contribution()
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            apply_episode_change(before, None)
+        return result
+
+
+class AudioUploadSession(models.Model):
+    """
+    A resumable upload of episode audio (see episodes_app/uploads.py). Chunks are written
+    straight into `partial_path`; finalizing checks the checksum and moves the file into
+    place for a new episode, or for `episode` when replacing its audio.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False) # Unguessable, it's in the upload URL
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='audio_uploads')
+    podcast = models.ForeignKey(Podcast, on_delete=models.CASCADE, related_name='audio_uploads')
+    episode = models.ForeignKey(
+        Episode, on_delete=models.CASCADE, null=True, blank=True, related_name='audio_uploads',
+    ) # Set when replacing the audio of an existing episode
+    filename = models.CharField(max_length=255) # Client's file name, used for the final name
+    size = models.PositiveBigIntegerField() # Total bytes announced by the client
+    checksum = models.CharField(max_length=64) # Expected SHA-256 of the whole file, hex
+    received = models.PositiveBigIntegerField(default=0) # Bytes stored so far; the next chunk starts here
+    partial_path = models.CharField(max_length=1024) # Local file the chunks are written to
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True) # Last chunk; stale sessions are removed by reap_uploads
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['updated_at'], name='upload_session_updated_idx'), # reap_uploads
+        ]
+
+    def __str__(self):
+        return f"{self.filename} ({self.received}/{self.size})"
@@ -1,19 +1,34 @@
+import os
+import re
+
+from django.core.exceptions import SuspiciousFileOperation
+from django.utils import timezone
+from django.utils.text import get_valid_filename
 from rest_framework import serializers
-from .models import Episode
+from category.models import Podcast
+from category.serializers import PodcastSerializer
+from podcast.fieldsets import FieldsetSerializerMixin # ?fields= / ?expand=
+from podcast.projection import Projected # Column-based fast path for list responses
+from podcast.relations import ScopedPrimaryKeyRelatedField, owned_by_request_user # Parent looked up once per request
+from Users.serializers import UserSerializer
+from .models import AudioUploadSession, Episode
+from .uploads import get_upload_settings
 # You might need serializers for related models if you want nested data
 # from your_podcast_app_name.serializers import PodcastSerializer # If needed
 # from your_auth_app_name.serializers import UserSerializer # If needed
 
-class EpisodeSerializer(serializers.ModelSerializer):
+class EpisodeSerializer(FieldsetSerializerMixin, serializers.ModelSerializer):
     # Read-only fields to include in the output
     # user = UserSerializer(read_only=True) # Include creator details if needed
     # podcast = PodcastSerializer(read_only=True) # Include podcast details if needed
 
     # Writeable field to link the episode to a podcast by ID during creation
-    podcast_id = serializers.PrimaryKeyRelatedField(
-         queryset=Episode.objects.select_related('podcast__user').all().values_list('podcast', flat=True).distinct(), # Limit queryset to existing podcast IDs
+    # Only the requester's podcasts resolve (pk + user_id in one query); the view reuses the object
+    podcast_id = ScopedPrimaryKeyRelatedField(
+         queryset=Podcast.objects.all(), scope=owned_by_request_user,
          source='podcast', # Map this field to the 'podcast' ForeignKey
-         write_only=True
+         write_only=True,
+         error_messages={'does_not_exist': "You can only add or modify episodes for podcasts you own."},
     )
 
     # Custom field to handle the published status based on published_at
@@ -23,12 +38,23 @@ class EpisodeSerializer(serializers.ModelSerializer):
         model = Episode
         fields = (
             'id', 'podcast', 'podcast_id', 'user', 'title', 'audio_url',
-            'duration', 'show_notes', 'published_at', 'is_published',
+            'duration', 'bitrate', 'sample_rate', 'channels', 'show_notes', 'published_at', 'is_published',
             'created_at', 'updated_at'
         )
         # Mandatory: These fields are set by the system or view, not the client directly on create/update
-        read_only_fields = ('user', 'podcast', 'created_at', 'updated_at', 'is_published')
+        read_only_fields = ('user', 'podcast', 'created_at', 'updated_at', 'is_published', 'bitrate', 'sample_rate', 'channels')
         # Note: 'published_at' IS writeable initially for setting the status
+        # Same as Episode.is_published(), from the column (podcast/projection.py)
+        projected_fields = {
+            'is_published': Projected(
+                ['published_at'], lambda context, published_at: published_at is not None and published_at <= timezone.now()
+            ),
+        }
+        # ?expand=podcast / ?expand=user nest the objects instead of their ids (podcast/fieldsets.py)
+        expandable_fields = {
+            'podcast': lambda: PodcastSerializer(read_only=True),
+            'user': lambda: UserSerializer(read_only=True),
+        }
 
 
     def get_is_published(self, obj):
@@ -36,13 +62,8 @@ class EpisodeSerializer(serializers.ModelSerializer):
         return obj.is_published() # Use the model method
 
     def validate(self, data):
-         # Custom validation to ensure the authenticated user owns the podcast
-         # this episode is being added/updated for.
-         podcast = data.get('podcast') # Get the podcast object from validated data (via podcast_id)
-
-         # This validation is crucial for both create and update operations
-         if podcast and self.context['request'].user != podcast.user:
-              raise serializers.ValidationError("You can only add or modify episodes for podcasts you own.")
+         # Ownership of the podcast is checked by podcast_id itself: its lookup is scoped
+         # to the requester's podcasts, for both create and update operations
 
          # Validation for setting published_at
          published_at = data.get('published_at')
@@ -61,4 +82,41 @@ class EpisodeSerializer(serializers.ModelSerializer):
     def update(self, instance, validated_data):
          # Ownership check is handled in the validate method
          return super().update(instance, validated_data)
-     
\ No newline at end of file
+
+
+# --- Resumable uploads (episodes_app/uploads.py) ---
+
+class AudioUploadSessionSerializer(serializers.ModelSerializer):
+    episode = serializers.PrimaryKeyRelatedField(
+        queryset=Episode.objects.only('id', 'podcast_id'), required=False, allow_null=True,
+    ) # Replace this episode's audio instead of creating an episode on finalize
+
+    class Meta:
+        model = AudioUploadSession
+        fields = ('id', 'podcast', 'episode', 'filename', 'size', 'checksum', 'received', 'created_at', 'updated_at')
+        read_only_fields = ('id', 'podcast', 'received', 'created_at', 'updated_at')
+
+    def validate_filename(self, value):
+        try:
+            return get_valid_filename(os.path.basename(value)) # No directories from the client
+        except SuspiciousFileOperation:
+            raise serializers.ValidationError("Invalid file name.")
+
+    def validate_size(self, value):
+        if not 0 < value <= get_upload_settings()['MAX_SIZE']:
+            raise serializers.ValidationError(f"Size must be between 1 and {get_upload_settings()['MAX_SIZE']} bytes.")
+        return value
+
+    def validate_checksum(self, value):
+        value = value.lower()
+        if not re.fullmatch(r'[0-9a-f]{64}', value):
+            raise serializers.ValidationError("Expected a SHA-256 digest in hex.")
+        return value
+
+
+class EpisodeUploadSerializer(serializers.ModelSerializer):
+    """Episode fields sent with finalize; the audio comes from the upload session."""
+
+    class Meta:
+        model = Episode
+        fields = ('title', 'duration', 'show_notes', 'published_at')
@@ -0,0 +1,22 @@
+# In your Django app's signals.py
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from category.models import Podcast
+
+from .models import Episode
+from .visibility import invalidate_podcast_episodes
+
+
+@receiver(post_save, sender=Episode)
+@receiver(post_delete, sender=Episode)
+def invalidate_episode_caches(sender, instance, **kwargs):
+    # Cached public episode lists and the RSS feed
+    invalidate_podcast_episodes(instance.podcast_id)
+
+
+@receiver(post_save, sender=Podcast)
+@receiver(post_delete, sender=Podcast)
+def invalidate_podcast_caches(sender, instance, **kwargs):
+    invalidate_podcast_episodes(instance.pk)
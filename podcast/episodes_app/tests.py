@@ -1,3 +1,576 @@
-from django.test import TestCase
+import gzip
+import hashlib
+import os
+import time
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.admin.sites import site
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient, APIRequestFactory
+
+from category.models import ChangeMarker, Podcast
+from podcast.pagination import KeysetPagination
+from podcast.testing import TemporaryMediaMixin
+from Users.models import CustomUser
+from .management.commands.bench_audio_metadata import build_mp3, build_mp4, build_wav
+from . import feeds
+from .metadata import extract_metadata, probe
+from .models import AudioUploadSession, Episode
+
+
+@override_settings(EPISODE_LIST_CACHE={'TTL': 0}) # Both serializations, not one and a cache hit
+class EpisodeProjectionParityTests(TestCase):
+    """GET episode lists give the same JSON with and without the compiled serialization."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = CustomUser.objects.create_user(username='owner', email='owner@example.com', password='x')
+        cls.listener = CustomUser.objects.create_user(username='listener', email='listener@example.com', password='x')
+        cls.podcast = Podcast.objects.create(user=cls.owner, title='Show', description='d')
+        now = timezone.now()
+        for title, published_at, duration in (
+            ('Draft', None, None),
+            ('Scheduled', now + timedelta(days=1), 60),
+            ('Published', now - timedelta(days=1), 1800),
+            ('Older', now - timedelta(days=2), 0),
+        ):
+            # No file is written, only the name is stored
+            Episode.objects.create(
+                podcast=cls.podcast, user=cls.owner, title=title, duration=duration,
+                audio_url=f'episodes/podcast_{cls.podcast.pk}/{title.lower()}.mp3', published_at=published_at,
+            )
+        Episode.objects.create(podcast=cls.podcast, user=cls.owner, title='No audio', audio_url='')
+
+    def compare(self, user, params):
+        client = APIClient()
+        client.force_authenticate(user)
+        url = f'/api/podcasts/{self.podcast.pk}/episodes/'
+        fast = client.get(url, params)
+        with override_settings(FAST_READ_SERIALIZERS=False):
+            slow = client.get(url, params)
+        self.assertEqual(fast.status_code, 200)
+        self.assertEqual(fast.json(), slow.json(), params)
+        return fast.json()
+
+    def test_owner_sees_drafts(self):
+        data = self.compare(self.owner, {})
+        self.assertEqual(len(data['results']), 5)
+        self.assertEqual({row['title']: row['is_published'] for row in data['results']}['Scheduled'], False)
+
+    def test_listener_and_pages(self):
+        self.compare(self.listener, {})
+        self.compare(self.listener, {'expand': 'podcast,user', 'fields': 'id,title,podcast.title,user'})
+        first = self.compare(self.owner, {'page_size': 2})
+        cursor = first['next'].split('cursor=')[1].split('&')[0]
+        self.compare(self.owner, {'page_size': 2, 'cursor': cursor})
+
+
+class EpisodeConditionalGetTests(TestCase):
+    """ETags follow the rows each user may see (podcast/conditional.py)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = CustomUser.objects.create_user(username='owner', email='owner@example.com', password='x')
+        cls.listener = CustomUser.objects.create_user(username='listener', email='listener@example.com', password='x')
+        cls.podcast = Podcast.objects.create(user=cls.owner, title='Show', description='d')
+        Episode.objects.create(podcast=cls.podcast, user=cls.owner, title='Out', audio_url='a.mp3', published_at=timezone.now())
+        cls.draft = Episode.objects.create(podcast=cls.podcast, user=cls.owner, title='Draft', audio_url='b.mp3')
+
+    def setUp(self):
+        caches['default'].clear()
+        # Last-Modified never names the current second, so nothing in it could 304 yet
+        an_hour_ago = timezone.now() - timedelta(hours=1)
+        Podcast.objects.update(updated_at=an_hour_ago)
+        Episode.objects.update(updated_at=an_hour_ago)
+        Episode.objects.filter(title='Out').update(published_at=an_hour_ago)
+        ChangeMarker.objects.update(changed_at=an_hour_ago)
+
+    def get(self, user, url, etag=None):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.get(url, HTTP_IF_NONE_MATCH=etag) if etag else client.get(url)
+
+    def test_not_modified_until_a_visible_change(self):
+        url = f'/api/podcasts/{self.podcast.pk}/episodes/'
+        owner_etag = self.get(self.owner, url)['ETag']
+        listener_etag = self.get(self.listener, url)['ETag']
+        self.assertNotEqual(owner_etag, listener_etag)
+        self.assertEqual(self.get(self.owner, url, owner_etag).status_code, 304)
+
+        self.draft.title = 'Draft 2'
+        self.draft.save()
+        self.assertEqual(self.get(self.owner, url, owner_etag).status_code, 200)
+        self.assertEqual(self.get(self.listener, url, listener_etag).status_code, 304) # Drafts aren't theirs to see
+
+    def get_since(self, user, url, last_modified):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+
+    def test_if_modified_since_after_a_delete(self):
+        url = f'/api/podcasts/{self.podcast.pk}/episodes/'
+        last_modified = self.get(self.owner, url)['Last-Modified']
+        self.assertEqual(self.get_since(self.owner, url, last_modified).status_code, 304)
+        Episode.objects.filter(title='Out').delete() # Leaves Max(updated_at) where it was
+        response = self.get_since(self.owner, url, last_modified)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([episode['title'] for episode in response.data['results']], ['Draft'])
+
+    def test_if_modified_since_after_a_release(self):
+        url = f'/api/podcasts/{self.podcast.pk}/episodes/'
+        scheduled = Episode.objects.create(
+            podcast=self.podcast, user=self.owner, title='Soon', audio_url='c.mp3', published_at=timezone.now() + timedelta(hours=1),
+        )
+        last_modified = self.get(self.owner, url)['Last-Modified']
+        Episode.objects.filter(pk=scheduled.pk).update(published_at=timezone.now()) # Its time comes, the row isn't saved
+        self.assertEqual(self.get_since(self.owner, url, last_modified).status_code, 200)
+
+    def test_hidden_episode_has_no_etag(self):
+        response = self.get(self.listener, f'/api/episodes/{self.draft.pk}/')
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn('ETag', response)
+
+
+class KeysetPaginationTests(TestCase):
+    """Cursor pages of the episode list, ordered -published_at, -created_at, -id (podcast/pagination.py)."""
+
+    def setUp(self):
+        self.owner = CustomUser.objects.create_user(username='owner', email='owner@example.com', password='x')
+        podcast = Podcast.objects.create(user=self.owner, title='Show', description='d')
+        earlier = timezone.now() - timedelta(days=1)
+        for title, published_at in (
+            ('tie 1', earlier), ('tie 2', earlier), ('draft 1', None), ('newest', timezone.now()), ('draft 2', None),
+        ):
+            Episode.objects.create(podcast=podcast, user=self.owner, title=title, audio_url='a.mp3', published_at=published_at)
+        Episode.objects.update(created_at=earlier) # Ties on the first two columns, id decides
+        self.url = f'/api/podcasts/{podcast.pk}/episodes/'
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def page(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return [episode['title'] for episode in response.data['results']], response.data['next'], response.data['previous']
+
+    def test_walk_forward_and_back(self):
+        # Drafts (NULL published_at) sort as the smallest value: last in a descending order
+        expected = ['newest', 'tie 2', 'tie 1', 'draft 2', 'draft 1']
+        pages, previous_links = [], []
+        titles, next_link, previous = self.page(self.url, page_size=2)
+        self.assertIsNone(previous)
+        pages.append(titles)
+        while next_link:
+            titles, next_link, previous = self.page(next_link)
+            pages.append(titles)
+            previous_links.append(previous)
+        self.assertEqual(pages, [expected[0:2], expected[2:4], expected[4:]])
+
+        titles, _, previous = self.page(previous_links[-1]) # Back from the last page
+        self.assertEqual(titles, expected[2:4])
+        titles, next_link, previous = self.page(previous)
+        self.assertEqual(titles, expected[0:2])
+        self.assertIsNone(previous)
+        self.assertEqual(self.page(next_link)[0], expected[2:4])
+
+    def test_invalid_cursor(self):
+        encode = KeysetPagination().encode_cursor
+        for cursor in ('not a cursor', encode([1, 2], False), encode(['yesterday', None, 1], False)):
+            response = self.client.get(self.url, {'cursor': cursor})
+            self.assertEqual(response.status_code, 400, cursor)
+            self.assertIn('cursor', response.data)
+
+
+class EpisodeAudioRangeTests(TemporaryMediaMixin, TestCase):
+    """GET /api/episodes/<pk>/audio/ with Range headers (episodes_app/audio.py)."""
+
+    def setUp(self):
+        super().setUp()
+        self.data = bytes(range(256)) * 40
+        os.makedirs(os.path.join(self.media_root, 'episodes'))
+        with open(os.path.join(self.media_root, 'episodes', 'a.mp3'), 'wb') as handle:
+            handle.write(self.data)
+        owner = CustomUser.objects.create_user(username='owner', email='owner@example.com', password='x')
+        podcast = Podcast.objects.create(user=owner, title='Show', description='d')
+        self.episode = Episode.objects.create(podcast=podcast, user=owner, title='Out', audio_url='episodes/a.mp3', published_at=timezone.now())
+        self.client = APIClient()
+        self.client.force_authenticate(owner)
+        self.url = f'/api/episodes/{self.episode.pk}/audio/'
+
+    def test_ranges(self):
+        full = self.client.get(self.url)
+        self.assertEqual((full.status_code, b''.join(full.streaming_content)), (200, self.data))
+        self.assertEqual(full['Accept-Ranges'], 'bytes')
+
+        part = self.client.get(self.url, HTTP_RANGE='bytes=100-199')
+        self.assertEqual(part.status_code, 206)
+        self.assertEqual(part['Content-Range'], f'bytes 100-199/{len(self.data)}')
+        self.assertEqual(b''.join(part.streaming_content), self.data[100:200])
+
+        suffix = self.client.get(self.url, HTTP_RANGE='bytes=-10')
+        self.assertEqual(b''.join(suffix.streaming_content), self.data[-10:])
+
+        multi = self.client.get(self.url, HTTP_RANGE='bytes=0-9,500-509')
+        body = b''.join(multi.streaming_content)
+        self.assertTrue(multi['Content-Type'].startswith('multipart/byteranges'))
+        self.assertEqual(int(multi['Content-Length']), len(body))
+        self.assertIn(self.data[500:510], body)
+
+        self.assertEqual(self.client.get(self.url, HTTP_RANGE=f'bytes={len(self.data)}-').status_code, 416)
+        stale = self.client.get(self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(stale.status_code, 200)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=full['ETag']).status_code, 304)
+
+
+class AudioUploadTests(TemporaryMediaMixin, TestCase):
+    """Resumable uploads: chunks, resume, checksum, finalize (episodes_app/uploads.py)."""
+
+    def setUp(self):
+        super().setUp()
+        self.owner = CustomUser.objects.create_user(username='owner', email='owner@example.com', password='x')
+        self.podcast = Podcast.objects.create(user=self.owner, title='Show', description='d')
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+        self.data = os.urandom(300_000)
+
+    def start(self, data, **extra):
+        response = self.client.post(f'/api/podcasts/{self.podcast.pk}/uploads/', {
+            'filename': '../My Show.mp3', 'size': len(data), 'checksum': hashlib.sha256(data).hexdigest(), **extra,
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        return f"/api/uploads/{response.json()['id']}/"
+
+    def put(self, url, start, chunk):
+        return self.client.generic(
+            'PUT', url, chunk, content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes {start}-{start + len(chunk) - 1}/{len(self.data)}',
+        )
+
+    def test_chunks_and_finalize(self):
+        url = self.start(self.data)
+        self.assertEqual(self.put(url, 0, self.data[:100_000]).json()['received'], 100_000)
+        conflict = self.put(url, 0, self.data[:100_000]) # Already stored: resume from 'received'
+        self.assertEqual((conflict.status_code, conflict.json()['received']), (409, 100_000))
+        self.assertEqual(self.client.post(url + 'finalize/', {'title': 'Ep'}).status_code, 409) # Not complete yet
+        self.put(url, 100_000, self.data[100_000:])
+        self.assertEqual(self.client.get(url).json()['received'], len(self.data))
+
+        response = self.client.post(url + 'finalize/', {'title': 'Ep'}, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        episode = Episode.objects.get(pk=response.json()['id'])
+        digest = hashlib.sha256(self.data).hexdigest()
+        self.assertEqual(episode.audio_url.name, f'cas/{digest[:2]}/{digest[2:4]}/{digest}.mp3') # Stored by content
+        with episode.audio_url.open('rb') as handle:
+            self.assertEqual(handle.read(), self.data)
+        self.assertFalse(AudioUploadSession.objects.exists())
+        self.assertEqual(os.listdir(episode.audio_url.storage.path(f'episodes/podcast_{self.podcast.pk}')), []) # No partial left
+
+    def test_checksum_mismatch_restarts(self):
+        url = self.start(self.data)
+        self.put(url, 0, self.data[:-1] + b'x')
+        response = self.client.post(url + 'finalize/', {'title': 'Ep'}, format='json')
+        self.assertEqual((response.status_code, response.json()['received']), (400, 0))
+        self.put(url, 0, self.data)
+        self.assertEqual(self.client.post(url + 'finalize/', {'title': 'Ep'}, format='json').status_code, 201)
+
+    def test_replace_audio_of_episode(self):
+        episode = Episode.objects.create(podcast=self.podcast, user=self.owner, title='Ep', audio_url='old.mp3')
+        url = self.start(self.data, episode=episode.pk)
+        self.put(url, 0, self.data)
+        response = self.client.post(url + 'finalize/', {}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        episode.refresh_from_db()
+        self.assertEqual((episode.title, episode.audio_url.size), ('Ep', len(self.data)))
+
+    def test_other_users_cannot_upload(self):
+        stranger = CustomUser.objects.create_user(username='stranger', email='stranger@example.com', password='x')
+        url = self.start(self.data)
+        self.client.force_authenticate(stranger)
+        self.assertEqual(self.put(url, 0, self.data).status_code, 404)
+        response = self.client.post(f'/api/podcasts/{self.podcast.pk}/uploads/', {
+            'filename': 'a.mp3', 'size': 1, 'checksum': '0' * 64,
+        }, format='json')
+        self.assertEqual(response.status_code, 403)
+
+
+class AudioMetadataTests(TemporaryMediaMixin, TestCase):
+    """Header-only probing of MP3/WAV/M4A files (episodes_app/metadata.py)."""
+
+    def setUp(self):
+        super().setUp()
+
+    def probe_file(self, build, *args, **kwargs):
+        path = os.path.join(self.media_root, 'audio')
+        expected = build(path, *args, **kwargs)
+        with open(path, 'rb') as handle:
+            return expected, probe(handle)
+
+    def test_formats(self):
+        for build, kwargs, rate, channels in (
+            (build_mp3, {'kind': 'cbr'}, 44100, 2),
+            (build_mp3, {'kind': 'xing', 'mono': True}, 44100, 1),
+            (build_mp3, {'kind': 'vbri', 'bitrate': 64000}, 44100, 2),
+            (build_wav, {'sample_rate': 48000, 'channels': 1}, 48000, 1),
+            (build_mp4, {'moov_last': True}, 44100, 2),
+            (build_mp4, {'moov_last': False, 'sample_rate': 22050}, 22050, 2),
+        ):
+            expected, info = self.probe_file(build, 1234.5, **kwargs)
+            self.assertAlmostEqual(info['duration'], expected, delta=0.05, msg=(build.__name__, kwargs))
+            self.assertEqual((info['sample_rate'], info['channels']), (rate, channels), (build.__name__, kwargs))
+            self.assertTrue(info['bitrate'])
+        self.assertAlmostEqual(self.probe_file(build_mp3, 600, kind='xing')[1]['bitrate'], 128000, delta=500)
+
+    def test_unknown_file(self):
+        path = os.path.join(self.media_root, 'notes.txt')
+        with open(path, 'wb') as handle:
+            handle.write(b'not audio' * 1000)
+        with open(path, 'rb') as handle:
+            self.assertIsNone(probe(handle))
+
+    def test_extract_fills_duration_and_counters(self):
+        owner = CustomUser.objects.create_user(username='owner', email='owner@example.com', password='x')
+        podcast = Podcast.objects.create(user=owner, title='Show', description='d')
+        os.makedirs(os.path.join(self.media_root, 'episodes'))
+        build_mp3(os.path.join(self.media_root, 'episodes', 'a.mp3'), 1800, 'xing')
+        episode = Episode.objects.create(
+            podcast=podcast, user=owner, title='Out', audio_url='episodes/a.mp3', published_at=timezone.now(),
+        )
+        given = Episode.objects.create(podcast=podcast, user=owner, title='Given', audio_url='episodes/a.mp3', duration=10)
+
+        self.assertTrue(extract_metadata(episode.pk))
+        self.assertFalse(extract_metadata(episode.pk)) # Already probed for this file
+        extract_metadata(given.pk)
+        episode.refresh_from_db()
+        given.refresh_from_db()
+        podcast.refresh_from_db()
+        self.assertEqual((episode.duration, episode.sample_rate, episode.channels), (1800, 44100, 2))
+        self.assertEqual((given.duration, given.channels), (10, 2)) # The client's duration is kept
+        self.assertEqual(podcast.total_duration, 1800)
+
+        episode.audio_url = 'episodes/b.mp3' # New file: the old values no longer apply
+        episode.save()
+        self.assertEqual((episode.duration, episode.bitrate, episode.audio_probed), (None, None, ''))
+
+
+class OrphanedMediaTests(TemporaryMediaMixin, TestCase):
+    """collect_orphaned_media keeps referenced and recent files and removes the rest (podcast/media_gc.py)."""
+
+    def setUp(self):
+        super().setUp()
+        self.owner = CustomUser.objects.create_user(username='owner', email='owner@example.com', password='x')
+        self.podcast = Podcast.objects.create(user=self.owner, title='Show', description='d', image='cas/aa/bb/cover.png')
+        Episode.objects.create(podcast=self.podcast, user=self.owner, title='Kept', audio_url='episodes/podcast_1/kept.mp3')
+        gone = Episode.objects.create(podcast=self.podcast, user=self.owner, title='Gone', audio_url='episodes/podcast_1/gone.mp3')
+        Episode.objects.filter(pk=gone.pk).delete() # Queryset delete: the file stays
+        self.session = AudioUploadSession.objects.create(
+            podcast=self.podcast, user=self.owner, filename='a.mp3', size=10,
+            partial_path=os.path.join(self.media_root, 'episodes/podcast_1/.upload-live.part'),
+        )
+        old = time.time() - 2 * 86400
+        for name in (
+            'cas/aa/bb/cover.png', 'cas/aa/bb/cover_small.jpg', 'cas/aa/bb/other_small.jpg', 'cas/tmp/tmpabc',
+            'episodes/podcast_1/kept.mp3', 'episodes/podcast_1/gone.mp3',
+            'episodes/podcast_1/.upload-live.part', 'episodes/podcast_1/.upload-dead.part', 'podcasts/user_1/old.png',
+        ):
+            self.write(name, old)
+        self.write('episodes/podcast_1/new.mp3', time.time()) # Possibly a row that isn't committed yet
+
+    def write(self, name, mtime):
+        path = os.path.join(self.media_root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as handle:
+            handle.write(b'x' * 100)
+        os.utime(path, (mtime, mtime))
+
+    def remaining(self):
+        return sorted(
+            os.path.relpath(os.path.join(directory, name), self.media_root)
+            for directory, _, names in os.walk(self.media_root) for name in names
+        )
+
+    def test_orphans_removed(self):
+        out = StringIO()
+        call_command('collect_orphaned_media', '--dry-run', '--batch-size', '3', stdout=out)
+        self.assertIn('5 orphans would be removed', out.getvalue())
+        self.assertEqual(len(self.remaining()), 10)
+
+        call_command('collect_orphaned_media', '--batch-size', '3', stdout=out)
+        self.assertEqual(self.remaining(), [
+            'cas/aa/bb/cover.png', 'cas/aa/bb/cover_small.jpg',
+            'episodes/podcast_1/.upload-live.part', 'episodes/podcast_1/kept.mp3', 'episodes/podcast_1/new.mp3',
+        ])
+        self.assertIn('5 orphans deleted', out.getvalue())
+
+    def test_quarantine(self):
+        call_command('collect_orphaned_media', '--quarantine', 'orphans', stdout=StringIO())
+        self.assertIn('orphans/episodes/podcast_1/gone.mp3', self.remaining())
+        self.assertNotIn('episodes/podcast_1/gone.mp3', self.remaining())
+        with override_settings(MEDIA_GC={'QUARANTINE_TTL': 0}):
+            call_command('collect_orphaned_media', '--quarantine', 'orphans', stdout=StringIO())
+        self.assertFalse([name for name in self.remaining() if name.startswith('orphans/')])
+
+
+@override_settings(EPISODE_AUDIO_METADATA={'MAX_PENDING': 0}) # No background probes of the (missing) files on commit
+class PodcastFeedTests(TestCase):
+    """Cached RSS feed: visibility, conditional GET, incremental rebuilds (episodes_app/feeds.py)."""
+
+    def setUp(self):
+        caches['default'].clear() # Feeds are cached by podcast id, which the test database reuses
+        self.owner = CustomUser.objects.create_user(username='owner', email='owner@example.com', password='x')
+        self.podcast = Podcast.objects.create(user=self.owner, title='Show & Tell', description='d')
+        now = timezone.now()
+        self.episode = Episode.objects.create(
+            podcast=self.podcast, user=self.owner, title='Published', audio_url='episodes/a.mp3',
+            duration=90, published_at=now - timedelta(days=1),
+        )
+        Episode.objects.create(podcast=self.podcast, user=self.owner, title='Draft', audio_url='episodes/b.mp3')
+        Episode.objects.create(podcast=self.podcast, user=self.owner, title='No audio', published_at=now - timedelta(days=1))
+        self.client = APIClient()
+        self.url = f'/api/podcasts/{self.podcast.pk}/feed.xml'
+
+    def feed(self, **headers):
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip', **headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        return response, gzip.decompress(response.content).decode()
+
+    def test_published_episodes_only(self):
+        response, body = self.feed()
+        self.assertEqual(response['Content-Type'], 'application/rss+xml; charset=utf-8')
+        self.assertIn('<title>Show &amp; Tell</title>', body)
+        self.assertIn('<itunes:duration>90</itunes:duration>', body)
+        self.assertIn('<enclosure length="0" type="audio/mpeg" url="http://testserver/media/episodes/a.mp3"', body)
+        self.assertNotIn('Draft', body)
+        self.assertNotIn('No audio', body)
+
+        plain = self.client.get(self.url)
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertEqual(plain.content.decode(), body)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.assertEqual(self.client.get('/api/podcasts/999999/feed.xml').status_code, 404)
+
+    def test_changes_rebuild_only_their_items(self):
+        response, _ = self.feed()
+        with self.captureOnCommitCallbacks(execute=True):
+            second = Episode.objects.create(
+                podcast=self.podcast, user=self.owner, title='Second', audio_url='episodes/c.mp3', published_at=timezone.now(),
+            )
+        _, body = self.feed()
+        self.assertLess(body.index('Second'), body.index('Published')) # Newest first
+        self.assertEqual(feeds.get_feed(self.podcast.pk, 'http://testserver/')['rendered'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.episode.title = 'Renamed'
+            self.episode.save()
+        updated, body = self.feed(HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertIn('Renamed', body)
+        self.assertNotEqual(updated['ETag'], response['ETag'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertNotIn('Second', self.feed()[1])
+
+    def test_scheduled_episode_appears_when_due(self):
+        Episode.objects.create(
+            podcast=self.podcast, user=self.owner, title='Scheduled', audio_url='episodes/d.mp3',
+            published_at=timezone.now() + timedelta(seconds=1),
+        )
+        self.assertNotIn('Scheduled', self.feed()[1])
+        time.sleep(1.1)
+        self.assertIn('Scheduled', self.feed()[1]) # No save happened, the cached feed expired
+
+
+@override_settings(EPISODE_AUDIO_METADATA={'MAX_PENDING': 0}) # No background probes of the (missing) files on commit
+class EpisodeListCacheTests(TestCase):
+    """Public episode lists are cached until the next scheduled release (episodes_app/visibility.py)."""
+
+    def setUp(self):
+        caches['default'].clear() # Pages are cached by podcast id, which the test database reuses
+        self.owner = CustomUser.objects.create_user(username='owner', email='owner@example.com', password='x')
+        self.listener = CustomUser.objects.create_user(username='listener', email='listener@example.com', password='x')
+        self.podcast = Podcast.objects.create(user=self.owner, title='Show', description='d')
+        Episode.objects.create(podcast=self.podcast, user=self.owner, title='Out', audio_url='a.mp3', published_at=timezone.now())
+        self.draft = Episode.objects.create(podcast=self.podcast, user=self.owner, title='Draft', audio_url='b.mp3')
+        self.url = f'/api/podcasts/{self.podcast.pk}/episodes/'
+
+    def titles(self, user, **headers):
+        client = APIClient()
+        client.force_authenticate(user)
+        return [episode['title'] for episode in client.get(self.url, **headers).data['results']]
+
+    def test_hit_needs_no_query(self):
+        self.assertEqual(self.titles(self.listener), ['Out'])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.titles(self.listener), ['Out'])
+        self.assertEqual(self.titles(self.owner), ['Out', 'Draft']) # Not the cached page
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.draft.published_at = timezone.now()
+            self.draft.save()
+        self.assertEqual(self.titles(self.listener), ['Draft', 'Out'])
+
+    def test_scheduled_episode_appears_when_due(self):
+        Episode.objects.create(
+            podcast=self.podcast, user=self.owner, title='Scheduled', audio_url='c.mp3',
+            published_at=timezone.now() + timedelta(seconds=1),
+        )
+        self.assertEqual(self.titles(self.listener), ['Out'])
+        time.sleep(1.1)
+        self.assertEqual(self.titles(self.listener), ['Scheduled', 'Out']) # No write happened
+
+    def test_admin_actions_invalidate(self):
+        self.titles(self.listener)
+        request = APIRequestFactory().post('/admin/')
+        request._messages = CookieStorage(request)
+        with self.captureOnCommitCallbacks(execute=True):
+            site._registry[Episode].make_published(request, Episode.objects.filter(pk=self.draft.pk))
+        self.assertEqual(self.titles(self.listener), ['Draft', 'Out'])
+        self.podcast.refresh_from_db()
+        self.assertEqual(self.podcast.published_episode_count, 2) # Counters follow too
+
+        with self.captureOnCommitCallbacks(execute=True):
+            site._registry[Episode].make_draft(request, Episode.objects.filter(pk=self.draft.pk))
+        self.assertEqual(self.titles(self.listener), ['Out'])
+
+
+@override_settings(EPISODE_AUDIO_METADATA={'MAX_PENDING': 0}) # No background probes on commit
+class EpisodeCreateTests(TemporaryMediaMixin, TestCase):
+    """The podcast is looked up once, scoped to the owner (podcast/relations.py)."""
+
+    def setUp(self):
+        super().setUp()
+        self.owner = CustomUser.objects.create_user(username='owner', email='owner@example.com', password='x')
+        self.stranger = CustomUser.objects.create_user(username='stranger', email='stranger@example.com', password='x')
+        self.podcast = Podcast.objects.create(user=self.owner, title='Show', description='d')
+        self.other = Podcast.objects.create(user=self.stranger, title='Other', description='d')
+
+    def create(self, user, url_podcast, podcast_id):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.post(f'/api/podcasts/{url_podcast}/episodes/', {
+            'podcast_id': podcast_id, 'title': 'Ep', 'audio_url': SimpleUploadedFile('ep.mp3', b'ID3' + b'\0' * 64),
+        }, format='multipart')
+
+    def test_one_podcast_lookup(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.create(self.owner, self.podcast.pk, self.podcast.pk)
+        self.assertEqual(response.status_code, 201, response.content)
+        lookups = [q['sql'] for q in queries if q['sql'].startswith('SELECT') and 'FROM "category_podcast"' in q['sql']]
+        self.assertEqual(len(lookups), 1, lookups)
+        self.assertIn('"user_id" =', lookups[0]) # Ownership is part of the lookup
+        self.assertEqual(Episode.objects.get(pk=response.data['id']).podcast, self.podcast)
+
+    def test_other_users_podcasts(self):
+        response = self.create(self.stranger, self.podcast.pk, self.podcast.pk)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['podcast_id'], ["You can only add or modify episodes for podcasts you own."])
+        self.assertEqual(self.create(self.stranger, self.podcast.pk, self.other.pk).status_code, 403) # Their podcast_id, your URL
+        self.assertEqual(self.create(self.stranger, 0, self.other.pk).status_code, 404)
+        self.assertFalse(Episode.objects.exists())
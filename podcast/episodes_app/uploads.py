@@ -0,0 +1,178 @@
+# In your Django app's uploads.py
+# Resumable episode audio uploads, for files too big to send in one multipart request:
+#   POST   /api/podcasts/<pk>/uploads/      {filename, size, checksum (SHA-256 hex), episode?} -> session
+#   PUT    /api/uploads/<id>/               raw bytes, Content-Range: bytes <start>-<end>/<size>
+#   GET    /api/uploads/<id>/               progress; resume from `received` after a dropped connection
+#   POST   /api/uploads/<id>/finalize/      episode fields -> checksum verified, episode created/updated
+#   DELETE /api/uploads/<id>/               cancel
+# Chunks are read from the request stream in BUFFER_SIZE pieces and written with pwrite() into a
+# partial file in the episode's upload directory, so memory per upload stays constant and
+# finalizing is a hard link, not a copy. Bytes that arrived before a connection dropped are kept.
+
+import contextlib
+import fcntl
+import hashlib
+import os
+import re
+import tempfile
+
+from django.conf import settings
+from django.core.files import File
+from django.http import Http404
+from django.utils import timezone
+
+from .models import AudioUploadSession, Episode
+
+# Defaults, override with EPISODE_UPLOADS in settings.py
+DEFAULT_EPISODE_UPLOADS = {
+    'MAX_SIZE': 2 * 1024 ** 3, # Bytes per file
+    'MAX_CHUNK_SIZE': 64 * 1024 * 1024, # Bytes per PUT
+    'BUFFER_SIZE': 256 * 1024, # Bytes read from the request (and hashed on finalize) at a time
+    'SESSION_TTL': 24 * 3600, # Seconds since the last chunk before reap_uploads removes a session
+    'TEMP_DIR': None, # Partial files for storages without local paths; None is the system temp dir
+}
+
+CONTENT_RANGE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+PARTIAL_PREFIX = '.upload-' # Partial files are hidden: .upload-<session id>.part
+
+
+def get_upload_settings():
+    return {**DEFAULT_EPISODE_UPLOADS, **getattr(settings, 'EPISODE_UPLOADS', {})}
+
+
+class UploadConflict(Exception):
+    """The chunk doesn't start where the stored data ends, or another request holds the session."""
+
+    def __init__(self, message, received):
+        super().__init__(message)
+        self.received = received
+
+
+def audio_storage():
+    return Episode._meta.get_field('audio_url').storage
+
+
+def final_name(session):
+    """Storage name the finished file is meant to get, from episode_audio_upload_path."""
+    field = Episode._meta.get_field('audio_url')
+    return field.generate_filename(Episode(podcast=session.podcast), session.filename)
+
+
+def partial_path_for(session):
+    """Beside the final file when the storage is local, so finalizing is a rename."""
+    name = f'{PARTIAL_PREFIX}{session.pk}.part'
+    try:
+        directory = os.path.dirname(audio_storage().path(final_name(session)))
+    except NotImplementedError:
+        directory = get_upload_settings()['TEMP_DIR'] or tempfile.gettempdir()
+    return os.path.join(directory, name)
+
+
+def parse_content_range(header, size):
+    """'bytes 0-1048575/5242880' -> (start, length), or None if malformed or not for this file."""
+    match = CONTENT_RANGE.match(header or '')
+    if not match:
+        return None
+    start, end, total = map(int, match.groups())
+    if total != size or start > end or end >= size:
+        return None
+    return start, end - start + 1
+
+
+@contextlib.contextmanager
+def locked_partial(session):
+    """The partial file, opened for writing and locked against concurrent PUTs and finalize."""
+    os.makedirs(os.path.dirname(session.partial_path), exist_ok=True)
+    fd = os.open(session.partial_path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise UploadConflict("Another request is writing to this upload.", session.received)
+        # Re-read under the lock, a request that just finished may have moved it (or finalized the upload)
+        received = AudioUploadSession.objects.filter(pk=session.pk).values_list('received', flat=True).first()
+        if received is None:
+            discard_partial(session.partial_path)
+            raise Http404("Upload session not found.")
+        session.received = received
+        yield fd
+    finally:
+        os.close(fd) # Also releases the lock
+
+
+def receive_chunk(session, stream, start, length):
+    """
+    Writes `length` bytes from `stream` at `start` and records how many arrived. Returns the
+    new `received`; less than start + length means the client went away mid-chunk.
+    """
+    buffer_size = get_upload_settings()['BUFFER_SIZE']
+    with locked_partial(session) as fd:
+        if start != session.received:
+            raise UploadConflict(f"Expected a chunk starting at byte {session.received}.", session.received)
+        position, remaining = start, length
+        while remaining:
+            data = stream.read(min(buffer_size, remaining))
+            if not data:
+                break
+            view = memoryview(data)
+            while view:
+                written = os.pwrite(fd, view, position)
+                view = view[written:]
+                position += written
+            remaining -= len(data)
+        os.ftruncate(fd, position) # Drops bytes an earlier, unacknowledged attempt left beyond this point
+        # No fsync: the checksum on finalize catches anything lost in a crash
+        AudioUploadSession.objects.filter(pk=session.pk, received=start).update(
+            received=position, updated_at=timezone.now(),
+        )
+        session.received = position
+    return position
+
+
+def file_sha256(fd, buffer_size):
+    digest = hashlib.sha256()
+    position = 0
+    while True:
+        data = os.pread(fd, buffer_size, position)
+        if not data:
+            return digest.hexdigest()
+        digest.update(data)
+        position += len(data)
+
+
+def verify_upload(session, fd):
+    """True if the stored bytes match the announced checksum; otherwise the upload restarts from 0."""
+    if file_sha256(fd, get_upload_settings()['BUFFER_SIZE']) == session.checksum:
+        return True
+    os.ftruncate(fd, 0)
+    AudioUploadSession.objects.filter(pk=session.pk).update(received=0, updated_at=timezone.now())
+    session.received = 0
+    return False
+
+
+def store_upload(session):
+    """Moves the verified partial file to a free name under episode_audio_upload_path, returns that name."""
+    storage = audio_storage()
+    name = final_name(session)
+    if hasattr(storage, 'adopt'):
+        return storage.adopt(session.partial_path, session.checksum, name) # Content-addressed, already hashed
+    try:
+        storage.path(name)
+    except NotImplementedError:
+        with open(session.partial_path, 'rb') as handle:
+            name = storage.save(name, File(handle)) # Remote storage, streamed in chunks
+        os.remove(session.partial_path)
+        return name
+    while True:
+        name = storage.get_available_name(name)
+        try:
+            os.link(session.partial_path, storage.path(name)) # Fails instead of overwriting a file that just appeared
+        except FileExistsError:
+            continue
+        os.remove(session.partial_path)
+        return name
+
+
+def discard_partial(path):
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(path)
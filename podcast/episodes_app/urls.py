@@ -1,9 +1,18 @@
 from django.urls import path
-from .views import EpisodeListCreateView, EpisodeDetailView
+from .views import (
+    AudioUploadCreateView, AudioUploadFinalizeView, AudioUploadView, EpisodeAudioView, EpisodeListCreateView, EpisodeDetailView,
+    PodcastFeedView,
+)
 
 urlpatterns = [
     # Episodes nested under a specific podcast
     # <int:podcast_pk> captures the primary key of the podcast from the URL
     path('podcasts/<int:podcast_pk>/episodes/', EpisodeListCreateView.as_view(), name='episode-list-create'),
+    path('podcasts/<int:podcast_pk>/feed.xml', PodcastFeedView.as_view(), name='podcast-feed'), # Public RSS feed, cached
     path('episodes/<int:pk>/', EpisodeDetailView.as_view(), name='episode-detail'), # Detail view for a specific episode by its own ID
+    path('episodes/<int:pk>/audio/', EpisodeAudioView.as_view(), name='episode-audio'), # Audio with Range support
+    # Resumable chunked audio uploads (episodes_app/uploads.py)
+    path('podcasts/<int:podcast_pk>/uploads/', AudioUploadCreateView.as_view(), name='audio-upload-create'),
+    path('uploads/<uuid:pk>/', AudioUploadView.as_view(), name='audio-upload'),
+    path('uploads/<uuid:pk>/finalize/', AudioUploadFinalizeView.as_view(), name='audio-upload-finalize'),
 ]
\ No newline at end of file
@@ -5,15 +5,40 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny # Permissions
 from rest_framework.parsers import MultiPartParser, FormParser # To handle file uploads
+from rest_framework.exceptions import NotFound
+from rest_framework.negotiation import BaseContentNegotiation
+from category.changes import episodes_key, last_changed # Deletions don't move any updated_at
 from category.models import Podcast # Import Podcast model to get the parent object
+from django.http import Http404
 from django.shortcuts import get_object_or_404 # To retrieve the podcast or return 404
-from .models import Episode # Import Episode model
-from .serializers import EpisodeSerializer # Import Episode serializer
+from django.db import transaction
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date
+from podcast.conditional import ConditionalGetMixin # ETag / Last-Modified, 304 without a full fetch
+from podcast.pagination import KeysetPagination # Cursor pagination matching Episode.Meta.ordering
+from podcast.projection import ProjectedListMixin, ProjectedRetrieveMixin # Reads fetch only the serialized columns
+from podcast.relations import owned_by_request_user, resolve_related # Podcast shared with EpisodeSerializer.podcast_id
+from .audio import serve_audio # Range requests, sendfile / X-Accel-Redirect
+from . import feeds # Cached, pre-gzipped RSS feeds
+from . import visibility # Cached public episode lists
+from .models import AudioUploadSession, Episode # Import Episode model
+from .serializers import AudioUploadSessionSerializer, EpisodeSerializer, EpisodeUploadSerializer # Import Episode serializer
+from . import uploads # Resumable chunked audio uploads
+
+
+def release_aggregates():
+    # is_published flips when a scheduled episode's time comes, without the row changing:
+    # the count changes the ETag, the newest release moves Last-Modified
+    released = Q(published_at__lte=timezone.now())
+    return {'released': Count('pk', filter=released), 'released_at': Max('published_at', filter=released)}
+
 
 # --- Episode Management (Linked to a Podcast - User Ownership) ---
 
 # View to list episodes for a specific podcast and create new episodes for it
-class EpisodeListCreateView(generics.ListCreateAPIView):
+class EpisodeListCreateView(ConditionalGetMixin, ProjectedListMixin, generics.ListCreateAPIView):
     serializer_class = EpisodeSerializer
     # Mandatory: Only authenticated users can create episodes
     # Listing might be public, or restricted depending on requirements.
@@ -21,6 +46,37 @@ class EpisodeListCreateView(generics.ListCreateAPIView):
     permission_classes = [IsAuthenticated] # Restrict creation to authenticated users
     # Add parsers for file uploads (audio)
     parser_classes = [MultiPartParser, FormParser]
+    # Same order as Episode.Meta.ordering plus id as a tiebreaker (episode_podcast_published_idx)
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-published_at', '-created_at', '-id')
+
+    def get_conditional_aggregates(self):
+        return release_aggregates() # get_queryset() applies the visibility rules
+
+    def get_conditional_changes(self):
+        # Episodes deleted or unpublished leave no row behind; podcast edits show in every episode
+        return (self.podcast_updated_at, last_changed(episodes_key(self.kwargs['podcast_pk'])))
+
+    def get(self, request, *args, **kwargs):
+        # Non-owners all see the same public pages: served from the cache until the next scheduled release
+        if 'expand' in request.query_params:
+            return super().get(request, *args, **kwargs)
+        podcast_pk = self.kwargs['podcast_pk']
+        key, entry = visibility.get_cached_page(podcast_pk, request.build_absolute_uri())
+        if entry is not None and entry['owner_id'] != request.user.pk:
+            response = get_conditional_response(request, etag=entry['etag'], last_modified=entry['last_modified'])
+            if response is None:
+                response = Response(entry['data'])
+            response['ETag'] = entry['etag']
+            if entry['last_modified'] is not None:
+                response['Last-Modified'] = http_date(entry['last_modified'])
+            return response
+
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == 200 and self.podcast_owner_id != request.user.pk:
+            last_modified = parse_http_date(response['Last-Modified']) if response.has_header('Last-Modified') else None
+            visibility.cache_page(key, podcast_pk, self.podcast_owner_id, response.data, response['ETag'], last_modified)
+        return response
 
     def get_queryset(self):
         """
@@ -29,14 +85,16 @@ class EpisodeListCreateView(generics.ListCreateAPIView):
         Show all episodes (including drafts) to the podcast owner.
         """
         podcast_pk = self.kwargs['podcast_pk'] # Get podcast_pk from URL
-        podcast = get_object_or_404(Podcast.objects.select_related('user'), pk=podcast_pk) # Get the podcast object, eager load user
+        podcast = get_object_or_404(Podcast.objects.only('id', 'user_id', 'updated_at'), pk=podcast_pk) # Only what the checks below need
+        self.podcast_owner_id = podcast.user_id # Public pages are cached for everyone else, see get()
+        self.podcast_updated_at = podcast.updated_at # Part of Last-Modified, see get_conditional_changes()
 
-        # Mandatory: Filter episodes
-        queryset = Episode.objects.filter(podcast=podcast).select_related('user', 'podcast') # Filter by podcast, eager load
+        # Mandatory: Filter episodes; the columns (and joins) come from the serializer, see podcast/projection.py
+        queryset = Episode.objects.filter(podcast=podcast)
 
         user = self.request.user
         # Check if the requesting user is authenticated and is the owner of the podcast
-        if user.is_authenticated and user == podcast.user:
+        if user.is_authenticated and user.pk == podcast.user_id:
              # Owner can see all episodes (published or draft)
              return queryset
         else:
@@ -49,25 +107,39 @@ class EpisodeListCreateView(generics.ListCreateAPIView):
         Create a new episode and associate it with the correct podcast and user.
         """
         podcast_pk = self.kwargs['podcast_pk'] # Get podcast_pk from URL
-        podcast = get_object_or_404(Podcast.objects.select_related('user'), pk=podcast_pk) # Get the podcast object, eager load user
-
         # Mandatory: Verify that the authenticated user owns the podcast
-        if self.request.user != podcast.user:
+        # Same scoped lookup as the serializer's podcast_id: usually the same podcast, so no query here
+        try:
+            podcast = resolve_related(self.request, Podcast.objects.all(), podcast_pk, owned_by_request_user)
+        except Podcast.DoesNotExist:
+            if not Podcast.objects.filter(pk=podcast_pk).exists():
+                raise Http404
             from rest_framework.exceptions import PermissionDenied
             raise PermissionDenied("You can only add episodes to podcasts you own.")
 
         # Mandatory: Set the episode's podcast and user automatically
-        # The serializer's validation already checked ownership via podcast_id/podcast object
         serializer.save(podcast=podcast, user=self.request.user)
 
 
 # View to retrieve, update, or delete a specific episode
-class EpisodeDetailView(generics.RetrieveUpdateDestroyAPIView):
+class EpisodeDetailView(ConditionalGetMixin, ProjectedRetrieveMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Episode.objects.select_related('podcast__user', 'user', 'podcast').all() # Eager load relationships
     serializer_class = EpisodeSerializer
     # Mandatory: Retrieving a *published* episode can be public. Update/Delete requires authentication and ownership.
     # We'll handle view permission in get_object or check manually.
     permission_classes = [IsAuthenticated] # Require authentication for update/delete actions
+    read_columns = ('user', 'published_at') # Loaded for the visibility check below even with ?fields=
+
+    def get_conditional_queryset(self):
+        # Same visibility as get_object(): drafts and scheduled episodes only for their owner
+        user = self.request.user
+        visible = Q(published_at__isnull=False, published_at__lte=timezone.now())
+        if user.is_authenticated:
+            visible |= Q(user=user)
+        return super().get_conditional_queryset().filter(visible)
+
+    def get_conditional_aggregates(self):
+        return release_aggregates()
 
     def get_object(self):
         """
@@ -86,7 +158,7 @@ class EpisodeDetailView(generics.RetrieveUpdateDestroyAPIView):
         # Mandatory: Check if the user can view this episode (published status)
         # This is an additional check beyond IsAuthenticated
         user = self.request.user
-        if not user.is_authenticated or user != obj.user:
+        if not user.is_authenticated or user.pk != obj.user_id: # Compare ids, no user query
              # If not the owner, check if it's published
              if not obj.is_published():
                  from rest_framework.exceptions import NotFound # Or PermissionDenied depending on desired visibility
@@ -106,4 +178,165 @@ class EpisodeDetailView(generics.RetrieveUpdateDestroyAPIView):
     #         from rest_framework.exceptions import PermissionDenied
     #         raise PermissionDenied("You do not have permission to delete this episode.")
     #      instance.delete()
-    
\ No newline at end of file
+    
+
+
+# --- Audio delivery ---
+class AnyAcceptNegotiation(BaseContentNegotiation):
+    """Players send Accept: audio/*; errors still render with the first renderer (JSON)."""
+
+    def select_parser(self, request, parsers):
+        return parsers[0]
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
+
+
+class PodcastFeedView(APIView):
+    """
+    RSS feed of a podcast's published episodes, served from the cache, see episodes_app/feeds.py.
+    Public: podcast apps don't log in.
+    """
+    authentication_classes = [] # No token lookup on the hottest read path
+    permission_classes = [AllowAny]
+    content_negotiation_class = AnyAcceptNegotiation
+
+    def get(self, request, podcast_pk):
+        feed = feeds.get_feed(podcast_pk, request.build_absolute_uri('/'))
+        if feed is None:
+            raise NotFound("Podcast not found.")
+        return feeds.feed_response(request, feed)
+
+
+class EpisodeAudioView(APIView):
+    """
+    GET/HEAD an episode's audio file with Range support, see episodes_app/audio.py.
+    Same access rule as EpisodeDetailView: published episodes, or your own episodes.
+    """
+    permission_classes = [IsAuthenticated]
+    content_negotiation_class = AnyAcceptNegotiation
+
+    def get(self, request, pk):
+        # Just the columns the check needs, no model instance
+        episode = Episode.objects.filter(pk=pk).values('audio_url', 'user_id', 'published_at').first()
+        published = episode is not None and episode['published_at'] is not None and episode['published_at'] <= timezone.now()
+        if episode is None or not (published or episode['user_id'] == request.user.pk):
+            raise NotFound("Episode not found or not published.")
+        if not episode['audio_url']:
+            raise NotFound("This episode has no audio.")
+        response = serve_audio(request, Episode._meta.get_field('audio_url').storage, episode['audio_url'])
+        if response is None:
+            raise NotFound("Audio file is missing.")
+        return response
+
+
+# --- Resumable audio uploads (see episodes_app/uploads.py) ---
+class AudioUploadCreateView(generics.CreateAPIView):
+    """Starts an upload session for a podcast you own."""
+    serializer_class = AudioUploadSessionSerializer
+    permission_classes = [IsAuthenticated]
+
+    def perform_create(self, serializer):
+        podcast = get_object_or_404(Podcast.objects.only('id', 'user_id'), pk=self.kwargs['podcast_pk'])
+        if self.request.user.pk != podcast.user_id:
+            from rest_framework.exceptions import PermissionDenied
+            raise PermissionDenied("You can only upload audio to podcasts you own.")
+        episode = serializer.validated_data.get('episode')
+        if episode is not None and episode.podcast_id != podcast.pk:
+            from rest_framework.exceptions import ValidationError
+            raise ValidationError({'episode': "This episode belongs to another podcast."})
+        # The id (a new uuid) names the partial file
+        session = AudioUploadSession(podcast=podcast, filename=serializer.validated_data['filename'])
+        serializer.save(
+            id=session.pk, podcast=podcast, user=self.request.user, partial_path=uploads.partial_path_for(session),
+        )
+
+
+class AudioUploadSessionMixin:
+    permission_classes = [IsAuthenticated]
+
+    def get_session(self):
+        """The caller's own, unexpired session, or 404."""
+        ttl = timezone.timedelta(seconds=uploads.get_upload_settings()['SESSION_TTL'])
+        return get_object_or_404(
+            AudioUploadSession.objects.select_related('podcast', 'episode'),
+            pk=self.kwargs['pk'], user=self.request.user, updated_at__gt=timezone.now() - ttl,
+        )
+
+    def conflict(self, error):
+        return Response({'detail': str(error), 'received': error.received}, status=status.HTTP_409_CONFLICT)
+
+
+class AudioUploadView(AudioUploadSessionMixin, APIView):
+    """
+    GET: progress. PUT: one chunk, raw bytes with Content-Range. DELETE: cancel.
+    The body is read from the request stream, never through request.data or a parser.
+    """
+
+    def get(self, request, pk):
+        return Response(AudioUploadSessionSerializer(self.get_session()).data)
+
+    def put(self, request, pk):
+        session = self.get_session()
+        chunk = uploads.parse_content_range(request.META.get('HTTP_CONTENT_RANGE'), session.size)
+        if chunk is None:
+            return Response(
+                {'detail': f"Content-Range must be 'bytes <start>-<end>/{session.size}'."}, status=status.HTTP_400_BAD_REQUEST,
+            )
+        start, length = chunk
+        if length > uploads.get_upload_settings()['MAX_CHUNK_SIZE']:
+            return Response({'detail': "Chunk too large."}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        if int(request.META.get('CONTENT_LENGTH') or 0) != length:
+            return Response({'detail': "Content-Length must match Content-Range."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            received = uploads.receive_chunk(session, request.stream, start, length)
+        except uploads.UploadConflict as error:
+            return self.conflict(error)
+        if received < start + length:
+            return Response(
+                {'detail': "Incomplete chunk, resume from 'received'.", 'received': received}, status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response(AudioUploadSessionSerializer(session).data)
+
+    def delete(self, request, pk):
+        session = self.get_session()
+        with transaction.atomic():
+            session.delete()
+            transaction.on_commit(lambda: uploads.discard_partial(session.partial_path))
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class AudioUploadFinalizeView(AudioUploadSessionMixin, APIView):
+    """
+    Verifies the checksum and attaches the file: creates an episode from the posted fields,
+    or replaces the audio of the session's episode (fields optional).
+    """
+
+    def post(self, request, pk):
+        session = self.get_session()
+        episode = session.episode
+        serializer = EpisodeUploadSerializer(episode, data=request.data, partial=episode is not None)
+        serializer.is_valid(raise_exception=True)
+        try:
+            with uploads.locked_partial(session) as fd:
+                if session.received != session.size:
+                    raise uploads.UploadConflict(f"Only {session.received} of {session.size} bytes uploaded.", session.received)
+                if not uploads.verify_upload(session, fd):
+                    return Response(
+                        {'detail': "Checksum mismatch, upload the file again.", 'received': 0}, status=status.HTTP_400_BAD_REQUEST,
+                    )
+                name = uploads.store_upload(session)
+                try:
+                    with transaction.atomic():
+                        # A replaced file is deleted after commit by DirtyFieldsMixin
+                        episode = serializer.save(audio_url=name, podcast=session.podcast, user=session.user)
+                        AudioUploadSession.objects.filter(pk=session.pk).delete()
+                except Exception:
+                    uploads.audio_storage().delete(name)
+                    raise
+        except uploads.UploadConflict as error:
+            return self.conflict(error)
+        return Response(
+            EpisodeSerializer(episode, context={'request': request}).data,
+            status=status.HTTP_200_OK if session.episode else status.HTTP_201_CREATED,
+        )
@@ -0,0 +1,109 @@
+"""
+Cache of the public episode lists (GET /api/podcasts/<pk>/episodes/ as seen by
+anyone but the owner).
+
+Which episodes a non-owner sees depends on the clock: a scheduled episode
+appears by itself once its published_at passes. So each cached page remembers
+when the podcast's next scheduled episode is due, read from
+episode_podcast_published_idx (its (podcast, published_at) prefix serves the
+lookup), and is not served after that moment.
+
+Pages are cached per podcast, per absolute URL (the ?cursor=, ?fields= and the
+host of the links are part of it), with the serialized data, the validators
+ConditionalGetMixin computed, and the owner's id. A hit needs no query at all:
+the owner, who sees drafts too, is recognized from the cached id and goes to
+the database as before. ?expand= responses nest podcasts and users whose
+changes wouldn't reach this cache, so they aren't cached.
+
+Writes bump the podcast's version after commit (invalidate_podcast_episodes(),
+from episodes_app/signals.py and the UPDATE-only paths), which also rebuilds
+its RSS feed (episodes_app/feeds.py).
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils import timezone
+
+from category.changes import episodes_key, mark_changed
+
+from .feeds import bump_feed_version
+from .models import Episode
+
+# Defaults, override with EPISODE_LIST_CACHE in settings.py
+DEFAULT_EPISODE_LIST_CACHE = {
+    'CACHE': 'default',
+    'TTL': 300, # Seconds; writes and scheduled episodes going live invalidate earlier
+}
+
+
+def get_list_cache_settings():
+    return {**DEFAULT_EPISODE_LIST_CACHE, **getattr(settings, 'EPISODE_LIST_CACHE', {})}
+
+
+def _list_cache():
+    return caches[get_list_cache_settings()['CACHE']]
+
+
+def _version_key(podcast_id):
+    return f'episodelist:{podcast_id}:version'
+
+
+def bump_list_version(podcast_id):
+    cache = _list_cache()
+    try:
+        cache.incr(_version_key(podcast_id))
+    except ValueError: # Key missing or evicted
+        cache.set(_version_key(podcast_id), time.time_ns(), None)
+
+
+def invalidate_podcast_episodes(podcast_id):
+    """After commit, drops the podcast's cached episode lists and feed (any episode write)."""
+    mark_changed(episodes_key(podcast_id)) # Last-Modified of the lists, with this write
+
+    def bump():
+        bump_list_version(podcast_id)
+        bump_feed_version(podcast_id)
+    transaction.on_commit(bump)
+
+
+def next_release(podcast_id):
+    """published_at of the podcast's next scheduled episode, or None."""
+    return (
+        Episode.objects.filter(podcast_id=podcast_id, published_at__gt=timezone.now())
+        .order_by('published_at').values_list('published_at', flat=True).first()
+    )
+
+
+def _page_key(cache, podcast_id, url):
+    version = cache.get(_version_key(podcast_id))
+    if version is None:
+        # Never restart at a number an older page may still be cached under
+        cache.add(_version_key(podcast_id), time.time_ns(), None)
+        version = cache.get(_version_key(podcast_id))
+    return f'episodelist:{podcast_id}:{version}:{hashlib.sha1(url.encode()).hexdigest()}'
+
+
+def get_cached_page(podcast_id, url):
+    """(key, entry); entry is None on a miss or once the next scheduled episode is due."""
+    cache = _list_cache()
+    key = _page_key(cache, podcast_id, url)
+    entry = cache.get(key)
+    if entry is not None and entry['expires'] is not None and entry['expires'] <= time.time():
+        entry = None
+    return key, entry
+
+
+def cache_page(key, podcast_id, owner_id, data, etag, last_modified):
+    """Stores a public page under the key get_cached_page() returned before it was built."""
+    release = next_release(podcast_id)
+    ttl = get_list_cache_settings()['TTL'] # 0 turns the cache off
+    if release is not None:
+        ttl = min(ttl, max(1, int(release.timestamp() - time.time()) + 1))
+    _list_cache().set(key, {
+        'data': data, 'owner_id': owner_id, 'etag': etag, 'last_modified': last_modified,
+        'expires': release.timestamp() if release else None,
+    }, ttl)
@@ -5,6 +5,9 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
+
+Run it with an ASGI server, e.g. ``uvicorn podcast.asgi:application``, to get the
+async login/reset endpoints (api/auth/async/...) that hash passwords in a process pool.
 """
 
 import os
@@ -0,0 +1,114 @@
+"""
+Conditional GET (ETag / Last-Modified) for detail and list views.
+
+Before the full fetch, one aggregate query over the rows the client may see
+gives the newest ``updated_at`` (or the view's ``conditional_timestamps``) and
+the row count. Those, plus the URL and the requesting user, make a weak ETag.
+Last-Modified is the newest of the timestamps the response depends on. A
+matching If-None-Match / If-Modified-Since gets a 304 without loading or
+serializing anything.
+
+The rows' own timestamps don't cover everything: a list also changes when a
+row is deleted or leaves it, or a scheduled one goes live. Views fold those
+moments in with ``get_conditional_changes()`` (e.g. the markers of
+category/changes.py) and datetime-valued ``get_conditional_aggregates()``, so
+If-Modified-Since alone never gets a stale 304.
+
+Keyset-paginated lists validate only the requested page: the ids of its rows
+(plus the one that tells whether there is a next page) are read from the
+index first, so the check stays cheap however long the list is, and they
+also catch rows moving in or out of the page.
+
+Only columns listed in ``conditional_timestamps`` are tracked: a change that
+doesn't move one of them (e.g. a username shown in a nested user) keeps the
+old ETag until the row itself changes. Views can add aggregates of their own
+(``get_conditional_aggregates()``) and other version markers
+(``get_conditional_extra()``).
+"""
+
+import hashlib
+import time
+from datetime import datetime
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .fieldsets import READ_METHODS
+
+
+class ConditionalGetMixin:
+    conditional_timestamps = ('updated_at',)
+
+    def get_conditional_queryset(self):
+        """The rows the response is built from, as this user may see them."""
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        if lookup_url_kwarg in self.kwargs:
+            queryset = queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        return queryset
+
+    def get_conditional_aggregates(self):
+        """
+        Extra aggregates over the same rows for state that changes without updating them.
+        Datetime results count toward Last-Modified too (e.g. when a scheduled row went live).
+        """
+        return {}
+
+    def get_conditional_changes(self):
+        """Moments the response changed without moving the rows' timestamps (deletions...), None if unknown."""
+        return ()
+
+    def get_conditional_extra(self):
+        """Extra values that change the representation without touching the rows (cache versions...)."""
+        return ()
+
+    def get_validators(self):
+        """(etag, last_modified datetime or None), or None when a detail view has no object to validate."""
+        queryset = self.get_conditional_queryset()
+        detail = (self.lookup_url_kwarg or self.lookup_field) in self.kwargs
+        members = ()
+        if not detail and self.paginator is not None and hasattr(self.paginator, 'page_window'):
+            window = self.paginator.page_window(queryset, self.request, self)
+            members = tuple(window.values_list('pk', flat=True)[:self.paginator.page_size + 1])
+            queryset = queryset.filter(pk__in=members)
+
+        aggregates = {f'newest_{i}': Max(path) for i, path in enumerate(self.conditional_timestamps)}
+        extra = self.get_conditional_aggregates()
+        result = queryset.order_by().aggregate(rows=Count('pk'), **aggregates, **extra)
+        if not result['rows'] and detail:
+            return None # Missing or hidden object, the view answers 404
+        timestamps = [
+            *[result[name] for name in aggregates], *[result[name] for name in extra if isinstance(result[name], datetime)],
+            *self.get_conditional_changes(),
+        ]
+        timestamps = [timestamp for timestamp in timestamps if timestamp is not None]
+        last_modified = max(timestamps) if timestamps else None
+        request = self.request
+        parts = (
+            request.get_host(), request.get_full_path(), request.user.pk, result['rows'], members,
+            last_modified.isoformat() if last_modified else '', *[result[name] for name in extra],
+            *self.get_conditional_extra(),
+        )
+        digest = hashlib.sha1(repr(parts).encode()).hexdigest()
+        # Weak: equivalent representations, not byte-for-byte (the JSON itself isn't hashed)
+        return f'W/{quote_etag(digest)}', last_modified
+
+    def get(self, request, *args, **kwargs):
+        validators = self.get_validators() if request.method in READ_METHODS else None
+        if validators is None:
+            return super().get(request, *args, **kwargs)
+        etag, last_modified = validators
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        response['ETag'] = etag
+        if timestamp is not None:
+            # HTTP dates are whole seconds: a change later in the current second would share the date
+            # and still 304, so the current second is never advertised (the ETag keeps the exact time)
+            response['Last-Modified'] = http_date(min(timestamp, int(time.time()) - 1))
+        return response
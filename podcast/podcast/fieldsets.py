@@ -0,0 +1,105 @@
+"""
+Sparse fieldsets and optional expansion for API responses.
+
+GET requests can ask for a subset of a serializer's fields, and for nested
+objects in place of plain ids:
+
+    /api/podcasts/?fields=id,title,image
+    /api/me/subscriptions/?fields=id,podcast.id,podcast.title,podcast.image
+    /api/podcasts/1/episodes/?expand=podcast&fields=id,title,podcast.title
+
+Dots reach into nested serializers. What can be expanded is declared per
+serializer in ``Meta.expandable_fields = {'name': callable returning a serializer}``.
+Serializers opt in with FieldsetSerializerMixin; the trimmed serializer also
+decides which columns are fetched (see podcast/projection.py).
+"""
+
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+READ_METHODS = ('GET', 'HEAD')
+
+
+def parse_paths(value):
+    """'id,podcast.title,podcast.id' -> {'id': None, 'podcast': {'title': None, 'id': None}}; None means the whole field."""
+    tree = {}
+    for path in value.split(','):
+        parts = [part.strip() for part in path.split('.')]
+        if not all(parts):
+            continue
+        node = tree
+        for part in parts[:-1]:
+            node = node.setdefault(part, {})
+            if node is None:
+                break # The whole field is already selected
+        else:
+            node[parts[-1]] = None
+    return tree
+
+
+def freeze(tree):
+    """Hashable form of a parse_paths() tree."""
+    if tree is None:
+        return None
+    return tuple(sorted((name, freeze(subtree)) for name, subtree in tree.items()))
+
+
+class Fieldset:
+    def __init__(self, fields=None, expand=None):
+        self.fields = fields # None: every field
+        self.expand = expand or {}
+
+    @classmethod
+    def from_request(cls, request):
+        """?fields= / ?expand= of a read request; writes always get the full representation."""
+        if request is None or request.method not in READ_METHODS:
+            return cls()
+        params = getattr(request, 'query_params', request.GET)
+        fields, expand = params.get('fields'), params.get('expand')
+        return cls(parse_paths(fields) if fields else None, parse_paths(expand) if expand else None)
+
+    @property
+    def key(self):
+        return (freeze(self.fields), freeze(self.expand))
+
+    def __bool__(self):
+        return self.fields is not None or bool(self.expand)
+
+
+def apply_fieldset(serializer, fields, expand):
+    """Expands, then drops the readable fields that weren't asked for, recursing into nested serializers."""
+    expandable = getattr(getattr(serializer, 'Meta', None), 'expandable_fields', {})
+    for name, subtree in (expand or {}).items():
+        if name in expandable:
+            serializer.fields[name] = expandable[name]()
+        elif subtree is None or not isinstance(serializer.fields.get(name), serializers.Serializer):
+            choices = ', '.join(expandable) or 'nothing'
+            raise ValidationError({'expand': [f"'{name}' can't be expanded here, choose from: {choices}."]})
+
+    if fields is not None:
+        readable = [name for name, field in serializer.fields.items() if not field.write_only]
+        unknown = [name for name in fields if name not in readable]
+        if unknown:
+            raise ValidationError({'fields': [f"Unknown field(s) {', '.join(unknown)}, choose from: {', '.join(readable)}."]})
+        for name in readable:
+            if name not in fields:
+                serializer.fields.pop(name)
+
+    for name, field in serializer.fields.items():
+        sub_fields = fields.get(name) if fields else None
+        sub_expand = (expand or {}).get(name)
+        if sub_fields is None and sub_expand is None:
+            continue
+        if not isinstance(field, serializers.Serializer):
+            raise ValidationError({'fields': [f"'{name}' has no fields to choose from."]})
+        apply_fieldset(field, sub_fields, sub_expand)
+
+
+class FieldsetSerializerMixin:
+    """Applies the request's ?fields= / ?expand= when the serializer is created with a request in its context."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fieldset = Fieldset.from_request(self.context.get('request'))
+        if fieldset:
+            apply_fieldset(self, fieldset.fields, fieldset.expand)
@@ -0,0 +1,66 @@
+"""
+Deferred deletion of stored files.
+
+Replaced or orphaned uploads are deleted after the surrounding transaction commits
+(a rollback keeps the row pointing at the old file, so it must survive) and by a
+background thread, so a slow or remote storage never holds up the request.
+Files still queued when the process exits are left behind for an orphan sweep.
+"""
+
+import logging
+import queue
+import threading
+
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+
+class FileCleanupQueue:
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.deleted = 0
+        self.failed = 0
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._work, name='file-cleanup', daemon=True)
+                self._thread.start()
+
+    def _work(self):
+        while True:
+            storage, name = self._queue.get()
+            try:
+                storage.delete(name) # FileSystemStorage ignores files that are already gone
+                self.deleted += 1
+            except Exception:
+                self.failed += 1
+                logger.exception("Could not delete %s", name)
+            finally:
+                self._queue.task_done()
+
+    def put(self, storage, name):
+        """Deletes `name` from `storage` in the background, right away."""
+        if not name:
+            return
+        self._ensure_worker()
+        self._queue.put((storage, name))
+
+    def delete_on_commit(self, storage, names):
+        """Deletes `names` in the background once the current transaction commits."""
+        names = [name for name in names if name]
+        if names:
+            transaction.on_commit(lambda: [self.put(storage, name) for name in names])
+
+    def join(self):
+        """Blocks until everything queued so far is deleted (management commands, tests)."""
+        self._queue.join()
+
+    def pending(self):
+        return self._queue.qsize()
+
+
+file_cleanup_queue = FileCleanupQueue()
@@ -0,0 +1,213 @@
+"""
+Removal of orphaned media files (``python manage.py collect_orphaned_media``).
+
+Files are only deleted when a single instance is deleted or its file replaced
+(podcast/mixins.py). Queryset and cascade deletes (a CustomUser or Podcast
+taking its episodes along), admin bulk deletes, rolled-back transactions and
+processes that died with files still queued leave them on disk.
+
+The collector walks MEDIA_ROOT with os.scandir, one open directory per level,
+and looks the files up a batch at a time with a few set queries:
+
+- storage names in the MEDIA_STORE['REFERENCES'] columns (indexed);
+- image derivatives (``<stem>_<size>.<ext>``, category/imaging.py) whose
+  source ``<stem>.<ext>`` is still some Podcast.image;
+- absolute paths in the MEDIA_GC['PATH_REFERENCES'] columns (partial uploads).
+
+Anything else that wasn't modified for GRACE seconds is an orphan. It is
+deleted, or with QUARANTINE set moved to MEDIA_ROOT/<QUARANTINE>/<name> (move it
+back to restore it) and deleted QUARANTINE_TTL seconds later. Memory is bounded
+by BATCH_SIZE and the directory depth, not by the number of files.
+"""
+
+import os
+import re
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.db import reset_queries
+from django.db.models import Q
+
+from .media_store import get_media_store_settings
+
+# Defaults, override with MEDIA_GC in settings.py
+DEFAULT_MEDIA_GC = {
+    'GRACE': 86400, # Files modified in the last GRACE seconds are never touched (at least MEDIA_STORE['GRACE'])
+    'BATCH_SIZE': 500, # Files looked up per round of queries
+    'QUARANTINE': '', # Directory below MEDIA_ROOT orphans are moved to; '' deletes them right away
+    'QUARANTINE_TTL': 7 * 86400, # Seconds a quarantined file is kept
+    'PATH_REFERENCES': ('episodes_app.AudioUploadSession.partial_path',), # Columns holding absolute paths
+}
+
+
+def get_media_gc_settings():
+    return {**DEFAULT_MEDIA_GC, **getattr(settings, 'MEDIA_GC', {})}
+
+
+def scan(root, exclude=()):
+    """
+    Yields (name, entry) for the files below `root`, names relative to it with '/'.
+    Streams the tree: only the open directory of each level is held, never a listing.
+    """
+    stack = []
+    try:
+        stack.append((os.scandir(root), ''))
+        while stack:
+            iterator, prefix = stack[-1]
+            entry = next(iterator, None)
+            if entry is None:
+                iterator.close()
+                stack.pop()
+                continue
+            name = prefix + entry.name
+            if entry.is_dir(follow_symlinks=False):
+                if name in exclude:
+                    continue
+                try:
+                    stack.append((os.scandir(entry.path), name + '/'))
+                except OSError: # Removed meanwhile or not readable
+                    continue
+            elif entry.is_file(follow_symlinks=False):
+                yield name, entry
+    except FileNotFoundError:
+        return # No MEDIA_ROOT yet
+    finally:
+        for iterator, _ in stack:
+            iterator.close()
+
+
+def _columns(references):
+    for reference in references:
+        app_label, model_name, field = reference.split('.')
+        yield apps.get_model(app_label, model_name)._default_manager, field
+
+
+def derivative_pattern():
+    """Matches derivative names of category/imaging.py, capturing the stem of their source."""
+    from category.imaging import EXTENSIONS, get_derivative_settings # The GC must not need the app at import time
+    config = get_derivative_settings()
+    sizes = '|'.join(re.escape(size) for size in config['SIZES'])
+    extensions = '|'.join(re.escape(EXTENSIONS[fmt]) for fmt in config['FORMATS'])
+    return re.compile(rf'(?P<stem>.+)_(?:{sizes})\.(?:{extensions})')
+
+
+class OrphanCollector:
+    """One sweep over a local storage; the counters are reported by the command."""
+
+    def __init__(self, storage, dry_run=False, config=None):
+        self.storage = storage
+        self.root = os.path.abspath(storage.location)
+        self.dry_run = dry_run
+        self.config = config or get_media_gc_settings()
+        self.grace = max(self.config['GRACE'], get_media_store_settings()['GRACE'])
+        self.derivatives = derivative_pattern()
+        self.scanned = self.scanned_bytes = 0
+        self.referenced = self.recent = 0
+        self.orphans = self.orphan_bytes = 0
+        self.purged = self.reclaimed_bytes = 0
+        self.failed = 0
+
+    def quarantine_path(self, name=''):
+        return os.path.join(self.root, self.config['QUARANTINE'], name)
+
+    def references(self, names):
+        """The subset of `names` still used by some row: a few queries per batch, not one per file."""
+        found = set()
+        for manager, field in _columns(get_media_store_settings()['REFERENCES']):
+            found.update(manager.filter(**{f'{field}__in': names}).values_list(field, flat=True))
+
+        # Derivatives are named after their source, which has an unknown extension
+        stems = {}
+        for name in names:
+            match = self.derivatives.fullmatch(name) if name not in found else None
+            if match:
+                stems.setdefault(match['stem'], []).append(name)
+        if stems:
+            condition = Q()
+            for stem in stems:
+                condition |= Q(image=stem) | Q(image__startswith=stem + '.')
+            for image in apps.get_model('category', 'Podcast')._default_manager.filter(condition).values_list('image', flat=True):
+                found.update(stems.get(os.path.splitext(image)[0], ())) # As imaging.derivative_name() strips it
+
+        paths = {os.path.join(self.root, name): name for name in names if name not in found}
+        for manager, field in _columns(self.config['PATH_REFERENCES']):
+            found.update(paths[path] for path in manager.filter(**{f'{field}__in': list(paths)}).values_list(field, flat=True))
+        return found
+
+    def remove(self, name, cutoff):
+        path = os.path.join(self.root, name)
+        try:
+            stat = os.stat(path)
+            # Again right before removing: a dedup hit touches the blob (media_store.adopt)
+            if stat.st_mtime > cutoff:
+                self.recent += 1
+                return
+            if not self.dry_run:
+                if self.config['QUARANTINE']:
+                    target = self.quarantine_path(name)
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    os.replace(path, target)
+                    os.utime(target) # QUARANTINE_TTL counts from now
+                else:
+                    os.remove(path)
+        except FileNotFoundError:
+            return # Deleted by someone else meanwhile
+        except OSError:
+            self.failed += 1
+            return
+        self.orphans += 1
+        self.orphan_bytes += stat.st_size
+        if not self.config['QUARANTINE']:
+            self.reclaimed_bytes += stat.st_size
+
+    def collect(self, batch):
+        cutoff = time.time() - self.grace
+        found = self.references([name for name, _ in batch])
+        for name, stat in batch:
+            if name in found:
+                self.referenced += 1
+            elif stat.st_mtime > cutoff:
+                self.recent += 1
+            else:
+                self.remove(name, cutoff)
+
+    def sweep(self, progress=None):
+        """Walks the storage and removes its orphans; `progress` is called after each batch."""
+        exclude = {self.config['QUARANTINE'].strip('/')} if self.config['QUARANTINE'] else set()
+        batch = []
+        for name, entry in scan(self.root, exclude):
+            try:
+                stat = entry.stat(follow_symlinks=False)
+            except FileNotFoundError:
+                continue
+            self.scanned += 1
+            self.scanned_bytes += stat.st_size
+            batch.append((name, stat))
+            if len(batch) >= self.config['BATCH_SIZE']:
+                self.collect(batch)
+                batch = []
+                reset_queries() # With DEBUG on, the logged queries would grow with the tree
+                if progress:
+                    progress(self)
+        if batch:
+            self.collect(batch)
+        if self.config['QUARANTINE']:
+            self.purge_quarantine()
+
+    def purge_quarantine(self):
+        cutoff = time.time() - self.config['QUARANTINE_TTL']
+        for _, entry in scan(self.quarantine_path()):
+            try:
+                stat = entry.stat(follow_symlinks=False)
+                if stat.st_mtime > cutoff:
+                    continue
+                if not self.dry_run:
+                    os.remove(entry.path)
+            except FileNotFoundError:
+                continue
+            except OSError:
+                self.failed += 1
+                continue
+            self.purged += 1
+            self.reclaimed_bytes += stat.st_size
@@ -0,0 +1,145 @@
+"""
+Content-addressed storage for uploaded media (Episode.audio_url, Podcast.image).
+
+Uploads are hashed (SHA-256) while they are written to a temporary file and
+then linked to ``cas/<h[:2]>/<h[2:4]>/<h><ext>``. A file whose bytes are
+already stored just reuses the existing blob, so re-uploaded audio and artwork
+take no extra disk or page cache. Blob names never change content, so their
+URLs can be cached forever, e.g. with nginx::
+
+    location /media/cas/ { alias .../media/cas/; expires max; add_header Cache-Control immutable; }
+
+The ``upload_to`` callables still run, but only the extension of the name they
+return is kept. Names stored before the switch (``episodes/podcast_1/a.mp3``)
+keep working, since this is a FileSystemStorage on the same MEDIA_ROOT;
+``python manage.py dedupe_media`` moves them into the store.
+
+Blobs can be shared by several rows, so ``delete()`` only removes one that no
+column in MEDIA_STORE['REFERENCES'] points at any more (indexed lookups).
+Blobs touched in the last GRACE seconds are kept too: a dedup hit for a row
+that isn't committed yet has no reference yet. They are left for the orphan sweep.
+"""
+
+import hashlib
+import os
+import re
+import tempfile
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage, default_storage, storages
+
+# Defaults, override with MEDIA_STORE in settings.py
+DEFAULT_MEDIA_STORE = {
+    'PREFIX': 'cas', # Directory of the blobs below MEDIA_ROOT
+    'GRACE': 3600, # Seconds a touched blob survives delete() without references
+    'REFERENCES': ('episodes_app.Episode.audio_url', 'category.Podcast.image'), # Indexed columns holding blob names
+}
+
+EXTENSION = re.compile(r'\.[a-z0-9]{1,10}')
+BLOB_NAME = re.compile(r'[0-9a-f]{2}/[0-9a-f]{2}/([0-9a-f]{64})(\.[a-z0-9]{1,10})?')
+
+
+def get_media_store_settings():
+    return {**DEFAULT_MEDIA_STORE, **getattr(settings, 'MEDIA_STORE', {})}
+
+
+def media_storage():
+    """Storage of the media fields: STORAGES['media'] if configured, else the default storage."""
+    return storages['media'] if 'media' in settings.STORAGES else default_storage
+
+
+def is_referenced(name):
+    """True if any column in MEDIA_STORE['REFERENCES'] holds `name`."""
+    for reference in get_media_store_settings()['REFERENCES']:
+        app_label, model_name, field = reference.split('.')
+        if apps.get_model(app_label, model_name)._default_manager.filter(**{field: name}).exists():
+            return True
+    return False
+
+
+def plain_storage(storage):
+    """`storage` without content addressing, for files whose names the caller derives (image derivatives)."""
+    if isinstance(storage, ContentAddressedStorage):
+        return FileSystemStorage(
+            location=storage.location, base_url=storage.base_url,
+            file_permissions_mode=storage.file_permissions_mode, directory_permissions_mode=storage.directory_permissions_mode,
+        )
+    return storage
+
+
+class ContentAddressedStorage(FileSystemStorage):
+
+    def blob_name(self, digest, name=''):
+        """cas/ab/cd/abcd...<ext>, the extension taken from `name`."""
+        extension = os.path.splitext(name)[1].lower()
+        if not EXTENSION.fullmatch(extension):
+            extension = ''
+        prefix = get_media_store_settings()['PREFIX']
+        return f'{prefix}/{digest[:2]}/{digest[2:4]}/{digest}{extension}'
+
+    def is_blob(self, name):
+        prefix = get_media_store_settings()['PREFIX'] + '/'
+        return name.startswith(prefix) and BLOB_NAME.fullmatch(name[len(prefix):]) is not None
+
+    def temporary_directory(self):
+        # On the same filesystem as the blobs, so they can be hard-linked into place
+        path = self.path(os.path.join(get_media_store_settings()['PREFIX'], 'tmp'))
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def get_available_name(self, name, max_length=None):
+        return name # _save() picks the name from the content
+
+    def _save(self, name, content):
+        digest = hashlib.sha256()
+        if hasattr(content, 'temporary_file_path'):
+            # Big uploads are already on disk: hash them there and move the file, no copy
+            with open(content.temporary_file_path(), 'rb') as handle:
+                for chunk in iter(lambda: handle.read(1024 * 1024), b''):
+                    digest.update(chunk)
+            fd, temporary = tempfile.mkstemp(dir=self.temporary_directory())
+            os.close(fd)
+            file_move_safe(content.temporary_file_path(), temporary, allow_overwrite=True)
+        else:
+            fd, temporary = tempfile.mkstemp(dir=self.temporary_directory())
+            with os.fdopen(fd, 'wb') as handle:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    handle.write(chunk)
+        return self.adopt(temporary, digest.hexdigest(), name)
+
+    def adopt(self, path, digest, name=''):
+        """
+        Stores the local file `path`, whose SHA-256 is `digest`, as a blob and removes `path`.
+        Returns the blob name; a blob with these bytes that already exists is reused.
+        """
+        blob = self.blob_name(digest, name)
+        full_path = self.path(blob)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        os.chmod(path, self.file_permissions_mode or 0o644) # mkstemp() files are private to us
+        try:
+            os.link(path, full_path) # Fails instead of replacing a blob someone may be reading
+        except FileExistsError:
+            os.utime(full_path) # Dedup hit: starts the grace period, see delete()
+        os.remove(path)
+        return blob
+
+    def recently_touched(self, name):
+        """True within GRACE seconds of the blob's last write or dedup hit (or if it is gone)."""
+        try:
+            return time.time() - os.stat(self.path(name)).st_mtime < get_media_store_settings()['GRACE']
+        except FileNotFoundError:
+            return True
+
+    def delete(self, name):
+        if name and self.is_blob(name):
+            if self.recently_touched(name):
+                return # Possibly just handed to a row that isn't committed yet
+            if is_referenced(name):
+                return
+            if self.recently_touched(name):
+                return # Again right before removing: a dedup hit may have touched it during the queries
+        super().delete(name)
@@ -0,0 +1,107 @@
+"""
+Model mixins shared by the apps.
+
+DirtyFieldsMixin remembers the field values an instance was loaded with (in
+``from_db``), so ``save()`` can tell what changed without re-reading the row:
+
+- ``get_dirty_fields()`` / ``is_dirty(name)`` compare against that snapshot;
+- ``save()`` without ``update_fields`` only writes the changed columns (plus
+  ``auto_now`` fields), and skips the UPDATE entirely if nothing changed and
+  the model has no ``auto_now`` field;
+- files replaced in a FileField, and all files of a deleted instance, are
+  removed after commit by ``podcast.file_cleanup.file_cleanup_queue``.
+
+Put it before ``models.Model`` in the bases: ``class Podcast(DirtyFieldsMixin, models.Model)``.
+"""
+
+import copy
+
+from django.db import models
+from django.db.models.fields.files import FieldFile
+
+from .file_cleanup import file_cleanup_queue
+
+
+def _comparable(value):
+    # FieldFile compares by name; an upload that hasn't been stored yet is always a change
+    if isinstance(value, FieldFile):
+        return value.name if value._committed else object()
+    return value
+
+
+class DirtyFieldsMixin:
+    # attname -> value as loaded (or last saved); None for instances that never came from the DB
+    _loaded_values = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot()
+        return instance
+
+    def _snapshot(self, fields=None):
+        loaded = self.__dict__
+        snapshot = {} if fields is None or self._loaded_values is None else self._loaded_values
+        for field in self._meta.concrete_fields:
+            if field.attname in loaded and (fields is None or field.attname in fields):
+                value = _comparable(loaded[field.attname])
+                # JSON dicts/lists can be changed in place, keep our own copy
+                snapshot[field.attname] = copy.deepcopy(value) if isinstance(value, (dict, list)) else value
+        self._loaded_values = snapshot
+
+    def get_dirty_fields(self):
+        """{attname: value when loaded} for every loaded field that has been changed since."""
+        if self._loaded_values is None:
+            return {}
+        loaded = self.__dict__
+        return {
+            attname: old for attname, old in self._loaded_values.items()
+            # Deferred fields that were never loaded can't have been changed through the instance
+            if attname in loaded and _comparable(loaded[attname]) != old
+        }
+
+    def is_dirty(self, attname):
+        return attname in self.get_dirty_fields()
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        self._snapshot(fields=None if fields is None else {self._meta.get_field(name).attname for name in fields})
+
+    def save(self, *args, **kwargs):
+        dirty = self.get_dirty_fields()
+        limited = (
+            self._loaded_values is not None and not self._state.adding
+            and kwargs.get('update_fields') is None and not kwargs.get('force_insert') and not args
+            and self._meta.pk.attname not in dirty
+        )
+        if limited:
+            auto_now = [field.attname for field in self._meta.concrete_fields if getattr(field, 'auto_now', False)]
+            kwargs['update_fields'] = set(dirty) | set(auto_now)
+
+        super().save(*args, **kwargs)
+
+        # Only what was written is clean now; fields left out of update_fields stay dirty
+        update_fields = kwargs.get('update_fields')
+        saved = None if update_fields is None else {self._meta.get_field(name).attname for name in update_fields}
+        # Files that were replaced or cleared go once the new row is committed
+        for field in self._meta.concrete_fields:
+            if isinstance(field, models.FileField) and dirty.get(field.attname) and (saved is None or field.attname in saved):
+                old_name = dirty[field.attname]
+                if old_name != getattr(self, field.attname).name:
+                    file_cleanup_queue.delete_on_commit(field.storage, [old_name])
+        self._snapshot(fields=saved)
+
+    save.alters_data = True
+
+    def delete(self, *args, **kwargs):
+        files = [
+            (field.storage, getattr(self, field.attname).name)
+            for field in self._meta.concrete_fields
+            if isinstance(field, models.FileField) and field.attname in self.__dict__
+        ]
+        result = super().delete(*args, **kwargs)
+        for storage, name in files:
+            file_cleanup_queue.delete_on_commit(storage, [name])
+        return result
+
+    delete.alters_data = True
@@ -0,0 +1,186 @@
+"""
+Keyset (cursor) pagination shared by the list endpoints.
+
+Each page is fetched with a WHERE clause on the ordering columns of the last row
+seen instead of an OFFSET, so with a matching composite index page N costs the
+same as page 1. Views declare the ordering with a ``keyset_ordering`` attribute
+(or ``get_keyset_ordering()``), which must end with a unique column such as ``-id``.
+"""
+
+import base64
+import json
+from datetime import date, datetime
+from functools import reduce
+from operator import and_, or_
+
+from django.conf import settings
+from django.db.models import F, Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+# Defaults, override with KEYSET_PAGINATION in settings.py
+DEFAULT_KEYSET_PAGINATION = {
+    'PAGE_SIZE': 20,
+    'MAX_PAGE_SIZE': 100,
+}
+
+
+def get_keyset_settings():
+    return {**DEFAULT_KEYSET_PAGINATION, **getattr(settings, 'KEYSET_PAGINATION', {})}
+
+
+class KeysetPagination(BasePagination):
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_ordering(self, view):
+        if hasattr(view, 'get_keyset_ordering'):
+            return tuple(view.get_keyset_ordering())
+        return tuple(view.keyset_ordering)
+
+    def get_page_size(self, request):
+        config = get_keyset_settings()
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return config['PAGE_SIZE']
+        return max(1, min(size, config['MAX_PAGE_SIZE']))
+
+    # --- Cursor encoding ---
+    def encode_cursor(self, values, reverse):
+        payload = {'v': [v.isoformat() if isinstance(v, (date, datetime)) else v for v in values]}
+        if reverse:
+            payload['r'] = 1
+        return base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode().rstrip('=')
+
+    def decode_cursor(self, request, fields):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4)))
+            values = payload['v']
+            if len(values) != len(fields):
+                raise ValueError
+            # Turn the JSON values back into Python values (e.g. ISO strings into datetimes)
+            values = [None if v is None else field.to_python(v) for field, v in zip(fields, values)]
+        except Exception:
+            raise ValidationError({self.cursor_query_param: [self.invalid_cursor_message]})
+        return values, bool(payload.get('r'))
+
+    # --- Query building ---
+    @staticmethod
+    def _order_expression(name, descending, nullable):
+        if not nullable:
+            return F(name).desc() if descending else F(name).asc()
+        # NULL sorts as the smallest value on every backend, so the keyset conditions below hold
+        return F(name).desc(nulls_last=True) if descending else F(name).asc(nulls_first=True)
+
+    @staticmethod
+    def _after(name, descending, nullable, value):
+        """Rows strictly after `value` in this column's order (NULL counts as the smallest value)."""
+        if value is None:
+            return Q(pk__in=[]) if descending else Q(**{f'{name}__isnull': False})
+        if descending:
+            after = Q(**{f'{name}__lt': value})
+            return after | Q(**{f'{name}__isnull': True}) if nullable else after
+        return Q(**{f'{name}__gt': value})
+
+    @staticmethod
+    def _equal(name, value):
+        return Q(**{f'{name}__isnull': True}) if value is None else Q(**{name: value})
+
+    def keyset_filter(self, columns, values):
+        """(c1, c2, c3) > (v1, v2, v3) expanded into ORs, in the direction of each column."""
+        branches = []
+        for i, (name, descending, nullable) in enumerate(columns):
+            equal_prefix = [self._equal(columns[j][0], values[j]) for j in range(i)]
+            branches.append(reduce(and_, equal_prefix + [self._after(name, descending, nullable, values[i])]))
+        condition = reduce(or_, branches)
+
+        # Repeat the leading column as a plain range so the database can seek into the index
+        # instead of evaluating the OR for every row
+        name, descending, nullable = columns[0]
+        if not nullable and values[0] is not None:
+            condition &= Q(**{f'{name}__lte' if descending else f'{name}__gte': values[0]})
+        return condition
+
+    @staticmethod
+    def row_value(row, name):
+        return row[name] if isinstance(row, dict) else getattr(row, name)
+
+    def page_window(self, queryset, request, view=None):
+        """
+        queryset ordered and cut at the cursor, not yet evaluated: the page is its first
+        page_size rows, one more tells whether there is a next page.
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        ordering = self.get_ordering(view)
+        model = queryset.model
+
+        fields = [model._meta.get_field(entry.lstrip('-')) for entry in ordering]
+        columns = [(field.attname, entry.startswith('-'), field.null) for field, entry in zip(fields, ordering)]
+        self.columns = columns
+
+        values, reverse = self.decode_cursor(request, fields)
+        self.cursor = values, reverse
+        # A "previous" cursor walks the same order backwards and flips the page afterwards
+        scan = [(name, descending != reverse, nullable) for name, descending, nullable in columns]
+        queryset = queryset.order_by(*[self._order_expression(*column) for column in scan])
+        if values is not None:
+            queryset = queryset.filter(self.keyset_filter(scan, values))
+        return queryset
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.page_window(queryset, request, view)
+        values, reverse = self.cursor
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = values is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, values is not None
+        self.rows = rows
+        return rows
+
+    def _position(self, row):
+        return [self.row_value(row, name) for name, _, _ in self.columns]
+
+    def get_next_link(self):
+        if not (self.has_next and self.rows):
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self._position(self.rows[-1]), False))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        url = self.request.build_absolute_uri()
+        if not self.rows:
+            return remove_query_param(url, self.cursor_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self._position(self.rows[0]), True))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,299 @@
+"""
+Read-optimized serialization for list endpoints.
+
+A ModelSerializer instantiates and walks its field objects (and nested
+serializers) for every row. For GET lists we instead compile the serializer
+once into a plain function that turns a ``.values()`` row into the same dict
+the serializer would have produced:
+
+- plain fields whose representation is the DB value itself (CharField,
+  IntegerField, BooleanField, JSONField, primary keys) are copied as is;
+- other fields (DateTimeField, custom fields) call the field's own
+  ``to_representation``, so formatting stays identical;
+- FileField / ImageField build the URL from the storage like DRF does;
+- nested serializers are flattened into ``related__field`` columns;
+- a SerializerMethodField is computed from columns declared in the serializer's
+  ``Meta.projected_fields = {'name': Projected([...columns], function)}``.
+
+Serializers with anything the compiler doesn't understand fall back to the
+normal serializer. Set FAST_READ_SERIALIZERS = False in settings.py to disable.
+
+The same column list narrows the SQL when model instances are loaded for a
+GET (``only()`` and ``select_related()`` of just the relations crossed), so
+a ``?fields=`` subset (podcast/fieldsets.py) fetches less either way.
+"""
+
+import itertools
+import re
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.core.files.storage import FileSystemStorage
+from django.db.models import FileField as ModelFileField
+from rest_framework import serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from .fieldsets import READ_METHODS, Fieldset
+
+
+class Projected:
+    """
+    How to compute a SerializerMethodField from columns: ``function(context, *values)``
+    receives the serializer context and the column values in ``sources`` order.
+    """
+
+    def __init__(self, sources, function):
+        self.sources = tuple(sources)
+        self.function = function
+
+
+class Unprojectable(Exception):
+    """The serializer uses something the compiler can't express as columns."""
+
+
+# Fields whose to_representation() returns DB values unchanged
+IDENTITY_FIELDS = (
+    serializers.CharField, serializers.IntegerField, serializers.BooleanField, serializers.ReadOnlyField,
+)
+
+
+# Names that storage.url() and build_absolute_uri() leave untouched (no quoting, no ./.. segments)
+PLAIN_NAME = re.compile(r'[A-Za-z0-9_-][A-Za-z0-9_.~/-]*')
+
+
+def storage_url_function(storage, context):
+    """
+    name -> request.build_absolute_uri(storage.url(name)) (or storage.url(name) without a
+    request), built once per serializer context. For FileSystemStorage and plain names
+    that is string concatenation; anything else goes through the storage.
+    """
+    functions = context.setdefault('_storage_urls', {})
+    function = functions.get(id(storage))
+    if function is not None:
+        return function
+
+    request = context.get('request')
+    def full(name):
+        url = storage.url(name)
+        return request.build_absolute_uri(url) if request is not None else url
+
+    base_url = getattr(storage, 'base_url', None) or ''
+    concatenate = (
+        isinstance(storage, FileSystemStorage) and storage.__class__.url is FileSystemStorage.url # __class__ sees through default_storage
+        and base_url.startswith('/') and base_url.endswith('/') and PLAIN_NAME.fullmatch(base_url[1:])
+    )
+    if concatenate:
+        prefix = (request.build_absolute_uri('/')[:-1] if request is not None else '') + base_url
+        def function(name):
+            if PLAIN_NAME.fullmatch(name) and '//' not in name and '/.' not in name:
+                return prefix + name
+            return full(name)
+    else:
+        function = full
+    functions[id(storage)] = function
+    return function
+
+
+def _file_url(storage, use_url):
+    def representation(context, name):
+        # Same rules as rest_framework.fields.FileField.to_representation
+        if not name:
+            return None
+        if not use_url:
+            return name
+        return storage_url_function(storage, context)(name)
+    return representation
+
+
+class RowProjection:
+    """A serializer instance (already trimmed by its fieldset) compiled into `.values()` columns plus a row -> dict function."""
+
+    def __init__(self, serializer):
+        self.columns = []
+        self._helpers = {}
+        self._names = itertools.count()
+        body = self._compile(serializer, '')
+        source = f"def serialize(row, context):\n    return {body}\n"
+        namespace = dict(self._helpers)
+        exec(compile(source, f'<projection {type(serializer).__name__}>', 'exec'), namespace)
+        self.serialize_row = namespace['serialize']
+        self.columns = list(dict.fromkeys(self.columns)) # Dedupe, keep order
+
+    # --- Compilation ---
+    def _helper(self, value):
+        name = f'_h{next(self._names)}'
+        self._helpers[name] = value
+        return name
+
+    def _column(self, path):
+        self.columns.append(path)
+        return f'row[{path!r}]'
+
+    @staticmethod
+    def _model_field(model, attrs):
+        """The model field `attrs` points at, following relations."""
+        field = None
+        for attr in attrs:
+            if model is None:
+                raise Unprojectable(attr)
+            try:
+                field = model._meta.get_field(attr)
+            except FieldDoesNotExist:
+                # e.g. source='category_id'
+                field = next((f for f in model._meta.concrete_fields if f.attname == attr), None)
+                if field is None:
+                    raise Unprojectable(attr)
+            model = field.related_model if field.is_relation and field.attname != attr else None
+        return field
+
+    def _compile(self, serializer, prefix):
+        model = serializer.Meta.model
+        projected = getattr(serializer.Meta, 'projected_fields', {})
+        entries = []
+        for field in serializer._readable_fields:
+            entries.append(f'{field.field_name!r}: {self._compile_field(field, model, prefix, projected)}')
+        return '{' + ', '.join(entries) + '}'
+
+    def _compile_field(self, field, model, prefix, projected):
+        if isinstance(field, serializers.SerializerMethodField):
+            spec = projected.get(field.field_name)
+            if spec is None:
+                raise Unprojectable(field.field_name)
+            args = ', '.join(self._column(prefix + source.replace('.', '__')) for source in spec.sources)
+            return f'{self._helper(spec.function)}(context, {args})'
+
+        if field.source == '*' or isinstance(field, (serializers.ListSerializer, serializers.ManyRelatedField)):
+            raise Unprojectable(field.field_name)
+        path = prefix + '__'.join(field.source_attrs)
+        model_field = self._model_field(model, field.source_attrs)
+
+        if isinstance(field, serializers.Serializer):
+            # Nested serializer: NULL foreign key -> None, like Serializer.to_representation
+            nested = self._compile(field, path + '__')
+            guard = self._column(path)
+            return f'(None if {guard} is None else {nested})'
+
+        value = self._column(path)
+        if isinstance(field, serializers.FileField):
+            if not isinstance(model_field, ModelFileField):
+                raise Unprojectable(field.field_name)
+            use_url = getattr(field, 'use_url', api_settings.UPLOADED_FILES_USE_URL)
+            return f'{self._helper(_file_url(model_field.storage, use_url))}(context, {value})'
+        if isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is None:
+            return value # .values() on a foreign key already gives the pk
+        if isinstance(field, serializers.JSONField) and not field.binary:
+            return value
+        if type(field) in IDENTITY_FIELDS or (
+            isinstance(field, IDENTITY_FIELDS) and type(field).to_representation in {
+                cls.to_representation for cls in IDENTITY_FIELDS
+            }
+        ):
+            return value
+        # Anything else formats through the field itself; None stays None like in Serializer.to_representation
+        return f'(None if (v := {value}) is None else {self._helper(field.to_representation)}(v))'
+
+    # --- Use ---
+    def serialize_many(self, rows, context):
+        serialize = self.serialize_row
+        return [serialize(row, context) for row in rows]
+
+
+# (serializer class, fieldset key) -> RowProjection, or None if it can't be projected
+_lock = threading.Lock()
+_projections = OrderedDict()
+MAX_PROJECTIONS = 256 # ?fields= combinations are client input, keep the most recent ones
+
+
+def get_projection(serializer_class, context=None):
+    """
+    Compiled projection of serializer_class for the fieldset of context['request'],
+    or None when it has to use the normal serializer. Raises ValidationError for a bad fieldset.
+    """
+    context = context or {}
+    key = (serializer_class, Fieldset.from_request(context.get('request')).key)
+    with _lock:
+        if key in _projections:
+            _projections.move_to_end(key)
+            return _projections[key]
+    try:
+        projection = RowProjection(serializer_class(context=context))
+    except Unprojectable:
+        projection = None
+    with _lock:
+        _projections[key] = projection
+        while len(_projections) > MAX_PROJECTIONS:
+            _projections.popitem(last=False)
+    return projection
+
+
+def narrow_queryset(queryset, columns):
+    """Loads only `columns` (.values() paths), joining just the relations they cross."""
+    model = queryset.model
+    relations, names = set(), []
+    for path in columns:
+        parts = path.split('__')
+        relations.update('__'.join(parts[:i]) for i in range(1, len(parts)))
+        # only() wants field names: category_id -> category
+        current = model
+        for i, part in enumerate(parts):
+            field = RowProjection._model_field(current, [part])
+            parts[i] = field.name
+            current = field.related_model
+        names.append('__'.join(parts))
+    queryset = queryset.select_related(None) # select_related() without names would follow every foreign key
+    if relations:
+        queryset = queryset.select_related(*sorted(relations))
+    return queryset.only(*names)
+
+
+class ProjectedListMixin:
+    """
+    For ListAPIView subclasses: GET lists are fetched with .values() and serialized by the
+    compiled projection; pagination works on the value rows (see KeysetPagination.row_value).
+    With FAST_READ_SERIALIZERS off the serializers run on instances narrowed to the same columns.
+    """
+
+    def list(self, request, *args, **kwargs):
+        projection = get_projection(self.get_serializer_class(), self.get_serializer_context())
+        if projection is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        columns = list(projection.columns)
+        if self.paginator is not None and hasattr(self.paginator, 'get_ordering'):
+            # The keyset paginator reads the ordering columns off the last row
+            model = queryset.model
+            columns += [model._meta.get_field(entry.lstrip('-')).attname for entry in self.paginator.get_ordering(self)]
+        columns = list(dict.fromkeys(columns))
+
+        if not getattr(settings, 'FAST_READ_SERIALIZERS', True):
+            page = self.paginate_queryset(narrow_queryset(queryset, columns))
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data) if page is not None else Response(serializer.data)
+
+        rows = queryset.values(*columns)
+        context = self.get_serializer_context()
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(projection.serialize_many(page, context))
+        return Response(projection.serialize_many(rows, context))
+
+
+class ProjectedRetrieveMixin:
+    """
+    For detail views: a GET loads only the columns the serializer reads, plus `read_columns`
+    (whatever get_object() itself checks).
+    """
+    read_columns = ()
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method not in READ_METHODS:
+            return queryset
+        projection = get_projection(self.get_serializer_class(), self.get_serializer_context())
+        if projection is None:
+            return queryset
+        return narrow_queryset(queryset, [*projection.columns, *self.read_columns])
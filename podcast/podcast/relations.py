@@ -0,0 +1,83 @@
+"""
+Related objects looked up once per request.
+
+A create usually needs the same parent row twice: the serializer validates the
+``<name>_id`` field in the body, then the view fetches the parent from the URL
+to save against it (and used to check ownership a second time).
+``resolve_related()`` keeps what it fetched on the request, keyed by model,
+scope and primary key, so the second caller gets the same object without a
+query. Lookups that found nothing are remembered too.
+
+A scope narrows the lookup to the rows the requester may use, e.g.
+``owned_by_request_user`` adds ``user_id = <request.user.pk>`` to the primary
+key lookup: one indexed query, and a row that isn't yours reads as missing.
+
+``ScopedPrimaryKeyRelatedField`` is PrimaryKeyRelatedField resolved this way::
+
+    podcast_id = ScopedPrimaryKeyRelatedField(
+        queryset=Podcast.objects.all(), scope=owned_by_request_user, source='podcast', write_only=True,
+    )
+
+Callers sharing an object should pass the same queryset: the first one decides
+which columns and joins it was loaded with.
+"""
+
+from django.core.exceptions import ObjectDoesNotExist
+from rest_framework import serializers
+
+_MISSING = object()
+
+
+def owned_by_request_user(queryset, request):
+    """Rows whose ``user`` is the requester (none for anonymous requests)."""
+    return queryset.filter(user_id=request.user.pk) if request.user.is_authenticated else queryset.none()
+
+
+def resolve_related(request, queryset, pk, scope=None):
+    """
+    The row of ``queryset`` (narrowed by ``scope(queryset, request)``) with primary
+    key ``pk``, fetched at most once per request. Raises the model's DoesNotExist.
+    """
+    model = queryset.model
+    key = (model._meta.label, scope, str(pk)) # '5' from a form and 5 from the URL are the same row
+    resolved = request.__dict__.setdefault('_resolved_related', {})
+    obj = resolved.get(key)
+    if obj is None:
+        if scope is not None:
+            queryset = scope(queryset, request)
+        obj = queryset.filter(pk=pk).first() or _MISSING
+        resolved[key] = obj
+    if obj is _MISSING:
+        raise model.DoesNotExist(f"{model._meta.object_name} {pk} not found.")
+    return obj
+
+
+class ScopedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """PrimaryKeyRelatedField looked up with resolve_related(), optionally narrowed by a scope."""
+
+    def __init__(self, scope=None, **kwargs):
+        self.scope = scope
+        super().__init__(**kwargs)
+
+    def get_queryset(self):
+        # Also what the browsable API offers as choices
+        queryset = super().get_queryset()
+        request = self.context.get('request')
+        if self.scope is not None and request is not None:
+            queryset = self.scope(queryset, request)
+        return queryset
+
+    def to_internal_value(self, data):
+        request = self.context.get('request')
+        if request is None:
+            return super().to_internal_value(data) # Used outside a request, e.g. from the shell
+        if self.pk_field is not None:
+            data = self.pk_field.to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return resolve_related(request, super().get_queryset(), data, self.scope)
+        except ObjectDoesNotExist:
+            self.fail('does_not_exist', pk_value=data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
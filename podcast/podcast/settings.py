@@ -44,6 +44,7 @@ INSTALLED_APPS = [
     'category',
     'episodes_app',
     'subscriptions',
+    'search',
 ]
 
 MIDDLEWARE = [
@@ -131,20 +132,56 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'Users.CustomUser'
 
+# Username-or-email login in one indexed query (subclass of ModelBackend, so admin login still works)
+AUTHENTICATION_BACKENDS = [
+    'Users.backends.EmailOrUsernameBackend',
+]
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'Users.authentication.CachedTokenAuthentication', # TokenAuthentication with an LRU in front of the Token lookup
         'rest_framework.authentication.SessionAuthentication', # Good for browsable API
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny', # Default to AllowAny, apply specific permissions in views
     ],
-     # Mandatory: Add settings for token expiry times
-    'PASSWORD_RESET_TIMEOUT_HOURS': 1, # e.g., 1 hour expiry
-    'EMAIL_VERIFICATION_TIMEOUT_HOURS': 24, # e.g., 24 hours expiry
+}
+
+# Cursor pagination for the podcast, episode and subscription lists (see podcast/pagination.py)
+KEYSET_PAGINATION = {
+    'PAGE_SIZE': 20, # Default when ?page_size= is not given
+    'MAX_PAGE_SIZE': 100,
+}
 
+# Mandatory: Add settings for token expiry times (read as settings.X by Users/models.py and Users/tokens.py)
+PASSWORD_RESET_TIMEOUT_HOURS = 1 # e.g., 1 hour expiry
+EMAIL_VERIFICATION_TIMEOUT_HOURS = 24 # e.g., 24 hours expiry
+
+# Process pool used by the async login/reset views (see Users/hashing.py); requests
+# beyond MAX_PENDING get a 429 instead of queueing behind PBKDF2 work
+PASSWORD_HASHING_POOL = {
+    'WORKERS': os.cpu_count() or 1,
+    'MAX_PENDING': (os.cpu_count() or 1) * 4,
 }
 
+# Sliding-window throttles for login/register/password reset (see Users/throttling.py).
+# 'sqlite' shares the counters between the worker processes on one host.
+AUTH_THROTTLE = {
+    'STORE': 'memory',
+    'SQLITE_PATH': os.path.join(BASE_DIR, 'throttle.sqlite3'),
+    'RATES': {
+        'login_ip': '30/min',
+        'login_identity': '5/min',
+        'password_reset_ip': '10/min',
+        'password_reset_identity': '3/hour',
+        'register_ip': '10/hour',
+        'register_identity': '3/hour',
+    },
+}
+
+# 'signed' issues stateless HMAC tokens; 'table' stores them in PasswordResetToken/EmailVerificationToken
+AUTH_TOKEN_MODE = 'signed'
+
 # Mandatory: Configure your email backend
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend' # Or your preferred backend
 EMAIL_HOST = 'your_smtp_host'
@@ -154,8 +191,117 @@ EMAIL_HOST_USER = 'your_email@example.com'
 EMAIL_HOST_PASSWORD = 'your_email_password'
 DEFAULT_FROM_EMAIL = 'noreply@Users.com' # Mandatory sender email
 
+# Outbox worker (python manage.py send_outbox --loop), see Users/outbox.py
+# For local testing use EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+# or 'django.core.mail.backends.filebased.EmailBackend' with EMAIL_FILE_PATH.
+EMAIL_OUTBOX = {
+    'BATCH_SIZE': 100,
+    'MAX_ATTEMPTS': 5,
+    'RETRY_BACKOFF': 30, # Seconds, doubled after every failed attempt
+    'SENT_RETENTION': 7 * 86400, # Seconds sent messages are kept; dead letters stay until removed by hand
+}
+
+# Cache for resolved auth tokens (see Users/authentication.py)
+TOKEN_AUTH_CACHE = {
+    'MAX_ENTRIES': 10000,
+    'TTL': 60, # Seconds; also bounds how long another worker may keep a logged-out token
+    'SHARED_CACHE': None, # Set to a CACHES alias (e.g. 'default' backed by Redis/Memcached) to share across workers
+}
+
+# Search index (see search/backends.py). BACKEND None picks FTS5 on SQLite and plain
+# icontains queries elsewhere; after bulk imports run `python manage.py rebuild_search_index`.
+SEARCH = {
+    'BACKEND': None,
+    'MAX_CANDIDATES': 10000, # Newest matches ranked per query; bounds latency for very common words
+}
+
+# Facet counts of /api/podcasts/facets/ (see category/filters.py), cached per filter combination
+PODCAST_FACETS = {
+    'CACHE': 'default',
+    'TTL': 300, # Seconds; podcast and category changes invalidate earlier
+}
+
+# In-memory copy of the Category table (see category/catalog.py), shared through a CACHES alias
+CATEGORY_CATALOG = {
+    'CACHE': 'default', # Use a shared backend (Redis/Memcached) so every worker sees changes
+    'CHECK_INTERVAL': 1.0, # Seconds between version checks against the cache
+    'MAX_AGE': 300, # Reload from the DB at least this often, the only refresh when the cache is per-process
+}
+
+# Resized podcast artwork (see category/imaging.py); backfill with `python manage.py generate_image_derivatives`
+PODCAST_IMAGE_DERIVATIVES = {
+    'SIZES': {'small': 120, 'medium': 300, 'large': 600}, # Square edge in pixels
+    'FORMATS': ('jpeg', 'webp'),
+    'QUALITY': 82,
+    'WORKERS': 2, # Background threads per process
+    'MAX_PENDING': 200,
+}
+
+# Episode audio at /api/episodes/<pk>/audio/ (see episodes_app/audio.py). Behind nginx use
+# 'x-accel' with an `internal` location ACCEL_PREFIX aliased to MEDIA_ROOT
+EPISODE_AUDIO = {
+    'MODE': 'direct', # 'direct' (sendfile through wsgi.file_wrapper), 'x-accel' or 'x-sendfile'
+    'ACCEL_PREFIX': '/protected-media/',
+    'MAX_RANGES': 16,
+    'MAX_AGE': 3600, # Seconds, Cache-Control is always private
+}
+
+# Resumable chunked audio uploads at /api/podcasts/<pk>/uploads/ (see episodes_app/uploads.py);
+# run `python manage.py reap_uploads` periodically to remove abandoned sessions
+EPISODE_UPLOADS = {
+    'MAX_SIZE': 2 * 1024 ** 3, # Bytes per file
+    'MAX_CHUNK_SIZE': 64 * 1024 * 1024, # Bytes per PUT
+    'BUFFER_SIZE': 256 * 1024, # Bytes held in memory per upload request
+    'SESSION_TTL': 24 * 3600, # Seconds since the last chunk
+}
+
+# Duration, bitrate, sample rate and channels read from uploaded audio headers (see
+# episodes_app/metadata.py); backfill with `python manage.py extract_audio_metadata --workers N`
+EPISODE_AUDIO_METADATA = {
+    'WORKERS': 2, # Background threads per process
+    'MAX_PENDING': 500,
+}
+
+# RSS feeds at /api/podcasts/<pk>/feed.xml (see episodes_app/feeds.py), kept gzipped in a
+# CACHES alias; use a shared backend so one rebuild serves every worker
+PODCAST_FEEDS = {
+    'CACHE': 'default',
+    'TTL': 86400, # Seconds; episode and podcast changes invalidate earlier
+    'MAX_AGE': 300, # Cache-Control max-age for podcast apps
+}
+
+# Public episode lists (non-owners) cached per podcast until the next scheduled episode is
+# due (see episodes_app/visibility.py); episode writes invalidate them
+EPISODE_LIST_CACHE = {
+    'CACHE': 'default', # Use a shared backend (Redis/Memcached) so every worker sees invalidations
+    'TTL': 300,
+}
+
+# Orphaned media files (see podcast/media_gc.py): run `python manage.py collect_orphaned_media`
+# daily; queryset, cascade and admin bulk deletes leave the files of the rows behind
+MEDIA_GC = {
+    'GRACE': 86400, # Files changed within the last day are never removed
+    'QUARANTINE': '', # e.g. 'orphans' to move them below MEDIA_ROOT/orphans/ for a week first
+}
+
+# GET list endpoints serialize .values() rows with compiled functions instead of the
+# ModelSerializers (see podcast/projection.py); the output is the same either way
+FAST_READ_SERIALIZERS = True
+
 BASE_API_URL = 'http://localhost:8000/api/auth/' 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media') # Files will be stored in a 'media' folder at the root of your project
+
+# Episode audio and podcast artwork go to STORAGES['media']: content-addressed, deduplicated
+# blobs under MEDIA_ROOT/cas/ (see podcast/media_store.py). Move older files in with
+# `python manage.py dedupe_media`; remove 'media' to store them under their upload_to names again.
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    'media': {'BACKEND': 'podcast.media_store.ContentAddressedStorage'},
+}
+MEDIA_STORE = {
+    'GRACE': 3600, # Seconds an unreferenced blob is kept after it was last uploaded
+}
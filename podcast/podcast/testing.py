@@ -0,0 +1,24 @@
+"""
+Helpers shared by the apps' tests.
+"""
+
+import tempfile
+
+from django.test import override_settings
+
+
+class TemporaryMediaMixin:
+    """
+    Each test gets an empty MEDIA_ROOT (``self.media_root``), removed afterwards.
+    ``media_settings`` are overridden along with it, e.g. ``{'MEDIA_STORE': {'GRACE': 0}}``.
+    """
+    media_settings = {}
+
+    def setUp(self):
+        super().setUp()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.media_root = media.name
+        settings = override_settings(MEDIA_ROOT=media.name, **self.media_settings)
+        settings.enable()
+        self.addCleanup(settings.disable)
@@ -27,6 +27,7 @@ urlpatterns = [
     path('api/', include('category.urls')), # Replace 'your_podcast_app' and include its urls
     path('api/', include('episodes_app.urls')), # Mandatory: Include Task 3 urls here
     path('api/', include('subscriptions.urls')),        # Mandatory: Include Task 4 urls here
+    path('api/search/', include('search.urls')), # Full-text search over podcasts and episodes
     # ... other project urls
 ]
 
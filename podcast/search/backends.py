@@ -0,0 +1,242 @@
+# In your search app's backends.py
+
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from category.models import Podcast
+from episodes_app.models import Episode
+
+# Defaults, override with SEARCH in settings.py
+DEFAULT_SEARCH = {
+    'BACKEND': None, # Dotted path to a BaseSearchBackend subclass, None picks one from the database vendor
+    'MAX_CANDIDATES': 10000, # FTS5: only the newest N matches of a query are ranked with BM25
+}
+
+
+def get_search_settings():
+    return {**DEFAULT_SEARCH, **getattr(settings, 'SEARCH', {})}
+
+
+PODCAST_TABLE = 'search_podcast_fts'
+EPISODE_TABLE = 'search_episode_fts'
+
+TERM_RE = re.compile(r'\w+\*?', re.UNICODE)
+
+
+def parse_terms(query):
+    """
+    Splits the user query into (term, is_prefix) pairs. A trailing * asks for a prefix
+    match ("pyth*"), anything that isn't a word character is dropped.
+    """
+    return [(term.rstrip('*').lower(), term.endswith('*')) for term in TERM_RE.findall(query or '')]
+
+
+class BaseSearchBackend:
+    """Interface the search views and signal handlers talk to."""
+
+    def index_podcast(self, podcast):
+        raise NotImplementedError
+
+    def remove_podcast(self, podcast_id):
+        raise NotImplementedError
+
+    def rename_category(self, category_id, name):
+        raise NotImplementedError
+
+    def index_episode(self, episode):
+        raise NotImplementedError
+
+    def remove_episode(self, episode_id):
+        raise NotImplementedError
+
+    def search_podcasts(self, query, limit):
+        """Podcast ids, best match first."""
+        raise NotImplementedError
+
+    def search_episodes(self, query, limit):
+        """Ids of published episodes, best match first."""
+        raise NotImplementedError
+
+    def rebuild(self, batch_size=10000, progress=None):
+        raise NotImplementedError
+
+
+class SQLiteFTS5Backend(BaseSearchBackend):
+    """
+    Inverted index in two FTS5 tables (created by search/migrations/0001_initial.py)
+    whose rowid is the podcast / episode id. Results are ranked with BM25 and title
+    matches weigh more than descriptions or show notes.
+
+    BM25 has to score every matching row, which for a common word is most of the
+    table. Ranking is therefore limited to the newest MAX_CANDIDATES matches: a
+    rowid-ordered probe (cheap, it just walks the term's doclist) finds the lowest
+    rowid worth ranking and the ranked query gets `rowid >= floor`, which FTS5
+    uses to skip the older part of the doclists.
+    """
+
+    podcast_weights = (10.0, 1.0, 3.0) # title, description, category
+    episode_weights = (10.0, 1.0) # title, show_notes
+
+    def __init__(self, max_candidates=None):
+        self.max_candidates = max_candidates or get_search_settings()['MAX_CANDIDATES']
+
+    def _execute(self, sql, params=()):
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    @staticmethod
+    def match_expression(query):
+        # Every term is quoted so FTS5 operators in user input are treated as text
+        terms = parse_terms(query)
+        return ' '.join(f'"{term}"*' if prefix else f'"{term}"' for term, prefix in terms if term)
+
+    # --- Incremental updates (called from search/signals.py) ---
+    def index_podcast(self, podcast):
+        category_name = podcast.category.name if podcast.category_id else ''
+        self._execute(f'DELETE FROM {PODCAST_TABLE} WHERE rowid = %s', [podcast.pk])
+        self._execute(
+            f'INSERT INTO {PODCAST_TABLE} (rowid, title, description, category) VALUES (%s, %s, %s, %s)',
+            [podcast.pk, podcast.title, podcast.description, category_name],
+        )
+
+    def remove_podcast(self, podcast_id):
+        self._execute(f'DELETE FROM {PODCAST_TABLE} WHERE rowid = %s', [podcast_id])
+
+    def rename_category(self, category_id, name):
+        self._execute(
+            f'UPDATE {PODCAST_TABLE} SET category = %s WHERE rowid IN '
+            f'(SELECT id FROM {Podcast._meta.db_table} WHERE category_id = %s)',
+            [name, category_id],
+        )
+
+    def index_episode(self, episode):
+        self._execute(f'DELETE FROM {EPISODE_TABLE} WHERE rowid = %s', [episode.pk])
+        self._execute(
+            f'INSERT INTO {EPISODE_TABLE} (rowid, title, show_notes) VALUES (%s, %s, %s)',
+            [episode.pk, episode.title, episode.show_notes],
+        )
+
+    def remove_episode(self, episode_id):
+        self._execute(f'DELETE FROM {EPISODE_TABLE} WHERE rowid = %s', [episode_id])
+
+    # --- Queries ---
+    def candidate_floor(self, table, match):
+        """Lowest rowid among the newest max_candidates matches, 0 if there are fewer."""
+        rows = self._execute(
+            f'SELECT rowid FROM {table} WHERE {table} MATCH %s ORDER BY rowid DESC LIMIT 1 OFFSET %s',
+            [match, self.max_candidates - 1],
+        )
+        return rows[0][0] if rows else 0
+
+    def search_podcasts(self, query, limit):
+        match = self.match_expression(query)
+        if not match:
+            return []
+        weights = ', '.join(str(w) for w in self.podcast_weights)
+        rows = self._execute(
+            f'SELECT rowid FROM {PODCAST_TABLE} WHERE {PODCAST_TABLE} MATCH %s AND rowid >= %s '
+            f'ORDER BY bm25({PODCAST_TABLE}, {weights}) LIMIT %s',
+            [match, self.candidate_floor(PODCAST_TABLE, match), limit],
+        )
+        return [row[0] for row in rows]
+
+    def search_episodes(self, query, limit):
+        match = self.match_expression(query)
+        if not match:
+            return []
+        weights = ', '.join(str(w) for w in self.episode_weights)
+        # Join back on the primary key to keep drafts and scheduled episodes out
+        rows = self._execute(
+            f'SELECT f.rowid FROM {EPISODE_TABLE} f JOIN {Episode._meta.db_table} e ON e.id = f.rowid '
+            f'WHERE {EPISODE_TABLE} MATCH %s AND f.rowid >= %s '
+            f'AND e.published_at IS NOT NULL AND e.published_at <= %s '
+            f'ORDER BY bm25({EPISODE_TABLE}, {weights}) LIMIT %s',
+            [match, self.candidate_floor(EPISODE_TABLE, match),
+             connection.ops.adapt_datetimefield_value(timezone.now()), limit],
+        )
+        return [row[0] for row in rows]
+
+    # --- Full rebuild (manage.py rebuild_search_index) ---
+    def rebuild(self, batch_size=10000, progress=None):
+        podcast_table, category_table = Podcast._meta.db_table, Podcast._meta.get_field('category').related_model._meta.db_table
+        episode_table = Episode._meta.db_table
+        jobs = (
+            (PODCAST_TABLE, podcast_table,
+             f'INSERT INTO {PODCAST_TABLE} (rowid, title, description, category) '
+             f'SELECT p.id, p.title, p.description, COALESCE(c.name, \'\') FROM {podcast_table} p '
+             f'LEFT JOIN {category_table} c ON c.id = p.category_id WHERE p.id > %s AND p.id <= %s'),
+            (EPISODE_TABLE, episode_table,
+             f'INSERT INTO {EPISODE_TABLE} (rowid, title, show_notes) '
+             f'SELECT e.id, e.title, e.show_notes FROM {episode_table} e WHERE e.id > %s AND e.id <= %s'),
+        )
+        for fts_table, source_table, insert_sql in jobs:
+            self._execute(f'DELETE FROM {fts_table}')
+            max_id = self._execute(f'SELECT COALESCE(MAX(id), 0) FROM {source_table}')[0][0]
+            # Copy id ranges with INSERT ... SELECT so rows never pass through Python
+            for start in range(0, max_id, batch_size):
+                self._execute(insert_sql, [start, start + batch_size])
+                if progress:
+                    progress(fts_table, min(start + batch_size, max_id), max_id)
+            self._execute(f"INSERT INTO {fts_table} ({fts_table}) VALUES ('optimize')") # Merge index segments
+
+
+class IContainsBackend(BaseSearchBackend):
+    """
+    Fallback for databases without FTS5: no index to maintain, plain icontains
+    filters ordered by recency. Fine for development, not for large catalogs.
+    """
+
+    def index_podcast(self, podcast):
+        pass
+
+    def remove_podcast(self, podcast_id):
+        pass
+
+    def rename_category(self, category_id, name):
+        pass
+
+    def index_episode(self, episode):
+        pass
+
+    def remove_episode(self, episode_id):
+        pass
+
+    @staticmethod
+    def _filter(queryset, query, fields):
+        terms = [term for term, _ in parse_terms(query) if term]
+        if not terms:
+            return queryset.none()
+        for term in terms:
+            condition = Q()
+            for field in fields:
+                condition |= Q(**{f'{field}__icontains': term})
+            queryset = queryset.filter(condition)
+        return queryset
+
+    def search_podcasts(self, query, limit):
+        queryset = self._filter(Podcast.objects.all(), query, ('title', 'description', 'category__name'))
+        return list(queryset.order_by('-created_at').values_list('id', flat=True)[:limit])
+
+    def search_episodes(self, query, limit):
+        queryset = self._filter(
+            Episode.objects.filter(published_at__isnull=False, published_at__lte=timezone.now()),
+            query, ('title', 'show_notes'),
+        )
+        return list(queryset.values_list('id', flat=True)[:limit])
+
+    def rebuild(self, batch_size=10000, progress=None):
+        pass
+
+
+def get_search_backend():
+    """SEARCH['BACKEND'] from settings.py, or FTS5 on SQLite and icontains elsewhere."""
+    path = get_search_settings()['BACKEND']
+    if path:
+        return import_string(path)()
+    return SQLiteFTS5Backend() if connection.vendor == 'sqlite' else IContainsBackend()
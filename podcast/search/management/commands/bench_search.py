@@ -0,0 +1,80 @@
+import itertools
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from Users.models import CustomUser
+from category.models import Category, Podcast
+from episodes_app.models import Episode
+from search.backends import IContainsBackend, SQLiteFTS5Backend
+
+# Zipf-ish vocabulary: a few very common words and a long tail of rare ones
+VOCABULARY = [f'word{i}' for i in range(20000)]
+CUM_WEIGHTS = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(VOCABULARY))))
+QUERIES = ['word3', 'word150', 'word19000', 'word123*', 'word12*', 'word7 word40', 'python', 'word3 word19000']
+
+
+class Command(BaseCommand):
+    help = "Seeds episodes in a rolled-back transaction and times FTS5 search against the icontains fallback."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--episodes', type=int, default=1_000_000)
+        parser.add_argument('--podcasts', type=int, default=10_000)
+        parser.add_argument('--runs', type=int, default=20)
+        parser.add_argument('--max-candidates', type=int, default=None, help="Defaults to SEARCH['MAX_CANDIDATES'].")
+        parser.add_argument('--skip-icontains', action='store_true', help="Don't time the (slow) icontains fallback.")
+
+    def text(self, rng, words):
+        return ' '.join(rng.choices(VOCABULARY, cum_weights=CUM_WEIGHTS, k=words))
+
+    def timed(self, search, query, runs):
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            ids = search(query, 20)
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings), max(timings), len(ids)
+
+    def handle(self, *args, **options):
+        rng = random.Random(9)
+        fts, icontains = SQLiteFTS5Backend(options['max_candidates']), IContainsBackend()
+        uncapped = SQLiteFTS5Backend(max_candidates=10 ** 9) # Ranks every match
+        with transaction.atomic():
+            user = CustomUser.objects.create_user(username='bench-search', email='bench-search@example.com', password='x')
+            category = Category.objects.create(name='Bench search', slug='bench-search')
+            now = timezone.now()
+            self.stdout.write(f"Seeding {options['podcasts']:,} podcasts and {options['episodes']:,} episodes...")
+            podcasts = Podcast.objects.bulk_create([
+                Podcast(user=user, category=category, title=self.text(rng, 4), description=self.text(rng, 30))
+                for _ in range(options['podcasts'])
+            ], batch_size=5000)
+            for start in range(0, options['episodes'], 10_000):
+                Episode.objects.bulk_create([
+                    Episode(
+                        podcast=rng.choice(podcasts), user=user, title=self.text(rng, 6),
+                        show_notes=self.text(rng, 40), published_at=now - timezone.timedelta(minutes=i),
+                    )
+                    for i in range(start, min(start + 10_000, options['episodes']))
+                ])
+
+            started = time.perf_counter()
+            fts.rebuild(batch_size=50_000)
+            self.stdout.write(f"Index built in {time.perf_counter() - started:.1f}s\n")
+
+            for query in QUERIES:
+                median, worst, hits = self.timed(fts.search_episodes, query, options['runs'])
+                line = f"episodes {query!r:<18} FTS5 median {median:7.2f} ms  max {worst:7.2f} ms  ({hits} hits)"
+                median, _, _ = self.timed(uncapped.search_episodes, query, 3)
+                line += f"   rank all {median:8.1f} ms"
+                if not options['skip_icontains']:
+                    median, _, _ = self.timed(icontains.search_episodes, query, 1)
+                    line += f"   icontains {median:9.1f} ms"
+                self.stdout.write(line)
+            for query in QUERIES[:3]:
+                median, worst, hits = self.timed(fts.search_podcasts, query, options['runs'])
+                self.stdout.write(f"podcasts {query!r:<18} FTS5 median {median:7.2f} ms  max {worst:7.2f} ms  ({hits} hits)")
+            transaction.set_rollback(True)
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from search.backends import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the podcast and episode search index from scratch (run after bulk imports or restores)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10000, help="Rows copied per INSERT ... SELECT.")
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        started = time.monotonic()
+
+        def progress(table, done, total):
+            if done == total or done % (options['batch_size'] * 50) == 0:
+                self.stdout.write(f"  {table}: {done:,} / {total:,} ids")
+
+        # One transaction, so searches keep seeing the old index until the new one is complete
+        with transaction.atomic():
+            backend.rebuild(batch_size=options['batch_size'], progress=progress)
+        self.stdout.write(f"{type(backend).__name__}: index rebuilt in {time.monotonic() - started:.1f}s")
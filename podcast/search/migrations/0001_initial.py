@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:10
+
+from django.db import migrations
+
+# Both tables use the podcast / episode id as rowid. prefix='2 3' keeps extra index
+# entries for 2 and 3 character prefixes so "pod*" style queries stay fast.
+CREATE_TABLES = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS search_podcast_fts USING fts5("
+    "title, description, category, prefix='2 3', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS search_episode_fts USING fts5("
+    "title, show_notes, prefix='2 3', tokenize='unicode61 remove_diacritics 2')",
+)
+DROP_TABLES = (
+    "DROP TABLE IF EXISTS search_podcast_fts",
+    "DROP TABLE IF EXISTS search_episode_fts",
+)
+
+
+def create_fts_tables(apps, schema_editor):
+    # Only SQLite has FTS5; other databases use search.backends.IContainsBackend
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in CREATE_TABLES:
+        schema_editor.execute(sql)
+    # Index what already exists
+    schema_editor.execute(
+        "INSERT INTO search_podcast_fts (rowid, title, description, category) "
+        "SELECT p.id, p.title, p.description, COALESCE(c.name, '') FROM category_podcast p "
+        "LEFT JOIN category_category c ON c.id = p.category_id"
+    )
+    schema_editor.execute(
+        "INSERT INTO search_episode_fts (rowid, title, show_notes) "
+        "SELECT id, title, show_notes FROM episodes_app_episode"
+    )
+
+
+def drop_fts_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in DROP_TABLES:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('category', '0002_keyset_indexes'),
+        ('episodes_app', '0002_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_tables, drop_fts_tables),
+    ]
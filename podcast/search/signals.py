@@ -0,0 +1,44 @@
+# In your search app's signals.py
+# Keeps the search index in step with single-object saves and deletes. Bulk
+# operations (bulk_create, QuerySet.update) skip signals; run
+# `python manage.py rebuild_search_index` after those.
+
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from category.models import Category, Podcast
+from episodes_app.models import Episode
+
+from .backends import get_search_backend
+
+
+@receiver(post_save, sender=Podcast)
+def index_podcast(sender, instance, **kwargs):
+    get_search_backend().index_podcast(instance)
+
+
+@receiver(post_delete, sender=Podcast)
+def remove_podcast(sender, instance, **kwargs):
+    get_search_backend().remove_podcast(instance.pk)
+
+
+@receiver(post_save, sender=Category)
+def rename_category(sender, instance, created, **kwargs):
+    if not created:
+        get_search_backend().rename_category(instance.pk, instance.name)
+
+
+@receiver(pre_delete, sender=Category)
+def clear_category(sender, instance, **kwargs):
+    # Podcasts are set to NULL with an UPDATE that sends no signals, so clear the name first
+    get_search_backend().rename_category(instance.pk, '')
+
+
+@receiver(post_save, sender=Episode)
+def index_episode(sender, instance, **kwargs):
+    get_search_backend().index_episode(instance)
+
+
+@receiver(post_delete, sender=Episode)
+def remove_episode(sender, instance, **kwargs):
+    get_search_backend().remove_episode(instance.pk)
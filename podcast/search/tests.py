@@ -0,0 +1,68 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from category.models import Category, Podcast
+from episodes_app.models import Episode
+from Users.models import CustomUser
+
+
+@override_settings(EPISODE_AUDIO_METADATA={'MAX_PENDING': 0}) # No background probes on commit
+class SearchTests(TestCase):
+    """The index follows saves and deletes; GET /api/search/ ranks from it (search/backends.py)."""
+
+    def setUp(self):
+        self.owner = CustomUser.objects.create_user(username='owner', email='owner@example.com', password='x')
+        self.category = Category.objects.create(name='Technology', slug='technology')
+        self.podcast = Podcast.objects.create(
+            user=self.owner, category=self.category, title='Python Weekly', description='News about snakes and code',
+        )
+        self.episode = Episode.objects.create(
+            podcast=self.podcast, user=self.owner, title='Asyncio explained', show_notes='Event loops',
+            audio_url='a.mp3', published_at=timezone.now(),
+        )
+        Episode.objects.create(podcast=self.podcast, user=self.owner, title='Asyncio draft', audio_url='b.mp3')
+
+    def search(self, query, kind='podcast'):
+        response = APIClient().get('/api/search/', {'q': query, 'type': kind})
+        self.assertEqual(response.status_code, 200)
+        return [result['title'] for result in response.data['results']]
+
+    def test_fts5_follows_changes(self):
+        self.assertEqual(self.search('pyth*'), ['Python Weekly'])
+        self.assertEqual(self.search('technology'), ['Python Weekly']) # Category name is indexed
+        self.assertEqual(self.search('asyncio', 'episode'), ['Asyncio explained']) # Drafts stay out
+        self.assertEqual(self.search('"python" OR ('), []) # User input isn't FTS5 syntax
+
+        self.podcast.title = 'Rust Weekly'
+        self.podcast.save()
+        self.category.name = 'Programming'
+        self.category.save()
+        self.assertEqual(self.search('python'), [])
+        self.assertEqual(self.search('rust programming'), ['Rust Weekly'])
+
+        self.episode.title = 'Coroutines explained'
+        self.episode.save()
+        self.assertEqual(self.search('coroutines', 'episode'), ['Coroutines explained'])
+        self.episode.delete()
+        self.podcast.delete()
+        self.assertEqual(self.search('coroutines', 'episode'), [])
+        self.assertEqual(self.search('rust'), [])
+
+    def test_rebuild_after_bulk_update(self):
+        Podcast.objects.filter(pk=self.podcast.pk).update(title='Golang Weekly') # No signals
+        self.assertEqual(self.search('golang'), [])
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(self.search('golang'), ['Golang Weekly'])
+        self.assertEqual(self.search('asyncio', 'episode'), ['Asyncio explained'])
+
+    @override_settings(SEARCH={'BACKEND': 'search.backends.IContainsBackend'})
+    def test_icontains_backend(self):
+        self.assertEqual(self.search('pyth* snakes'), ['Python Weekly'])
+        self.assertEqual(self.search('technology'), ['Python Weekly'])
+        self.assertEqual(self.search('asyncio', 'episode'), ['Asyncio explained'])
+        self.podcast.delete()
+        self.assertEqual(self.search('python'), [])
@@ -0,0 +1,46 @@
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from category.models import Podcast
+from category.serializers import PodcastSerializer
+from episodes_app.models import Episode
+from episodes_app.serializers import EpisodeSerializer
+
+from .backends import get_search_backend
+
+MAX_LIMIT = 50
+
+
+# --- Public Search ---
+class SearchView(APIView):
+    """
+    GET /api/search/?q=python+pod*&type=podcast|episode&limit=20
+    Best matches first; a trailing * on a term makes it a prefix query.
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        kind = request.query_params.get('type', 'podcast')
+        if kind not in ('podcast', 'episode'):
+            return Response({'type': ["Must be 'podcast' or 'episode'."]}, status=400)
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 20)), MAX_LIMIT))
+        except ValueError:
+            limit = 20
+
+        backend = get_search_backend()
+        if kind == 'podcast':
+            ids = backend.search_podcasts(query, limit)
+            objects = Podcast.objects.select_related('user').in_bulk(ids) # Categories come from the catalog
+            serializer_class = PodcastSerializer
+        else:
+            ids = backend.search_episodes(query, limit)
+            objects = Episode.objects.select_related('podcast', 'user').in_bulk(ids)
+            serializer_class = EpisodeSerializer
+
+        # in_bulk loses the ranking, put the rows back in the order the index returned
+        results = [objects[pk] for pk in ids if pk in objects]
+        data = serializer_class(results, many=True, context={'request': request}).data
+        return Response({'query': query, 'type': kind, 'count': len(data), 'results': data})
@@ -21,6 +21,10 @@ class Subscription(models.Model):
         # Mandatory: Prevents a user from subscribing to the same podcast more than once
         unique_together = ('user', 'podcast')
         ordering = ['-subscribed_at'] # Order by most recent subscriptions first
+        indexes = [
+            # Keyset pagination of UserSubscriptionsView
+            models.Index(fields=['user', '-subscribed_at', '-id'], name='subscription_user_recent_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} subscribed to {self.podcast.title}"
@@ -1,10 +1,12 @@
 from rest_framework import serializers
 from category.models import Podcast
 from category.serializers import PodcastSerializer
+from podcast.fieldsets import FieldsetSerializerMixin # ?fields=id,podcast.title,...
+from podcast.relations import ScopedPrimaryKeyRelatedField # Podcast looked up once per request
 from .models import Subscription
 
 
-class SubscriptionSerializer(serializers.ModelSerializer):
+class SubscriptionSerializer(FieldsetSerializerMixin, serializers.ModelSerializer):
     # Nested serializer to show the details of the subscribed podcast
     # Make it read-only as you don't update the podcast *via* the subscription serializer
     podcast = PodcastSerializer(read_only=True)
@@ -21,8 +23,8 @@ class SubscriptionSerializer(serializers.ModelSerializer):
 
 # Serializer specifically for input when subscribing/unsubscribing
 class SubscribeUnsubscribeSerializer(serializers.Serializer):
-    podcast_id = serializers.PrimaryKeyRelatedField(
-         queryset=Podcast.objects.all(), # Ensure the podcast exists
+    podcast_id = ScopedPrimaryKeyRelatedField(
+         queryset=Podcast.objects.all(), # Ensure the podcast exists; anyone may subscribe, so no scope
          write_only=True # Only for input
     )
 
@@ -0,0 +1,20 @@
+# In your Django app's signals.py
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from category import changes # Last-Modified markers
+from category.counters import adjust_counters
+from .models import Subscription
+
+
+@receiver(post_save, sender=Subscription)
+def count_subscription(sender, instance, created, **kwargs):
+    if created:
+        adjust_counters(instance.podcast_id, subscriber_count=1)
+
+
+@receiver(post_delete, sender=Subscription)
+def uncount_subscription(sender, instance, **kwargs):
+    adjust_counters(instance.podcast_id, subscriber_count=-1)
+    changes.mark_changed(changes.subscriptions_deleted_key(instance.user_id)) # Gone from the user's list
@@ -1,3 +1,56 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from category.models import Category, Podcast
+from Users.models import CustomUser
+from .models import Subscription
+
+
+class SubscriptionProjectionParityTests(TestCase):
+    """GET /api/me/subscriptions/ gives the same JSON with and without the compiled serialization."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(username='listener', email='listener@example.com', password='x')
+        owner = CustomUser.objects.create_user(username='owner', email='owner@example.com', password='x')
+        category = Category.objects.create(name='News', slug='news')
+        for index in range(3):
+            podcast = Podcast.objects.create(
+                user=owner, category=category if index else None, title=f'Show {index}', description='d',
+            )
+            Subscription.objects.create(user=cls.user, podcast=podcast)
+
+    def test_list_matches_serializer(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        for params in ({'fields': 'id,podcast.id,podcast.title,podcast.image'}, {}, {'page_size': 2}):
+            fast = client.get('/api/me/subscriptions/', params)
+            with override_settings(FAST_READ_SERIALIZERS=False):
+                slow = client.get('/api/me/subscriptions/', params)
+            self.assertEqual(fast.status_code, 200)
+            self.assertEqual(fast.json(), slow.json(), params)
+        self.assertEqual(len(fast.json()['results']), 2)
+
+
+class SubscriptionLastModifiedTests(TestCase):
+    """Unsubscribing moves Last-Modified though it leaves no row behind (category/changes.py)."""
+
+    def test_if_modified_since_after_unsubscribing(self):
+        user = CustomUser.objects.create_user(username='listener', email='listener@example.com', password='x')
+        owner = CustomUser.objects.create_user(username='owner', email='owner@example.com', password='x')
+        for index in range(2):
+            Subscription.objects.create(user=user, podcast=Podcast.objects.create(user=owner, title=f'Show {index}', description='d'))
+        # Last-Modified never names the current second, so nothing in it could 304 yet
+        Subscription.objects.update(subscribed_at=timezone.now() - timedelta(hours=1))
+        Podcast.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+        client = APIClient()
+        client.force_authenticate(user)
+        last_modified = client.get('/api/me/subscriptions/')['Last-Modified']
+        self.assertEqual(client.get('/api/me/subscriptions/', HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+        Subscription.objects.filter(user=user).first().delete()
+        response = client.get('/api/me/subscriptions/', HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 1)
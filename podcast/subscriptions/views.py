@@ -5,7 +5,13 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated # Permissions
 from category.models import Podcast # Import Podcast model
+from django.db import IntegrityError, transaction
 from django.shortcuts import get_object_or_404 # For retrieving objects
+from category import changes # Unsubscribes and category renames, for Last-Modified
+from category.catalog import category_catalog # Category names in the nested podcasts
+from podcast.conditional import ConditionalGetMixin # ETag / Last-Modified, 304 without a full fetch
+from podcast.pagination import KeysetPagination # Cursor pagination on (subscribed_at, id)
+from podcast.projection import ProjectedListMixin # GET lists serialized straight from .values() rows
 from .models import Subscription
 from .serializers import SubscriptionSerializer, SubscribeUnsubscribeSerializer # Import your serializers
 
@@ -23,7 +29,13 @@ class SubscribeView(APIView):
         user = serializer.validated_data['user']       # Get user object from validated data
 
         # Mandatory: Create the subscription
-        subscription = Subscription.objects.create(user=user, podcast=podcast)
+        try:
+            # The subscription and the subscriber_count bump (subscriptions/signals.py) commit together
+            with transaction.atomic():
+                subscription = Subscription.objects.create(user=user, podcast=podcast)
+        except IntegrityError:
+            # A concurrent request subscribed first, between validation and this insert
+            return Response({'non_field_errors': ["You are already subscribed to this podcast."]}, status=status.HTTP_400_BAD_REQUEST)
 
         # Optionally, return the created subscription details
         # subscription_serializer = SubscriptionSerializer(subscription)
@@ -52,8 +64,9 @@ class UnsubscribeView(APIView):
              # Mandatory: Return error if subscription doesn't exist
              return Response({'detail': 'You are not subscribed to this podcast.'}, status=status.HTTP_404_NOT_FOUND)
 
-         # Mandatory: Delete the subscription
-         subscription.delete()
+         # Mandatory: Delete the subscription (and decrement subscriber_count in the same transaction)
+         with transaction.atomic():
+             subscription.delete()
 
          # Get the podcast title for the response (optional)
          try:
@@ -70,10 +83,20 @@ class UnsubscribeView(APIView):
 
 # --- List User's Subscriptions ---
 # Using RetrieveAPIView for a single user's subscriptions
-class UserSubscriptionsView(generics.ListAPIView):
+class UserSubscriptionsView(ConditionalGetMixin, ProjectedListMixin, generics.ListAPIView):
     serializer_class = SubscriptionSerializer
     # Mandatory: Only authenticated users can view their subscriptions
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-subscribed_at', '-id') # Served by subscription_user_recent_idx
+    conditional_timestamps = ('subscribed_at', 'podcast__updated_at') # New subscriptions, changed podcasts
+
+    def get_conditional_extra(self):
+        return (category_catalog.version(),)
+
+    def get_conditional_changes(self):
+        # Unsubscribing leaves no row behind; category names come from the catalog
+        return (changes.last_changed(changes.subscriptions_deleted_key(self.request.user.pk), changes.CATEGORIES),)
 
     def get_queryset(self):
         """